@@ -1,44 +1,162 @@
+"""
+Token-aware text chunker
+Chunks are measured in tokens of the embedding model's tokenizer (multilingual-e5),
+split at the highest-priority separator that fits, and consecutive chunks share
+a sliding window of `overlap` tokens.
+
+The text is tokenized once and every separator regex is scanned once, so chunking
+a page is linear in its length.
+"""
+
 import re
-from typing import List
-
-def recursive_chunk(text, max_size: int=512, level: int=0, overlap: int=128):
-    text = text.strip()
-    if not text:
-        return []
-
-    # If the text is already within the max size, return it as a single chunk
-    if len(text) <= max_size:
-        return [text]
-
-    # Define separators for different levels of chunking
-    # 1. Paragraphs
-    # 2. Sentences (Arabic/English) 
-    # 3. Newlines
-    # 4. Words (Spaces)
-    separators = [
-    r'\n{2,}',                      # Paragraphs
-    r'(?<=[!؟!?])',               # Sentences (AR + EN)
-    ]
-
-    # If we ran out of separators, force split by size
-    if level >= len(separators):
-        return [text[i*(i - overlap):i + max_size] for i in range(0, len(text), max_size)]
-
-    separator = separators[level]
-    
-    # Split the text
-    chunks = re.split(separator, text)
-    chunks = [c.strip() for c in chunks if c.strip()]
-    
-    # If splitting didn't reduce the chunk (separator not found), try next level immediately
-    if len(chunks) == 1 and len(chunks[0]) > max_size:
-        return recursive_chunk(text, max_size, level + 1)
-        
-    final_chunks = []
-    for chunk in chunks:
-        if len(chunk) > max_size:
-            final_chunks.extend(recursive_chunk(chunk, max_size, level + 1))
-        else:
-            final_chunks.append(chunk)
-
-    return final_chunks
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_TOKENIZER = "intfloat/multilingual-e5-large"
+
+# Split points, highest priority first. Each pattern matches the gap between two
+# pieces; the split happens at the end of the match (the next piece's first token).
+SEPARATORS = [
+    re.compile(r'\n\s*\n\s*'),                  # Paragraphs
+    re.compile(r'\n\s*'),                       # Lines
+    re.compile(r'(?<=[.!?؟۔…])\s+'),            # Sentences (AR + EN)
+    re.compile(r'(?<=[;:؛،,])\s+'),             # Clauses (AR + EN)
+    re.compile(r'\s+'),                         # Words
+]
+
+
+class RegexTokenizer:
+    """Fallback tokenizer when transformers is unavailable: words and punctuation marks"""
+
+    pattern = re.compile(r'\w+|[^\w\s]')
+
+    def offsets(self, text: str) -> List[Tuple[int, int]]:
+        return [match.span() for match in self.pattern.finditer(text)]
+
+
+class HFTokenizer:
+    """Character offsets of a Hugging Face fast tokenizer's tokens (no special tokens)"""
+
+    def __init__(self, model_name: str):
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def offsets(self, text: str) -> List[Tuple[int, int]]:
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        # Drop zero-width tokens (e.g. a lone sentencepiece '▁')
+        return [(start, end) for start, end in encoding['offset_mapping'] if end > start]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: Optional[str] = DEFAULT_TOKENIZER):
+    """Tokenizer used to measure chunks, loaded once per process"""
+    if model_name is None:
+        return RegexTokenizer()
+    try:
+        return HFTokenizer(model_name)
+    except (ImportError, OSError) as e:
+        print(f"Tokenizer {model_name} unavailable ({e}); measuring chunks in words")
+        return RegexTokenizer()
+
+
+class TokenChunker:
+    """
+    Single-pass chunker with token limits and sliding-window overlap.
+
+    Args:
+        max_tokens: Maximum tokens per chunk
+        overlap: Tokens shared by consecutive chunks (must be < max_tokens)
+        tokenizer: Object with offsets(text) -> [(start, end)], default the e5 tokenizer
+    """
+
+    def __init__(self, max_tokens: int = 128, overlap: int = 32, tokenizer=None):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("overlap must be in [0, max_tokens)")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def _boundaries(self, text: str, starts: List[int]) -> List[List[int]]:
+        """Token indices at which each separator level allows a split"""
+        levels = []
+        for separator in SEPARATORS:
+            indices = []
+            for match in separator.finditer(text):
+                idx = bisect_left(starts, match.end())
+                if 0 < idx < len(starts) and (not indices or indices[-1] != idx):
+                    indices.append(idx)
+            levels.append(indices)
+        return levels
+
+    def _split_point(self, levels: List[List[int]], lo: int, hi: int) -> int:
+        """Furthest split point in (lo, hi] of the highest-priority level that has one"""
+        for indices in levels:
+            pos = bisect_right(indices, hi) - 1
+            if pos >= 0 and indices[pos] > lo:
+                return indices[pos]
+        return hi
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int, int, int]]:
+        """Yield (char_start, char_end, token_start, token_end) for each chunk"""
+        offsets = self.tokenizer.offsets(text)
+        n_tokens = len(offsets)
+        if n_tokens == 0:
+            return
+        starts = [start for start, _ in offsets]
+        levels = self._boundaries(text, starts)
+        words = levels[-1]
+
+        start, end = 0, 0
+        while True:
+            limit = start + self.max_tokens
+            if limit >= n_tokens:
+                yield offsets[start][0], offsets[-1][1], start, n_tokens
+                return
+            # Split past the overlap and the previous chunk, so every chunk adds new tokens
+            end = self._split_point(levels, max(start + self.overlap, end), limit)
+            yield offsets[start][0], offsets[end - 1][1], start, end
+
+            if self.overlap == 0:
+                start = end
+                continue
+            # Start the next window at a word boundary at least `overlap` tokens back
+            next_start = end - self.overlap
+            pos = bisect_right(words, next_start) - 1
+            if pos >= 0 and words[pos] > start:
+                next_start = words[pos]
+            start = next_start
+
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """Yield chunk strings lazily"""
+        for char_start, char_end, _, _ in self.iter_spans(text):
+            chunk = text[char_start:char_end].strip()
+            if chunk:
+                yield chunk
+
+    def chunk(self, text: str) -> List[str]:
+        return list(self.iter_chunks(text))
+
+
+@lru_cache(maxsize=32)
+def _get_chunker(max_tokens: int, overlap: int) -> TokenChunker:
+    return TokenChunker(max_tokens, overlap)
+
+
+def iter_chunks(text: str, max_tokens: int = 128, overlap: int = 32) -> Iterator[str]:
+    """Stream the chunks of `text` with the default (e5) tokenizer"""
+    return _get_chunker(max_tokens, overlap).iter_chunks(text or "")
+
+
+def recursive_chunk(text, max_size: int = 128, level: int = 0, overlap: int = 32) -> List[str]:
+    """
+    Split text into chunks of at most `max_size` tokens, preferring paragraph,
+    line, sentence, clause and word boundaries in that order, with `overlap`
+    tokens shared between consecutive chunks.
+
+    `level` was the recursion depth of the old character-based splitter; it is
+    ignored and kept in its place so positional calls still pass `overlap` through.
+    """
+    return list(iter_chunks(text, max_size, overlap))
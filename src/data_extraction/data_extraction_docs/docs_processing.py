@@ -1,5 +1,9 @@
 import os
-from typing import List, Dict
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Callable, Tuple
 import PyPDF2
 from docx import Document
 from PIL import Image
@@ -7,33 +11,100 @@ import pytesseract
 from pathlib import Path
 from pdf2image import convert_from_path
 from bs4 import BeautifulSoup
-import json
+from .records_io import JsonlSink
+from .ocr_cache import OcrCache, file_sha256
 
 class TelecomEgyptDocumentProcessor:
-    def __init__(self):
+    """
+    Args:
+        ocr_lang: Tesseract languages for scanned pages and images
+        min_text_chars: PDF pages whose text layer has fewer letters than this are OCR'd
+        ocr_dpi: Rasterization resolution for OCR'd PDF pages
+        ocr_cache_dir: Directory of the OCR result cache (None disables it)
+    """
+
+    def __init__(self, ocr_lang: str = 'ara+eng', min_text_chars: int = 100, ocr_dpi: int = 200,
+                 ocr_cache_dir: Optional[str] = "ocr_cache"):
         self.supported_formats = ['.pdf', '.docx', '.txt', '.html', '.htm', 
                                  '.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+        self.ocr_lang = ocr_lang
+        self.min_text_chars = min_text_chars
+        self.ocr_dpi = ocr_dpi
+        self.ocr_cache_dir = ocr_cache_dir
+        self.ocr_cache = OcrCache(ocr_cache_dir) if ocr_cache_dir else None
+
+    def _options(self) -> Dict:
+        """Constructor arguments, used to rebuild the processor in pool workers"""
+        return {'ocr_lang': self.ocr_lang, 'min_text_chars': self.min_text_chars,
+                'ocr_dpi': self.ocr_dpi, 'ocr_cache_dir': self.ocr_cache_dir}
+
+    def extract_pdf_text_layer(self, file_path: str) -> List[str]:
+        """Text layer of every page of a PDF ('' for pages without one)"""
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+
+    def text_layer_usable(self, page_text: str) -> bool:
+        """
+        Whether a page's text layer can be used as is: enough letters, and mostly
+        letters rather than broken-font garbage such as '(cid:12)' runs.
+        """
+        letters = sum(ch.isalpha() for ch in page_text)
+        visible = sum(not ch.isspace() for ch in page_text)
+        return letters >= self.min_text_chars and letters >= 0.5 * visible
+
+    def pages_needing_ocr(self, page_texts: List[str]) -> List[int]:
+        """1-based numbers of the pages whose text layer is below the text-density threshold"""
+        return [number for number, page_text in enumerate(page_texts, 1) if not self.text_layer_usable(page_text)]
 
-    def process_pdf(self, file_path: str) -> str:
+    def _cached_ocr(self, image) -> Tuple[str, bool]:
+        """OCR an image unless its pixels were OCR'd before; returns (text, cache hit)"""
+        image_key = None
+        if self.ocr_cache:
+            image_key = OcrCache.key('image', hashlib.sha256(image.tobytes()).hexdigest(), image.size, self.ocr_lang)
+            cached = self.ocr_cache.get(image_key)
+            if cached is not None:
+                return cached, True
+        text = str(pytesseract.image_to_string(image, lang=self.ocr_lang))
+        if image_key:
+            self.ocr_cache.put(image_key, text)
+        return text, False
+
+    def ocr_pdf_page(self, file_path: str, page_number: int, file_hash: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Rasterize and OCR a single PDF page (only that page is held in memory).
+        Returns (text, cache hit); the same page of the same file is never OCR'd twice.
+        """
+        page_key = None
+        if self.ocr_cache:
+            page_key = OcrCache.key('pdf', file_hash or file_sha256(file_path), page_number, self.ocr_dpi, self.ocr_lang)
+            cached = self.ocr_cache.get(page_key)
+            if cached is not None:
+                return cached, True
+
+        images = convert_from_path(file_path, dpi=self.ocr_dpi, first_page=page_number, last_page=page_number)
+        if not images:
+            return "", False
+        text, hit = self._cached_ocr(images[0])
+        if page_key:
+            self.ocr_cache.put(page_key, text)
+        return text, hit
+
+    def process_pdf(self, file_path: str, ocr: bool = True) -> str:
 
-        text = []
         try:
             # Step 1: Try normal text extraction
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text.append(page_text + "\n")
-
-            # Step 2: If no text found, use OCR
-            if not text:
-                images = convert_from_path(file_path)
-                for img in images:
-                    ocr_text = pytesseract.image_to_string(img)
-                    text.append(ocr_text + "\n")
+            text = self.extract_pdf_text_layer(file_path)
 
-            return text
+            # Step 2: OCR the pages without a usable text layer
+            if ocr:
+                file_hash = file_sha256(file_path) if self.ocr_cache else None
+                for page_number in self.pages_needing_ocr(text):
+                    ocr_text, _ = self.ocr_pdf_page(file_path, page_number, file_hash)
+                    if ocr_text.strip():
+                        text[page_number - 1] = ocr_text
+
+            return [page_text + "\n" if page_text.strip() else "" for page_text in text]
 
         except Exception as e:
             print(f"Error processing PDF {file_path}: {str(e)}")
@@ -87,15 +158,22 @@ class TelecomEgyptDocumentProcessor:
 
     def process_image(self, file_path: str) -> str:
         try:
+            if self.ocr_cache:
+                file_key = OcrCache.key('file', file_sha256(file_path), self.ocr_lang)
+                cached = self.ocr_cache.get(file_key)
+                if cached is not None:
+                    return [cached]
             image = Image.open(file_path)
             # Try to extract Arabic and English text
-            text = pytesseract.image_to_string(image, lang='ara+eng')
-            return [str(text)]
+            text, _ = self._cached_ocr(image)
+            if self.ocr_cache:
+                self.ocr_cache.put(file_key, text)
+            return [text]
         except Exception as e:
             print(f"Error processing image {file_path}: {str(e)}")
             return ""
 
-    def process_document(self, file_path: str) -> Dict:
+    def process_document(self, file_path: str, ocr: bool = True) -> Dict:
         file_path = Path(file_path)
         file_ext = file_path.suffix.lower()
         
@@ -104,7 +182,7 @@ class TelecomEgyptDocumentProcessor:
         
         # Extract text based on file type
         if file_ext == '.pdf':
-            content = self.process_pdf(str(file_path))
+            content = self.process_pdf(str(file_path), ocr=ocr)
         elif file_ext == '.docx':
             content = self.process_docx(str(file_path))
         elif file_ext in ['.txt']:
@@ -126,43 +204,182 @@ class TelecomEgyptDocumentProcessor:
         }
     
 
-    def save_to_json(self, data: Dict, filename: str):
+    def process_multiple_documents(self, file_paths: List[str], output_filename: str,
+                                   workers: Optional[int] = None,
+                                   max_pages_in_flight: Optional[int] = None,
+                                   progress_callback: Optional[Callable[[int, int, str], None]] = None) -> List[Dict]:
+        """
+        Extract several documents in parallel and append their pages, in file/page
+        order, to `output_filename` as JSON Lines (one record per page).
+
+        Files are extracted in a process pool; PDF pages without a usable text
+        layer are then OCR'd page by page in the same pool (through the OCR cache),
+        with at most `max_pages_in_flight` pages rasterized at once. Pages are
+        written as soon as every earlier file is complete.
+
+        Args:
+            file_paths: Documents to process
+            output_filename: JSON Lines file the pages are appended to
+            workers: Worker processes (default: CPU count, 1 = in-process)
+            max_pages_in_flight: OCR pages queued or running at once (default 2 * workers)
+            progress_callback: Called with (done units, known units, filename) after each file or OCR page
+
+        Returns:
+            Per-file report: filename, pages, text_pages (text layer), ocr_pages,
+            ocr_cache_hits, extract/ocr/wall seconds, status
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pages_in_flight = max_pages_in_flight or 2 * workers
+        executor = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                    if workers > 1 else _InlineExecutor())
+
+        files = [{'path': path, 'result': None, 'pages': [], 'ocr_queue': [], 'pending': 1,
+                  'report': {'filename': Path(path).name, 'pages': 0, 'text_pages': 0, 'ocr_pages': 0,
+                             'ocr_cache_hits': 0, 'extract_seconds': 0.0, 'ocr_seconds': 0.0,
+                             'wall_seconds': 0.0, 'status': 'ok'},
+                  'start': time.perf_counter()} for path in file_paths]
+        futures = {}
+        ocr_in_flight = 0
+        next_to_write = 0
+        done_units, total_units = 0, len(files)
+
+        def fail(entry: Dict, error: Exception):
+            print(f"✗ Failed: {entry['path']} - {str(error)}")
+            entry['report']['status'] = f"failed: {error}"
+            entry['ocr_queue'] = []
+            entry['pending'] = 0
+            entry['report']['wall_seconds'] = round(time.perf_counter() - entry['start'], 3)
+
+        options = self._options()
+        sink = JsonlSink(output_filename)
         try:
-            existing_data = []
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        if content.strip():
-                            existing_data = json.loads(content)
-                            if isinstance(existing_data, dict):
-                                existing_data = [existing_data]
-                except json.JSONDecodeError:
-                    pass  # Start with empty list if file is invalid JSON
-
-            existing_data.append(data)
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, ensure_ascii=False, indent=2)
-            print(f"Data successfully saved to {filename}")
-        except Exception as e:
-             print(f"Error saving data to JSON: {str(e)}")
-
-    def process_multiple_documents(self, file_paths: List[str], output_filename: str):
-        for file_path in file_paths:
-            try:
-                result = self.process_document(file_path)
-                content_list=result['content']
-                for page_number,page_text in enumerate(content_list):
-                    if page_text:
-                        result['content']=page_text
-                        result['content_length']=len(page_text)
-                        result['page_number']=page_number + 1
-                        self.save_to_json(result, output_filename)
+            for idx, entry in enumerate(files):
+                futures[executor.submit(_extract_document, entry['path'], options)] = (idx, None)
+
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, page_number = futures.pop(future)
+                    entry = files[idx]
+                    if page_number is not None:
+                        ocr_in_flight -= 1
+                    if entry['report']['status'] != 'ok':
+                        continue
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        fail(entry, e)
+                        continue
+
+                    if page_number is None:
+                        entry['result'] = value
+                        entry['pages'] = _as_pages(value['content'])
+                        entry['ocr_queue'] = value.get('ocr_pages', [])
+                        entry['report']['extract_seconds'] = value['seconds']
+                        entry['report']['ocr_pages'] = len(entry['ocr_queue'])
+                        entry['report']['text_pages'] = len(entry['pages']) - len(entry['ocr_queue'])
+                        entry['pending'] += len(entry['ocr_queue'])
+                        total_units += len(entry['ocr_queue'])
                     else:
-                        print(f"✗ Empty content: {file_path}")
-            except Exception as e:
-                print(f"✗ Failed: {file_path} - {str(e)}")
-        
-        return  
+                        text, seconds, cache_hit = value
+                        if text.strip():
+                            entry['pages'][page_number - 1] = text
+                        entry['report']['ocr_seconds'] += seconds
+                        entry['report']['ocr_cache_hits'] += int(cache_hit)
+                    entry['pending'] -= 1
+                    if entry['pending'] == 0:
+                        entry['report']['wall_seconds'] = round(time.perf_counter() - entry['start'], 3)
+                    done_units += 1
+                    if progress_callback:
+                        progress_callback(done_units, total_units, entry['report']['filename'])
+                    else:
+                        print(f"[{done_units}/{total_units}] {entry['report']['filename']}"
+                              + (f" page {page_number}" if page_number else ""))
+
+                # Refill the OCR window, earliest files first
+                for idx, entry in enumerate(files):
+                    while entry['ocr_queue'] and ocr_in_flight < max_pages_in_flight:
+                        page_number = entry['ocr_queue'].pop(0)
+                        futures[executor.submit(_ocr_pdf_page, entry['path'], page_number,
+                                                entry['result'].get('file_hash'), options)] = (idx, page_number)
+                        ocr_in_flight += 1
+
+                # Write every completed file whose predecessors are written
+                while next_to_write < len(files) and files[next_to_write]['pending'] == 0:
+                    self._write_pages(files[next_to_write], sink)
+                    next_to_write += 1
+        finally:
+            executor.shutdown(cancel_futures=True)
+            sink.close()
+        reports = [entry['report'] for entry in files]
+        print(f"Saved {sink.records_written} pages to {output_filename}")
+        print(f"Text layer: {sum(r['text_pages'] for r in reports)} pages in "
+              f"{sum(r['extract_seconds'] for r in reports):.1f}s | "
+              f"OCR: {sum(r['ocr_pages'] for r in reports)} pages "
+              f"({sum(r['ocr_cache_hits'] for r in reports)} cached) in "
+              f"{sum(r['ocr_seconds'] for r in reports):.1f}s")
+        return reports
+
+    def _write_pages(self, entry: Dict, sink: JsonlSink):
+        """Save one file's non-empty pages and finish its report"""
+        report = entry['report']
+        if report['status'] == 'ok':
+            result = entry['result']
+            for page_number, page_text in enumerate(entry['pages']):
+                if page_text.strip():
+                    result['content'] = page_text
+                    result['content_length'] = len(page_text)
+                    result['page_number'] = page_number + 1
+                    for key in ('ocr_pages', 'seconds'):
+                        result.pop(key, None)
+                    sink.write(result)
+                    report['pages'] += 1
+                else:
+                    print(f"✗ Empty content: {entry['path']} page {page_number + 1}")
+            print(f"✓ {report['filename']}: {report['pages']} pages in {report['wall_seconds']}s "
+                  f"({report['ocr_pages']} OCR, {report['ocr_cache_hits']} from cache)")
+        entry['pages'] = []
+
+
+def _as_pages(content) -> List[str]:
+    """Extractor output as a list of page texts (single-text formats are one page)"""
+    if not content:
+        return []
+    if isinstance(content, str):
+        return [content]
+    return list(content)
+
+
+def _extract_document(file_path: str, options: Dict) -> Dict:
+    """Pool task: extract one document without OCR; PDFs list the pages still to OCR"""
+    start = time.perf_counter()
+    processor = TelecomEgyptDocumentProcessor(**options)
+    result = processor.process_document(file_path, ocr=False)
+    # Identifies the upload in the index (and keys the OCR cache)
+    result['file_hash'] = file_sha256(file_path)
+    if result['file_type'] == '.pdf':
+        result['ocr_pages'] = processor.pages_needing_ocr(_as_pages(result['content']))
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _ocr_pdf_page(file_path: str, page_number: int, file_hash: Optional[str], options: Dict):
+    """Pool task: OCR one PDF page, returns (text, seconds, cache hit)"""
+    start = time.perf_counter()
+    text, cache_hit = TelecomEgyptDocumentProcessor(**options).ocr_pdf_page(file_path, page_number, file_hash)
+    return text + "\n", round(time.perf_counter() - start, 3), cache_hit
+
+
+class _InlineExecutor:
+    """Runs pool tasks in the calling process (workers=1)"""
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
 
+    def shutdown(self, cancel_futures: bool = False):
+        pass
@@ -0,0 +1,49 @@
+"""
+On-disk OCR result cache
+Entries are keyed by content hashes (file bytes + page, or rendered page pixels),
+so re-uploaded files and pages repeated across files are OCR'd only once. Writes
+are atomic, so several worker processes can share one cache directory.
+"""
+
+import os
+import hashlib
+from typing import Optional
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OcrCache:
+
+    def __init__(self, cache_dir: str = "ocr_cache"):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Cache key for a content hash plus the OCR settings that affect the result"""
+        return hashlib.sha256("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
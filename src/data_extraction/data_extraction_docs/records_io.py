@@ -0,0 +1,96 @@
+"""
+Record files shared by the extractors and the indexer
+JsonlSink appends records as JSON Lines; iter_json_records streams records back
+from JSON Lines or from a JSON array (e.g. the scraper feed) without loading the
+whole file.
+"""
+
+import os
+import json
+from typing import Dict, Iterator, List
+
+
+class JsonlSink:
+    """
+    Append-only JSON Lines writer with buffered writes and an fsync on close.
+
+    Args:
+        file_path: Output file (appended to if it exists)
+        buffer_records: Records kept in memory before a write
+    """
+
+    def __init__(self, file_path: str, buffer_records: int = 256):
+        self.file_path = file_path
+        self.buffer_records = buffer_records
+        self._buffer: List[str] = []
+        self._file = open(file_path, 'a', encoding='utf-8')
+        self.records_written = 0
+
+    def write(self, record: Dict):
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self.records_written += len(self._buffer)
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_json_records(file_path: str, read_size: int = 1 << 16) -> Iterator[Dict]:
+    """
+    Yield the records of a JSON Lines file or of a JSON array file one at a time.
+    The format is detected from the first non-whitespace character.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        head = f.read(read_size)
+        stripped = head.lstrip()
+        if not stripped:
+            return
+
+        if not stripped.startswith('['):
+            # JSON Lines
+            f.seek(0)
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        # JSON array: decode one element at a time from a sliding buffer
+        decoder = json.JSONDecoder()
+        buffer = stripped[1:]
+        pos = 0
+        eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos == len(buffer):
+                    raise ValueError("need more data")
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"Truncated JSON array in {file_path}")
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield record
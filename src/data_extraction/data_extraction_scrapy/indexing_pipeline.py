@@ -0,0 +1,169 @@
+"""
+Scrapy item pipeline that indexes pages while the crawl runs
+Scraped pages are buffered and handed to DocumentIndexer.index_pages (chunk,
+embed, upsert) in a worker thread whenever the buffer reaches INDEX_BATCH_PAGES
+pages or INDEX_FLUSH_SECONDS have passed, so the index is ready shortly after
+the last page is downloaded instead of after a separate indexing run.
+"""
+
+import hashlib
+import time
+from typing import Dict, List, Optional
+
+from twisted.internet import defer, task
+from twisted.internet.threads import deferToThread
+
+from data_indexer.dedup import BoilerplateStripper, ChunkDeduplicator
+
+
+class StreamingIndexPipeline:
+    """
+    Settings:
+        INDEX_DOCUMENT_INDEXER: DocumentIndexer the pages are indexed with (required)
+        INDEX_BATCH_PAGES: Pages per flush (default 32)
+        INDEX_FLUSH_SECONDS: Flush a non-empty buffer at least this often (default 10)
+        INDEX_CHUNK_SIZE / INDEX_CHUNK_OVERLAP: Chunking, in tokens (default 128 / 32)
+        INDEX_EMBED_BATCH: Chunks per embed/upsert batch (default 128)
+
+    Pages are deduplicated on URL + content hash, and chunk point ids are derived from
+    the URL and chunk text, so re-crawled or repeated pages cost no extra embedding.
+    Boilerplate is stripped with the n-grams saved by the last full index and is not
+    relearned during the crawl: what the first pages share is not what all pages share,
+    and n-grams once marked would be stripped for good. Without a saved set (no full
+    index_scraped_data run yet) pages are indexed unstripped. Chunks duplicating one kept
+    earlier in the crawl or one already stored (saved chunk signatures) are dropped before embedding.
+    Only one flush runs at a time; while it runs and the buffer is full again, items
+    wait for it, which slows the crawl down to the indexing rate instead of piling up pages.
+    Items are passed on unchanged, so feed exports keep working.
+    """
+
+    def __init__(self, indexer, batch_pages: int = 32, flush_seconds: float = 10.0,
+                 chunk_size: int = 128, overlap: int = 32, embed_batch_size: int = 128):
+        self.indexer = indexer
+        self.batch_pages = batch_pages
+        self.flush_seconds = flush_seconds
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.embed_batch_size = embed_batch_size
+
+        self.buffer: List[Dict] = []
+        self.seen = set()
+        self.existing: Optional[Dict[str, set]] = None
+        self.stripper: Optional[BoilerplateStripper] = None
+        self.dedup = ChunkDeduplicator()
+        self.stats = {'pages': 0, 'duplicates': 0, 'empty': 0, 'flushes': 0, 'failed_pages': 0,
+                      'added': 0, 'skipped': 0, 'deleted': 0, 'index_seconds': 0.0}
+        self._lock = defer.DeferredLock()
+        self._timer: Optional[task.LoopingCall] = None
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        indexer = settings.get('INDEX_DOCUMENT_INDEXER')
+        if indexer is None:
+            raise ValueError("INDEX_DOCUMENT_INDEXER must be set to enable StreamingIndexPipeline")
+        return cls(
+            indexer,
+            batch_pages=settings.getint('INDEX_BATCH_PAGES', 32),
+            flush_seconds=settings.getfloat('INDEX_FLUSH_SECONDS', 10.0),
+            chunk_size=settings.getint('INDEX_CHUNK_SIZE', 128),
+            overlap=settings.getint('INDEX_CHUNK_OVERLAP', 32),
+            embed_batch_size=settings.getint('INDEX_EMBED_BATCH', 128)
+        )
+
+    @defer.inlineCallbacks
+    def open_spider(self, spider):
+        # Stored point ids by URL, read once; index_pages keeps the dict current
+        self.existing = yield deferToThread(
+            self.indexer.DB_manager.get_point_index, {'source': 'web'}, 'url'
+        )
+        spider.logger.info(f"Streaming index: {len(self.existing)} URLs already indexed")
+        self.stripper = self.indexer.load_boilerplate()
+        if self.stripper is None:
+            spider.logger.info("Streaming index: no saved boilerplate n-grams, pages are indexed unstripped")
+        self.dedup = self.indexer.load_dedup(self.existing)
+        self._timer = task.LoopingCall(self._flush_if_due, spider)
+        self._timer.start(max(self.flush_seconds / 2, 0.5), now=False)
+
+    def process_item(self, item, spider):
+        url, _, content = self.indexer.normalize_page(item)
+        removed = item.get('status') == 'removed'
+        if not url or (not removed and not content.strip()):
+            self.stats['empty'] += 1
+            return item
+
+        # Pages removed in an incremental crawl are passed on, index_pages deletes their points
+        key = (url, 'removed' if removed else hashlib.sha256(content.encode('utf-8')).hexdigest())
+        if key in self.seen:
+            self.stats['duplicates'] += 1
+            return item
+        self.seen.add(key)
+        self.buffer.append(dict(item))
+
+        if len(self.buffer) >= self.batch_pages:
+            # Resolves once this batch is indexed: backpressure while a flush is running
+            return self.flush(spider).addCallback(lambda _: item)
+        return item
+
+    def _flush_if_due(self, spider):
+        if self.buffer and time.monotonic() - self._last_flush >= self.flush_seconds:
+            return self.flush(spider)
+
+    def flush(self, spider) -> defer.Deferred:
+        """Queue the buffered pages for indexing; flushes run one after another"""
+        batch, self.buffer = self.buffer, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return defer.succeed(None)
+        return self._lock.run(self._index_batch, batch, spider)
+
+    def _index_pages(self, batch: List[Dict]):
+        # Runs in the worker thread; flushes never overlap, so the deduplicator needs no lock
+        return self.indexer.index_pages(batch, self.chunk_size, self.overlap, self.embed_batch_size,
+                                        self.existing, stripper=self.stripper, dedup=self.dedup)
+
+    @defer.inlineCallbacks
+    def _index_batch(self, batch: List[Dict], spider):
+        start_time = time.perf_counter()
+        try:
+            result = yield deferToThread(self._index_pages, batch)
+        except Exception as e:
+            result = str(e)
+        elapsed = time.perf_counter() - start_time
+        self.stats['index_seconds'] += elapsed
+        self.stats['flushes'] += 1
+
+        if isinstance(result, str):
+            self.stats['failed_pages'] += len(batch)
+            # Forget the pages so a later crawl of them is indexed again
+            for page in batch:
+                url, _, content = self.indexer.normalize_page(page)
+                removed = page.get('status') == 'removed'
+                self.seen.discard((url, 'removed' if removed else hashlib.sha256(content.encode('utf-8')).hexdigest()))
+            spider.logger.error(f"Streaming index: batch of {len(batch)} pages failed: {result}")
+            return
+
+        self.stats['pages'] += len(batch)
+        for name in ('added', 'skipped', 'deleted'):
+            self.stats[name] += result[name]
+        spider.logger.info(
+            f"Streaming index: {len(batch)} pages in {elapsed:.2f}s "
+            f"({result['added']} chunks added, {result['skipped']} unchanged, {result['deleted']} deleted)"
+        )
+
+    @defer.inlineCallbacks
+    def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        crawl_end = time.perf_counter()
+        yield self.flush(spider)
+        # Wait for a flush the timer may have started
+        yield self._lock.run(defer.succeed, None)
+        self.stats['index_lag_seconds'] = round(time.perf_counter() - crawl_end, 3)
+        self.stats['index_seconds'] = round(self.stats['index_seconds'], 3)
+        self.stats['dedup'] = dict(self.dedup.stats)
+        if self.stripper is not None:
+            self.stats['dedup']['boilerplate_chars_removed'] = self.stripper.stats['chars_removed']
+        yield deferToThread(self.indexer.save_dedup, self.dedup, self.existing)
+        spider.logger.info(f"Streaming index finished: {self.stats}")
@@ -0,0 +1,24 @@
+"""
+Downloader middlewares for the Telecom Egypt spider
+"""
+
+
+class ConditionalRequestMiddleware:
+    """
+    Adds If-None-Match / If-Modified-Since from the spider's URL state store, so
+    unchanged pages come back as a body-less 304. Active only for spiders with a
+    `url_state` attribute (incremental mode).
+    """
+
+    def process_request(self, request, spider):
+        url_state = getattr(spider, 'url_state', None)
+        if url_state is None or request.meta.get('skip_conditional'):
+            return None
+        state = url_state.get(request.url)
+        if state is None or state['status'] != 'live':
+            return None
+        if state['etag'] and b'If-None-Match' not in request.headers:
+            request.headers['If-None-Match'] = state['etag']
+        if state['last_modified'] and b'If-Modified-Since' not in request.headers:
+            request.headers['If-Modified-Since'] = state['last_modified']
+        return None
@@ -3,16 +3,36 @@ from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 import json
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
+from data_extraction.data_extraction_docs.records_io import JsonlSink, iter_json_records
 from .scrapy_spider import TelecomEgyptSpider
+from .indexing_pipeline import StreamingIndexPipeline
+from .url_state import UrlStateStore
 
 
 class TelecomEgyptScraper:
     
-    def __init__(self, base_url: str = "https://te.eg", max_pages: int = 100,output_file: str = None):
+    def __init__(self, base_url: str = "https://te.eg", max_pages: int = 100,output_file: str = None,
+                 indexer=None, index_settings: Optional[Dict] = None,
+                 incremental: bool = False, state_db: str = "crawl_state.db"):
+        """
+        indexer: Optional DocumentIndexer; when given, pages are chunked, embedded and
+                 upserted while the crawl runs (see StreamingIndexPipeline)
+        index_settings: Overrides for the pipeline's INDEX_* settings
+        incremental: Recrawl with conditional requests; output_file becomes a JSON Lines
+                     delta feed of new / changed / removed pages
+                     (see DocumentIndexer.apply_delta_feed). max_pages does not apply:
+                     pages the crawl no longer reaches are only reported as removed
+                     when it runs to completion, which a page cap would prevent
+        state_db: URL state store used by incremental crawls
+        """
         self.base_url = base_url
         self.max_pages = max_pages
         self.output_file = output_file
+        self.indexer = indexer
+        self.index_settings = index_settings or {}
+        self.incremental = incremental
+        self.state_db = state_db
     
     def crawl(self) -> List[Dict]:
         """
@@ -60,26 +80,50 @@ class TelecomEgyptScraper:
             'AUTOTHROTTLE_TARGET_CONCURRENCY': 5.0,
         }
         
+        spider_kwargs = {}
+        if self.incremental:
+            # Conditional requests replace the time-based HTTP cache, and the feed is a delta
+            crawl_id = UrlStateStore(self.state_db).begin_crawl()
+            spider_kwargs = {'incremental': True, 'state_db': self.state_db, 'crawl_id': crawl_id}
+            settings['HTTPCACHE_ENABLED'] = False
+            settings.pop('CLOSESPIDER_PAGECOUNT')
+            settings['FEEDS'] = {
+                self.output_file: {'format': 'jsonlines', 'encoding': 'utf8', 'overwrite': True}
+            }
+        
+        # Index pages as they are scraped
+        if self.indexer is not None:
+            settings['ITEM_PIPELINES'] = {StreamingIndexPipeline: 300}
+            settings['INDEX_DOCUMENT_INDEXER'] = self.indexer
+            settings.update(self.index_settings)
+        
         # Create crawler process
         process = CrawlerProcess(settings)
         
         process.crawl(
             TelecomEgyptSpider,
             max_pages=self.max_pages, 
-            base_url=self.base_url
+            base_url=self.base_url,
+            **spider_kwargs
         )
         
         # Run the crawler (blocking)
         process.start()
         
+        if self.incremental:
+            # Pages a finished crawl no longer reached were marked removed when the spider closed
+            unseen = UrlStateStore(self.state_db).removed_in_crawl(spider_kwargs['crawl_id'], reason='unseen')
+            with JsonlSink(self.output_file) as sink:
+                for url in unseen:
+                    sink.write({'url': url, 'status': 'removed'})
+        
         # Load and return results
         return self.load_results()
     
     def load_results(self) -> List[Dict]:
-        """Load scraped results from JSON file"""
+        """Load scraped results from the JSON (or JSON Lines delta) feed"""
         if os.path.exists(self.output_file):
-            with open(self.output_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return list(iter_json_records(self.output_file))
         return []
     
     def get_statistics(self) -> Dict:
@@ -1,10 +1,14 @@
 import scrapy
+from scrapy.link import Link
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
 from urllib.parse import urlparse
+import hashlib
 import re
 import time
-from typing import Dict
+from typing import Dict, Optional
+from .url_state import UrlStateStore
+from .middlewares import ConditionalRequestMiddleware
 
 class TelecomEgyptSpider(CrawlSpider):
     
@@ -21,6 +25,8 @@ class TelecomEgyptSpider(CrawlSpider):
         'DOWNLOADER_MIDDLEWARES': {
             'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
             'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': 400,
+            # No-op unless the spider runs in incremental mode
+            ConditionalRequestMiddleware: 590,
         },
         'RETRY_TIMES': 3,
         'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
@@ -48,12 +54,29 @@ class TelecomEgyptSpider(CrawlSpider):
         ),
     )
     
-    def __init__(self, base_url="https://te.eg", max_pages=100, *args, **kwargs):
+    def __init__(self, base_url="https://te.eg", max_pages=100, incremental=False,
+                 state_db="crawl_state.db", crawl_id=None, *args, **kwargs):
+        """
+        incremental: Recrawl mode. Requests are conditional (ETag / Last-Modified from
+                     the URL state store) and only new, changed and removed pages are
+                     emitted, with a 'status' field ('new', 'changed' or 'removed').
+        state_db: SQLite file of the URL state store
+        crawl_id: Id from UrlStateStore.begin_crawl() (one is started when omitted)
+        """
         super(TelecomEgyptSpider, self).__init__(*args, **kwargs)
         self.max_pages = int(max_pages)
         self.pages_scraped = 0
         self.start_time = time.time()
         
+        self.incremental = incremental in (True, 'true', 'True', '1', 1)
+        self.url_state: Optional[UrlStateStore] = None
+        self.delta_counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        if self.incremental:
+            self.url_state = UrlStateStore(state_db)
+            self.crawl_id = int(crawl_id) if crawl_id is not None else self.url_state.begin_crawl()
+            # 304 and gone pages reach parse_page instead of being dropped by HttpErrorMiddleware
+            self.handle_httpstatus_list = [304, 404, 410]
+        
         # Update start_urls and allowed_domains based on dynamic base_url
         if base_url:
             self.start_urls = [base_url]
@@ -69,6 +92,48 @@ class TelecomEgyptSpider(CrawlSpider):
         text = text.strip()
         return text
     
+    def _requests_to_follow(self, response):
+        """
+        Rule-based link following. In incremental mode the followed links are stored,
+        and replayed for a 304 response, which has no body to extract links from.
+        """
+        if not self.incremental:
+            yield from super()._requests_to_follow(response)
+            return
+        if response.status == 304:
+            state = self.url_state.get(response.url)
+            for url in (state['links'] if state else []):
+                yield self._build_request(0, Link(url))
+            return
+        if response.status != 200:
+            return
+        links = []
+        for request in super()._requests_to_follow(response):
+            links.append(request.url)
+            yield request
+        self.url_state.set_links(response.url, links)
+    
+    def _delta_status(self, response, content: str) -> Optional[str]:
+        """Record the page in the URL state store and classify it against the last crawl"""
+        state = self.url_state.get(response.url)
+        header = lambda name: (response.headers.get(name) or b'').decode('latin-1') or None
+        
+        if response.status == 304:
+            self.url_state.record(response.url, self.crawl_id)
+            return 'unchanged'
+        if response.status in (404, 410):
+            if state and state['status'] == 'live':
+                self.url_state.mark_removed([response.url], self.crawl_id, reason=f"http_{response.status}")
+                return 'removed'
+            return None
+        
+        fingerprint = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        self.url_state.record(response.url, self.crawl_id, content_hash=fingerprint,
+                              etag=header('ETag'), last_modified=header('Last-Modified'))
+        if state is None or state['status'] != 'live':
+            return 'new'
+        return 'unchanged' if state['content_hash'] == fingerprint else 'changed'
+    
     def parse_page(self, response):
         """
         Parse each page and extract content
@@ -78,6 +143,14 @@ class TelecomEgyptSpider(CrawlSpider):
         self.pages_scraped += 1
         self.logger.info(f"Scraping page {self.pages_scraped}/{self.max_pages}: {response.url}")
         
+        if self.incremental and response.status != 200:
+            status = self._delta_status(response, "")
+            if status:
+                self.delta_counts[status] += 1
+            if status == 'removed':
+                yield {'url': response.url, 'status': 'removed'}
+            return
+        
         # Extract title
         title = response.css('title::text').get()
         if not title:
@@ -129,6 +202,13 @@ class TelecomEgyptSpider(CrawlSpider):
             'content_length':len(self.clean_text(main_content))
         }
         
+        if self.incremental:
+            status = self._delta_status(response, item['content'])
+            self.delta_counts[status] += 1
+            if status == 'unchanged':
+                return
+            item['status'] = status
+        
         yield item
     
     def closed(self, reason):
@@ -144,4 +224,15 @@ class TelecomEgyptSpider(CrawlSpider):
         self.logger.info(f"Time taken: {elapsed_time:.2f} seconds")
         self.logger.info(f"Average: {elapsed_time/self.pages_scraped:.2f} sec/page" if self.pages_scraped > 0 else "N/A")
         self.logger.info(f"Reason for closing: {reason}")
+        if self.incremental:
+            # Only a crawl that ran to completion can tell that a page is no longer reachable
+            if reason == 'finished':
+                unseen = self.url_state.unseen_since(self.crawl_id)
+                self.url_state.mark_removed(unseen, self.crawl_id, reason='unseen')
+                self.delta_counts['removed'] += len(unseen)
+            else:
+                self.logger.warning(f"Crawl ended early ({reason}): pages it did not reach are not marked removed, "
+                                    f"so this delta only reports removals seen as 404/410")
+            self.url_state.finish_crawl(self.crawl_id, reason)
+            self.logger.info(f"Delta: {self.delta_counts}")
         self.logger.info("=" * 60)
@@ -0,0 +1,123 @@
+"""
+Persistent per-URL crawl state for incremental recrawls
+Keeps the validators (ETag, Last-Modified), the content fingerprint, the links a
+page led to and when it was last seen, so a recrawl can send conditional requests
+and report only new, changed and removed pages.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+
+class UrlStateStore:
+    """
+    SQLite table of crawled URLs. Status is 'live' or 'removed'; last_crawl is the id
+    of the last crawl that saw the page, so pages a finished crawl did not reach
+    can be listed with unseen_since().
+    """
+
+    def __init__(self, db_path: str = "crawl_state.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    links TEXT,
+                    status TEXT NOT NULL DEFAULT 'live',
+                    removed_reason TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    last_crawl INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    reason TEXT
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def begin_crawl(self) -> int:
+        with self._lock, self._connect() as conn:
+            return conn.execute("INSERT INTO crawls (started_at) VALUES (?)", (time.time(),)).lastrowid
+
+    def finish_crawl(self, crawl_id: int, reason: str):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE crawls SET finished_at = ?, reason = ? WHERE id = ?", (time.time(), reason, crawl_id))
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        state = dict(row)
+        state['links'] = json.loads(state['links']) if state['links'] else []
+        return state
+
+    def record(self, url: str, crawl_id: int, content_hash: Optional[str] = None, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, links: Optional[List[str]] = None):
+        """Mark the page as seen (and live) in this crawl; given fields replace the stored ones"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO urls (url, etag, last_modified, content_hash, links, first_seen, last_seen, last_crawl)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    links = COALESCE(excluded.links, links),
+                    status = 'live',
+                    removed_reason = NULL,
+                    last_seen = excluded.last_seen,
+                    last_crawl = excluded.last_crawl
+            """, (url, etag, last_modified, content_hash, json.dumps(links) if links is not None else None,
+                  now, now, crawl_id))
+
+    def set_links(self, url: str, links: List[str]):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE urls SET links = ? WHERE url = ?", (json.dumps(links), url))
+
+    def mark_removed(self, urls: List[str], crawl_id: int, reason: str):
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE urls SET status = 'removed', removed_reason = ?, last_crawl = ? WHERE url = ?",
+                [(reason, crawl_id, url) for url in urls]
+            )
+
+    def unseen_since(self, crawl_id: int) -> List[str]:
+        """Live pages that crawl `crawl_id` did not reach"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url FROM urls WHERE status = 'live' AND last_crawl < ?", (crawl_id,)
+            ).fetchall()
+        return [row['url'] for row in rows]
+
+    def removed_in_crawl(self, crawl_id: int, reason: Optional[str] = None) -> List[str]:
+        query = "SELECT url FROM urls WHERE status = 'removed' AND last_crawl = ?"
+        params = [crawl_id]
+        if reason is not None:
+            query += " AND removed_reason = ?"
+            params.append(reason)
+        with self._connect() as conn:
+            return [row['url'] for row in conn.execute(query, params).fetchall()]
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM urls GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
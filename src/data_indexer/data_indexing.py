@@ -1,94 +1,354 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Tuple
 import numpy as np
-from langdetect import detect
-import json
+import hashlib
 import os
+from uuid import uuid5, NAMESPACE_URL
 from data_chunking.text_chunker import recursive_chunk
+from data_extraction.data_extraction_docs.records_io import iter_json_records
 from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from language_detection.language_id import detect_language, detect_languages
+from .dedup import BoilerplateStripper, ChunkDeduplicator
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a chunk's text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def make_point_id(source_key: str, text: str) -> str:
+    """
+    Deterministic Qdrant point id for a chunk: the same text from the same source
+    always maps to the same id, so unchanged chunks can be detected and skipped.
+    """
+    return str(uuid5(NAMESPACE_URL, f"{source_key}#{content_hash(text)}"))
+
+
+def make_doc_id(prefix: str, point_id: str) -> str:
+    """Short document id ('web_1b4e28ba2fa1') derived from the point id, so it is stable across runs"""
+    return f"{prefix}_{point_id.replace('-', '')[:12]}"
+
 
 class DocumentIndexer:
 
-    def __init__(self, DB_manager: QdrantVectorStoreManager):
+    def __init__(self, DB_manager: QdrantVectorStoreManager, boilerplate_file: Optional[str] = "boilerplate_ngrams.json",
+                 dedup_file: Optional[str] = "chunk_signatures.json"):
+        """
+        boilerplate_file: Where index_scraped_data saves the boilerplate n-grams it found,
+                          so later partial updates (index_pages, delta feeds) strip the same text
+        dedup_file: Where the hashes / MinHash signatures of the indexed web chunks are saved,
+                    so partial updates also drop duplicates of chunks already stored
+        """
         self.DB_manager = DB_manager
-    
+        self.boilerplate_file = boilerplate_file
+        self.dedup_file = dedup_file
+
+    def load_boilerplate(self) -> Optional[BoilerplateStripper]:
+        """Boilerplate stripper saved by the last full index_scraped_data run, if any"""
+        if self.boilerplate_file and os.path.exists(self.boilerplate_file):
+            return BoilerplateStripper.load(self.boilerplate_file)
+        return None
+
+    def load_dedup(self, existing: Dict[str, set]) -> ChunkDeduplicator:
+        """
+        Deduplicator seeded with the saved signatures of the chunks still stored
+        (existing: stored point ids by URL), or a fresh one when nothing was saved
+        """
+        if self.dedup_file and os.path.exists(self.dedup_file):
+            return ChunkDeduplicator.load(self.dedup_file, set().union(*existing.values()))
+        return ChunkDeduplicator()
+
+    def save_dedup(self, dedup: ChunkDeduplicator, existing: Optional[Dict[str, set]] = None):
+        """Save the deduplicator's chunks, keeping only those stored in `existing` if given"""
+        if self.dedup_file:
+            dedup.save(self.dedup_file, set().union(*existing.values()) if existing is not None else None)
+
     def detect_language(self, text: str) -> str:
-        """Detect language of text"""
-        try:
-            lang = detect(text)
-            return lang if lang in ['ar', 'en'] else 'en'
-        except:
-            return "en"
-    
-    def index_scraped_data(self, json_file: str,chunk_size: int=512, overlap: int=128, batch_size: int=128):
-
-        print(f"Loading scraped data from {json_file}...")
-        
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        documents = []
-        doc_id = 0
-        
-        for page in data:
-            # Chunk the content
-            chunks = recursive_chunk(page['page_related_content'], max_size=chunk_size, overlap=overlap)
-            chunk_idx=0 
-            for chunk in (chunks):
-                if(len(chunk) > 10):
-                    documents.append({
-                        'id': f"web_{doc_id}",
-                        'content': chunk,
-                        'metadata': {
-                            'source': 'web',
-                            'language': self.detect_language(chunk),
-                            'url': page['page_link'],
-                            'title': page['page_title'],
-                            'chunk_index': chunk_idx,
-                            'total_chunks': len(chunks)
-                        }
-                    })
-                    doc_id += 1
-                    chunk_idx += 1
-
-            try:
-                self.DB_manager.add_documents(documents, batch_size=batch_size)
-            except Exception as e:
-                return f"Error adding documents: {e}"
-
-        return documents
-
-    
-    def index_uploaded_documents(self, json_file: str, chunk_size: int=512, overlap: int=128, batch_size: int=128):
-        """Index user-uploaded documents"""
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        """Detect language of text ('ar' or 'en')"""
+        return detect_language(text)
 
+    def _index_stream(self, records: Iterable[Dict], chunk_record: Callable[[Dict], Tuple[str, List[Dict]]],
+                      existing: Dict[str, set], batch_size: int, incremental: bool,
+                      delete_missing_keys: bool = False, dedup: Optional[ChunkDeduplicator] = None) -> Dict:
+        """
+        Stream records through the ingestion pipeline, upserting only the chunks whose
+        point ids are not already stored, then delete the stored points of each key
+        (url / filename) that are no longer produced.
+
+        chunk_record: maps one input record to (source key, chunk documents)
+        existing: point ids currently stored, grouped by the same key; in incremental
+                  mode it is updated in place to the ids stored after this run
+        delete_missing_keys: also delete every point of keys absent from the input
+        dedup: drops exact / near duplicate chunks before they are embedded (a stored
+               copy of a dropped chunk is deleted like any other stale chunk)
+        """
+        stats = {'added': 0, 'skipped': 0, 'deleted': 0}
+        scheduled = set()
+        current_by_key: Dict[str, set] = {}
+
+        def new_chunks(record: Dict) -> List[Dict]:
+            key, documents = chunk_record(record)
+            if dedup is not None:
+                documents = dedup.filter(documents, key)
+            stored = existing.get(key, set()) if incremental else set()
+            current = current_by_key.setdefault(key, set())
+            fresh = []
+            for doc in documents:
+                point_id = doc['point_id']
+                current.add(point_id)
+                if point_id in stored or point_id in scheduled:
+                    stats['skipped'] += 1
+                    continue
+                scheduled.add(point_id)
+                fresh.append(doc)
+            return fresh
+
+        pipeline_stats = self.DB_manager.add_documents_stream(records, batch_size=batch_size, chunker=new_chunks)
+        stats['added'] = pipeline_stats['upsert']['items']
+        if dedup is not None:
+            stats['dedup'] = self._dedup_report(dedup, pipeline_stats)
+
+        if incremental:
+            stale_ids = set()
+            for key, stored in existing.items():
+                if key in current_by_key:
+                    stale_ids |= stored - current_by_key[key]
+                elif delete_missing_keys:
+                    stale_ids |= stored
+            if stale_ids:
+                stats['deleted'] = self.DB_manager.delete_points(list(stale_ids))
+            existing.update(current_by_key)
+
+        return stats
+
+    @staticmethod
+    def _dedup_report(dedup: ChunkDeduplicator, pipeline_stats: Dict) -> Dict:
+        """Dropped chunks, plus the encode time they would have cost at this run's rate"""
+        report = dict(dedup.stats)
+        encoded = pipeline_stats['dense']['items']
+        seconds_per_chunk = ((pipeline_stats['dense']['busy_seconds'] + pipeline_stats['sparse']['busy_seconds'])
+                             / encoded) if encoded else 0.0
+        dropped = report['exact_duplicates'] + report['near_duplicates']
+        report['embedding_seconds_saved'] = round(dropped * seconds_per_chunk, 2)
+        return report
+
+    @staticmethod
+    def _print_dedup(stats: Dict, stripper: Optional[BoilerplateStripper]):
+        report = stats.get('dedup')
+        if report is None:
+            return
+        if stripper is not None:
+            report['boilerplate_chars_removed'] = stripper.stats['chars_removed']
+            print(f"Boilerplate: {stripper.stats['chars_removed']} of {stripper.stats['chars_in']} characters stripped")
+        print(f"Dedup: {report['exact_duplicates']} exact + {report['near_duplicates']} near-duplicate chunks "
+              f"dropped of {report['chunks']} (~{report['embedding_seconds_saved']}s of embedding saved)")
+
+    @staticmethod
+    def normalize_page(page: Dict) -> Tuple[str, str, str]:
+        """(url, title, content) of a scraped page, from the spider's items or the cleaned JSON"""
+        return (
+            page.get('url') or page.get('page_link'),
+            page.get('title') or page.get('page_title') or "",
+            page.get('content') or page.get('page_related_content') or ""
+        )
+
+    def _chunk_web_page(self, page: Dict, chunk_size: int, overlap: int,
+                        stripper: Optional[BoilerplateStripper] = None) -> Tuple[str, List[Dict]]:
+        """Chunk documents of one scraped page, keyed by its URL"""
+        # Chunk the content
+        url, title, content = self.normalize_page(page)
+        if stripper is not None:
+            content = stripper.strip(content)
+        chunks = recursive_chunk(content, max_size=chunk_size, overlap=overlap)
+        kept = [chunk for chunk in chunks if len(chunk) > 10]
         documents = []
-        doc_id = self.DB_manager.count(collection_name=self.DB_manager.collection_name)
-         
-        for page in data:
+        for chunk_idx, (chunk, language) in enumerate(zip(kept, detect_languages(kept))):
+            point_id = make_point_id(url, chunk)
+            documents.append({
+                'id': make_doc_id('web', point_id),
+                'point_id': point_id,
+                'content': chunk,
+                'metadata': {
+                    'source': 'web',
+                    'language': language,
+                    'url': url,
+                    'title': title,
+                    'chunk_index': chunk_idx,
+                    'total_chunks': len(chunks),
+                    'content_hash': content_hash(chunk)
+                }
+            })
+        return url, documents
+
+    def index_scraped_data(self, json_file: str,chunk_size: int=128, overlap: int=32, batch_size: int=128,
+                           incremental: bool=True, dedup: bool=True):
+        """
+        Index scraped pages. In incremental mode (default) only new or changed chunks
+        are embedded and upserted, and chunks of changed or vanished pages are deleted.
+        chunk_size and overlap are in embedding-model tokens.
+        With dedup (default), text repeated across many pages (menus, footers) is stripped
+        before chunking and exact / near-duplicate chunks are dropped before embedding;
+        the boilerplate n-grams and chunk signatures are saved for later partial updates.
+        Returns a dict with 'added', 'skipped' and 'deleted' counts (and 'dedup' stats).
+        """
+
+        stripper = deduplicator = None
+        if dedup:
+            # First pass: how many pages each word n-gram appears in
+            print(f"Scanning {json_file} for boilerplate...")
+            stripper = BoilerplateStripper().fit(self.normalize_page(page)[2] for page in iter_json_records(json_file))
+            if self.boilerplate_file:
+                stripper.save(self.boilerplate_file)
+            deduplicator = ChunkDeduplicator()
+
+        print(f"Streaming scraped data from {json_file}...")
+
+        # JSON array or JSON Lines, read one page at a time
+        data = iter_json_records(json_file)
+
+        existing = self.DB_manager.get_point_index({'source': 'web'}, group_by='url') if incremental else {}
+
+        def chunk_page(page: Dict) -> Tuple[str, List[Dict]]:
+            return self._chunk_web_page(page, chunk_size, overlap, stripper)
+
+        # The crawl output is authoritative: pages missing from it are removed from the index
+        try:
+            stats = self._index_stream(data, chunk_page, existing, batch_size, incremental, delete_missing_keys=True,
+                                       dedup=deduplicator)
+        except Exception as e:
+            return f"Error adding documents: {e}"
+        if deduplicator is not None:
+            self.save_dedup(deduplicator, existing if incremental else None)
+
+        print(f"Indexing done: {stats['added']} added, {stats['skipped']} unchanged (skipped), "
+              f"{stats['deleted']} deleted")
+        self._print_dedup(stats, stripper)
+        return stats
+
+    def index_pages(self, pages: Iterable[Dict], chunk_size: int=128, overlap: int=32, batch_size: int=128,
+                    existing: Optional[Dict[str, set]] = None,
+                    stripper: Optional[BoilerplateStripper] = None, dedup: Optional[ChunkDeduplicator] = None):
+        """
+        Index a batch of scraped pages, e.g. while the crawl is still running.
+        Unchanged chunks are skipped and stale chunks of the given pages are deleted;
+        pages not in the batch are left alone. Records with "status": "removed" (from
+        an incremental crawl) delete every point of their URL.
+
+        Args:
+            existing: Stored point ids by URL. Pass the same dict to consecutive calls so
+                      the index is read once; it is kept up to date. Loaded when omitted.
+            stripper / dedup: Boilerplate stripping and duplicate-chunk removal; pass the
+                      same objects to consecutive calls so duplicates across batches are caught
+        Returns a dict with 'added', 'skipped' and 'deleted' counts.
+        """
+        if existing is None:
+            existing = self.DB_manager.get_point_index({'source': 'web'}, group_by='url')
+
+        removed_urls = []
+
+        def live_pages() -> Iterator[Dict]:
+            for page in pages:
+                if page.get('status') == 'removed':
+                    removed_urls.append(self.normalize_page(page)[0])
+                else:
+                    yield page
+
+        def chunk_page(page: Dict) -> Tuple[str, List[Dict]]:
+            return self._chunk_web_page(page, chunk_size, overlap, stripper)
+
+        try:
+            stats = self._index_stream(live_pages(), chunk_page, existing, batch_size, incremental=True, dedup=dedup)
+            stats['deleted'] += self.remove_pages(removed_urls, existing)
+        except Exception as e:
+            return f"Error adding documents: {e}"
+        stats['removed_pages'] = len(removed_urls)
+        return stats
+
+    def remove_pages(self, urls: Iterable[str], existing: Dict[str, set]) -> int:
+        """Delete every stored point of the given URLs; returns the number of points deleted"""
+        point_ids = set()
+        for url in urls:
+            point_ids |= existing.pop(url, set())
+        return self.DB_manager.delete_points(list(point_ids)) if point_ids else 0
+
+    def apply_delta_feed(self, delta_file: str, chunk_size: int=128, overlap: int=32, batch_size: int=128):
+        """
+        Apply the delta feed of an incremental crawl: new and changed pages are indexed
+        (only their changed chunks are embedded, their stale chunks deleted) and removed
+        pages lose all their points. Pages not in the feed are untouched.
+        Returns a dict with 'added', 'skipped', 'deleted' and 'removed_pages' counts.
+        """
+        print(f"Applying crawl delta from {delta_file}...")
+        existing = self.DB_manager.get_point_index({'source': 'web'}, group_by='url')
+        # Strip the boilerplate found by the last full index, so changed pages match the rest,
+        # and drop chunks that duplicate ones already stored for other pages
+        stripper = self.load_boilerplate()
+        dedup = self.load_dedup(existing)
+        stats = self.index_pages(iter_json_records(delta_file), chunk_size, overlap, batch_size, existing=existing,
+                                 stripper=stripper, dedup=dedup)
+        if isinstance(stats, str):
+            return stats
+        self.save_dedup(dedup, existing)
+        self._print_dedup(stats, stripper)
+
+        print(f"Delta applied: {stats['added']} added, {stats['skipped']} unchanged (skipped), "
+              f"{stats['deleted']} deleted, {stats['removed_pages']} pages removed")
+        return stats
+
+
+    def index_uploaded_documents(self, json_file: str, chunk_size: int=128, overlap: int=32, batch_size: int=128,
+                                 incremental: bool=True):
+        """
+        Index user-uploaded documents. Uploads are keyed by the SHA-256 of the file, so
+        re-uploading the same file embeds nothing, and files that share a name never
+        replace each other's chunks.
+        chunk_size and overlap are in embedding-model tokens.
+        Returns a dict with 'added', 'skipped' and 'deleted' counts.
+        """
+        # JSON Lines from the document processor, read one page at a time
+        return self.index_upload_records(iter_json_records(json_file), chunk_size, overlap, batch_size, incremental)
+
+    def index_upload_records(self, records: Iterable[Dict], chunk_size: int=128, overlap: int=32, batch_size: int=128,
+                             incremental: bool=True):
+        """
+        Index page records produced by the document processor (filename, file_hash,
+        page_number, file_type, content). Pages of several files can be mixed in one
+        stream, so they are chunked and embedded together. Records without a file_hash
+        (written by older versions) fall back to the filename as key.
+        Returns a dict with 'added', 'skipped' and 'deleted' counts.
+        """
+        existing = self.DB_manager.get_point_index({'source': 'upload'}, group_by='file_hash') if incremental else {}
+
+        def chunk_page(page: Dict) -> Tuple[str, List[Dict]]:
             chunks = recursive_chunk(page['content'], max_size=chunk_size, overlap=overlap)
-            chunk_idx=0 
-            for chunk in (chunks):
-                
-                if(len(chunk) > 10):
-                    documents.append({
-                        'id': f"upload_{doc_id}",
-                        'content': chunk,
-                        'metadata': {
-                            'source': 'upload',
-                            'language': self.detect_language(chunk),
-                            'page_number':page['page_number'],
-                            'filename': page['filename'],
-                            'file_type': page['file_type'],
-                            'chunk_index': chunk_idx,
-                            'total_chunks': len(chunks)
-                        }
-                    })
-                    doc_id += 1
-                    chunk_idx += 1
+            file_key = page.get('file_hash') or page['filename']
+            source_key = f"{file_key}#page{page['page_number']}"
+            kept = [chunk for chunk in chunks if len(chunk) > 10]
+            documents = []
+            for chunk_idx, (chunk, language) in enumerate(zip(kept, detect_languages(kept))):
+                point_id = make_point_id(source_key, chunk)
+                documents.append({
+                    'id': make_doc_id('upload', point_id),
+                    'point_id': point_id,
+                    'content': chunk,
+                    'metadata': {
+                        'source': 'upload',
+                        'language': language,
+                        'page_number':page['page_number'],
+                        'filename': page['filename'],
+                        'file_hash': file_key,
+                        'file_type': page['file_type'],
+                        'chunk_index': chunk_idx,
+                        'total_chunks': len(chunks),
+                        'content_hash': content_hash(chunk)
+                    }
+                })
+            return file_key, documents
+
         try:
-            self.DB_manager.add_documents(documents, batch_size=batch_size)
+            stats = self._index_stream(records, chunk_page, existing, batch_size, incremental)
         except Exception as e:
             return f"Error adding documents: {e}"
-        return documents
\ No newline at end of file
+
+        print(f"Indexing done: {stats['added']} added, {stats['skipped']} unchanged (skipped), "
+              f"{stats['deleted']} deleted")
+        return stats
@@ -0,0 +1,284 @@
+"""
+Boilerplate and duplicate removal before embedding
+BoilerplateStripper cuts word runs repeated across many pages (menus, footers);
+ChunkDeduplicator drops chunks that are exact or near (MinHash/LSH) duplicates
+of a chunk already kept in the same run or, once seeded from a saved state, of a
+chunk already stored in the index.
+"""
+
+import re
+import json
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from qdrant_vector_store_DB.semantic_cache import query_numbers
+
+
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def _hash64(text: str) -> int:
+    """Stable 64-bit hash (Python's hash() changes between processes)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _word_spans(text: str) -> List[Tuple[int, int, str]]:
+    return [(m.start(), m.end(), m.group().lower()) for m in WORD_PATTERN.finditer(text)]
+
+
+class BoilerplateStripper:
+    """
+    Finds word n-grams that occur in a large share of pages and removes the text
+    they cover. Scraped content is whitespace-collapsed (no line breaks), so
+    repetition is measured on word n-grams rather than lines.
+
+    Args:
+        ngram: Words per n-gram; longer n-grams only match longer repeated runs
+        min_doc_fraction: Share of pages an n-gram must appear in to be boilerplate
+        min_docs: Never treat n-grams seen in fewer pages than this as boilerplate
+    """
+
+    def __init__(self, ngram: int = 8, min_doc_fraction: float = 0.3, min_docs: int = 3):
+        self.ngram = ngram
+        self.min_doc_fraction = min_doc_fraction
+        self.min_docs = min_docs
+        self.n_docs = 0
+        self.doc_freq: Dict[int, int] = {}
+        self.boilerplate: set = set()
+        self.stats = {'texts': 0, 'chars_in': 0, 'chars_removed': 0}
+
+    def _ngram_hashes(self, words: List[str]) -> List[int]:
+        n = self.ngram
+        return [_hash64(" ".join(words[i:i + n])) for i in range(len(words) - n + 1)]
+
+    def partial_fit(self, texts: Iterable[str]) -> "BoilerplateStripper":
+        """Add pages to the n-gram document frequencies and update the boilerplate set"""
+        for text in texts:
+            self.n_docs += 1
+            for h in set(self._ngram_hashes([word for _, _, word in _word_spans(text)])):
+                self.doc_freq[h] = self.doc_freq.get(h, 0) + 1
+        min_count = max(self.min_docs, self.min_doc_fraction * self.n_docs)
+        self.boilerplate |= {h for h, freq in self.doc_freq.items() if freq >= min_count}
+        return self
+
+    def fit(self, texts: Iterable[str]) -> "BoilerplateStripper":
+        return self.partial_fit(texts)
+
+    def strip(self, text: str) -> str:
+        """The text without the word runs covered by boilerplate n-grams"""
+        self.stats['texts'] += 1
+        self.stats['chars_in'] += len(text)
+        spans = _word_spans(text)
+        if not self.boilerplate or len(spans) < self.ngram:
+            return text
+
+        covered = np.zeros(len(spans), dtype=bool)
+        for i, h in enumerate(self._ngram_hashes([word for _, _, word in spans])):
+            if h in self.boilerplate:
+                covered[i:i + self.ngram] = True
+        if not covered.any():
+            return text
+
+        # Keep the original text between removed runs (line breaks etc. survive)
+        parts, cursor, i = [], 0, 0
+        while i < len(spans):
+            if covered[i]:
+                j = i
+                while j + 1 < len(spans) and covered[j + 1]:
+                    j += 1
+                parts.append(text[cursor:spans[i][0]])
+                cursor = spans[j][1]
+                i = j + 1
+            else:
+                i += 1
+        parts.append(text[cursor:])
+        stripped = re.sub(r"[ \t]{2,}", " ", "".join(parts)).strip()
+        self.stats['chars_removed'] += len(text) - len(stripped)
+        return stripped
+
+    def save(self, file_path: str):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'ngram': self.ngram, 'n_docs': self.n_docs,
+                       'boilerplate': sorted(format(h, 'x') for h in self.boilerplate)}, f)
+
+    @classmethod
+    def load(cls, file_path: str, **kwargs) -> "BoilerplateStripper":
+        """
+        Stripper with a saved boilerplate set. The page count is restored too, so a
+        few pages passed to partial_fit cannot mark n-grams on their own; the per
+        n-gram frequencies are not saved, so refit on all pages to relearn the set.
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stripper = cls(ngram=data['ngram'], **kwargs)
+        stripper.n_docs = data.get('n_docs', 0)
+        stripper.boilerplate = {int(h, 16) for h in data['boilerplate']}
+        return stripper
+
+
+class MinHashLSH:
+    """
+    MinHash signatures over word shingles, banded into an LSH index.
+
+    Args:
+        num_perm: Hash functions per signature
+        bands: LSH bands (num_perm must divide evenly); more bands find lower similarities
+        shingle: Words per shingle
+        seed: Seed of the hash function parameters
+    """
+
+    PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self.PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, self.PRIME, size=num_perm, dtype=np.int64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def signature(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        n = min(self.shingle, max(len(words), 1))
+        shingles = {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+        hashes = np.fromiter((_hash64(s) & 0x7FFFFFFF for s in shingles), dtype=np.int64, count=len(shingles))
+        # (a * x + b) mod p for every permutation and shingle; a, x < 2^31 so this fits in int64
+        return ((np.outer(hashes, self._a) + self._b) % self.PRIME).min(axis=0)
+
+    def query(self, signature: np.ndarray, threshold: float,
+              accept: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+        """Index of a stored signature with estimated Jaccard >= threshold (and accepted), or None"""
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(buckets.get(key, ()))
+        best, best_similarity = None, threshold
+        for idx in candidates:
+            if accept is not None and not accept(idx):
+                continue
+            similarity = float(np.mean(self._signatures[idx] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = idx, similarity
+        return best
+
+    def add(self, signature: np.ndarray) -> int:
+        idx = len(self._signatures)
+        self._signatures.append(signature)
+        for band, buckets in enumerate(self._buckets):
+            buckets.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), []).append(idx)
+        return idx
+
+
+class ChunkDeduplicator:
+    """
+    Keeps the first occurrence of every chunk; later exact copies (same normalized
+    text) and near copies (estimated Jaccard >= near_threshold) are dropped. A near
+    copy must also contain the same numbers: plan and price-table chunks that only
+    differ in a price, quota or minute count share almost all their shingles but
+    state different facts.
+
+    The kept chunks (point id, source key, text hash, MinHash signature, numbers) can be saved
+    and loaded again, so a partial update (delta feed, streaming crawl) also drops
+    copies of chunks stored by earlier runs. A loaded chunk never counts against new
+    chunks of its own source key: a changed page is compared with the other pages,
+    not with its previous version.
+
+    Args:
+        near_threshold: Jaccard similarity above which a chunk is a near duplicate;
+            None disables the MinHash stage
+        num_perm / bands / shingle: MinHashLSH parameters
+    """
+
+    def __init__(self, near_threshold: Optional[float] = 0.85, num_perm: int = 64, bands: int = 16,
+                 shingle: int = 5):
+        self.near_threshold = near_threshold
+        self.lsh = MinHashLSH(num_perm, bands, shingle) if near_threshold is not None else None
+        self._hashes: Dict[bytes, int] = {}   # text hash -> entry
+        # Per kept chunk, aligned with the LSH signatures: (point id, source key, text hash, loaded, numbers)
+        self._entries: List[Tuple[Optional[str], Optional[str], bytes, bool, Optional[frozenset]]] = []
+        self.stats = {'chunks': 0, 'kept': 0, 'exact_duplicates': 0, 'near_duplicates': 0, 'chars_dropped': 0}
+
+    def _counts_against(self, entry: int, key: Optional[str]) -> bool:
+        _, owner, _, loaded, _ = self._entries[entry]
+        return not (loaded and key is not None and owner == key)
+
+    def _near_match(self, entry: int, key: Optional[str], numbers: frozenset) -> bool:
+        return self._counts_against(entry, key) and self._entries[entry][4] == numbers
+
+    def _add(self, digest: bytes, signature: Optional[np.ndarray], point_id: Optional[str],
+             key: Optional[str], numbers: Optional[frozenset], loaded: bool = False):
+        self._hashes[digest] = len(self._entries)
+        self._entries.append((point_id, key, digest, loaded, numbers))
+        if self.lsh is not None:
+            self.lsh.add(signature)
+
+    def check(self, text: str, key: Optional[str] = None, point_id: Optional[str] = None) -> Optional[str]:
+        """
+        None if the chunk is new (and remember it), else 'exact' or 'near'.
+        key / point_id: source key (url) and point id of the chunk, for saving and
+        for not matching a page against its own stored chunks
+        """
+        self.stats['chunks'] += 1
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.sha256(normalized.encode('utf-8')).digest()
+        entry = self._hashes.get(digest)
+        if entry is not None and self._counts_against(entry, key):
+            self.stats['exact_duplicates'] += 1
+            self.stats['chars_dropped'] += len(text)
+            return 'exact'
+
+        signature = None
+        numbers = query_numbers(normalized)
+        if self.lsh is not None:
+            signature = self.lsh.signature(normalized)
+            if self.lsh.query(signature, self.near_threshold,
+                              lambda idx: self._near_match(idx, key, numbers)) is not None:
+                self.stats['near_duplicates'] += 1
+                self.stats['chars_dropped'] += len(text)
+                return 'near'
+
+        self._add(digest, signature, point_id, key, numbers)
+        self.stats['kept'] += 1
+        return None
+
+    def filter(self, documents: List[Dict], key: Optional[str] = None) -> List[Dict]:
+        return [doc for doc in documents if self.check(doc['content'], key, doc.get('point_id')) is None]
+
+    def save(self, file_path: str, point_ids: Optional[Set[str]] = None):
+        """Save the kept chunks that have a point id (only those in point_ids, if given)"""
+        entries = {}
+        for idx, (point_id, key, digest, _, numbers) in enumerate(self._entries):
+            if point_id is None or (point_ids is not None and point_id not in point_ids):
+                continue
+            signature = self.lsh._signatures[idx].astype('<u4').tobytes().hex() if self.lsh is not None else None
+            entries[point_id] = [key, digest.hex(), signature, sorted(numbers)]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            params = {'num_perm': self.lsh.num_perm, 'bands': self.lsh.bands, 'shingle': self.lsh.shingle} \
+                if self.lsh is not None else None
+            json.dump({'near_threshold': self.near_threshold, 'lsh': params, 'entries': entries}, f)
+
+    @classmethod
+    def load(cls, file_path: str, point_ids: Optional[Set[str]] = None) -> "ChunkDeduplicator":
+        """
+        Deduplicator seeded with saved chunks; with point_ids, only chunks still stored
+        (chunks deleted since the save no longer count as originals)
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        dedup = cls(data['near_threshold'], **(data['lsh'] or {}))
+        for point_id, (key, digest, signature, *numbers) in data['entries'].items():
+            if point_ids is not None and point_id not in point_ids:
+                continue
+            if dedup.lsh is not None:
+                signature = np.frombuffer(bytes.fromhex(signature), dtype='<u4').astype(np.int64)
+            # Files saved without numbers: the entry only catches exact copies
+            numbers = frozenset(numbers[0]) if numbers else None
+            dedup._add(bytes.fromhex(digest), signature, point_id, key, numbers, loaded=True)
+        return dedup
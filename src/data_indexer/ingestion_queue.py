@@ -0,0 +1,231 @@
+"""
+Background ingestion of uploaded documents
+Uploads are spooled to disk and recorded in a SQLite job queue; a worker thread
+claims queued jobs, extracts them together and indexes all their pages in one
+pipeline run, so batches from concurrent uploads are embedded together.
+Jobs interrupted by a restart are re-queued.
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from uuid import uuid4
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from data_extraction.data_extraction_docs.docs_processing import TelecomEgyptDocumentProcessor
+from data_extraction.data_extraction_docs.records_io import iter_json_records
+from .data_indexing import DocumentIndexer
+
+
+class IngestionJobStore:
+    """
+    Persistent job table. Status goes queued -> extracting -> indexing -> done | failed;
+    progress is 0..1 (extraction is the first half, indexing the second).
+    """
+
+    def __init__(self, db_path: str = "ingestion_jobs.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    stats TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            # Jobs cut off by a restart start over
+            conn.execute("UPDATE jobs SET status = 'queued', progress = 0 WHERE status IN ('extracting', 'indexing')")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add(self, filename: str, file_path: str, job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, filename, file_path, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, filename, file_path, now, now)
+            )
+        return job_id
+
+    def claim(self, limit: int) -> List[Dict]:
+        """Atomically move up to `limit` of the oldest queued jobs to 'extracting'"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT ?", (limit,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'extracting', updated_at = ? WHERE id = ?",
+                [(time.time(), row['id']) for row in rows]
+            )
+        return [dict(row) for row in rows]
+
+    def update(self, job_id: str, status: Optional[str] = None, progress: Optional[float] = None,
+               message: Optional[str] = None, stats: Optional[Dict] = None):
+        fields, values = ["updated_at = ?"], [time.time()]
+        for column, value in (('status', status), ('progress', progress), ('message', message)):
+            if value is not None:
+                fields.append(f"{column} = ?")
+                values.append(value)
+        if stats is not None:
+            fields.append("stats = ?")
+            values.append(json.dumps(stats))
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", (*values, job_id))
+
+    def get(self, job_ids: Iterable[str]) -> List[Dict]:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))}) ORDER BY created_at", job_ids
+            ).fetchall()
+        jobs = [dict(row) for row in rows]
+        for job in jobs:
+            job['stats'] = json.loads(job['stats']) if job['stats'] else None
+        return jobs
+
+    def count_queued(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+
+class IngestionWorker:
+    """
+    Background thread that extracts and indexes queued uploads.
+
+    Args:
+        DB_manager: Vector store the pages are indexed into
+        job_store: Persistent job queue
+        spool_dir: Where uploaded files wait until they are processed
+        coalesce_window: Seconds to wait after the first queued job so concurrent uploads join the batch
+        max_batch_jobs: Jobs processed (and embedded) together
+        extraction_workers: Processes for document extraction / OCR
+    """
+
+    def __init__(self, DB_manager, job_store: Optional[IngestionJobStore] = None,
+                 spool_dir: str = "ingestion_spool", coalesce_window: float = 2.0,
+                 max_batch_jobs: int = 8, extraction_workers: Optional[int] = None,
+                 poll_interval: float = 5.0):
+        self.indexer = DocumentIndexer(DB_manager)
+        self.jobs = job_store or IngestionJobStore()
+        self.spool_dir = spool_dir
+        self.coalesce_window = coalesce_window
+        self.max_batch_jobs = max_batch_jobs
+        self.extraction_workers = extraction_workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def start(self) -> "IngestionWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ingestion-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, filename: str, data: bytes) -> str:
+        """Spool an uploaded file and queue it; returns the job id immediately"""
+        job_id = uuid4().hex[:12]
+        job_dir = os.path.join(self.spool_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        file_path = os.path.join(job_dir, os.path.basename(filename))
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        self.jobs.add(filename, file_path, job_id)
+        self._wakeup.set()
+        return job_id
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.jobs.count_queued():
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            # Give uploads arriving together a moment to join the same batch
+            self._stop.wait(self.coalesce_window)
+            batch = self.jobs.claim(self.max_batch_jobs)
+            if batch:
+                try:
+                    self.process_batch(batch)
+                except Exception as e:
+                    for job in batch:
+                        self.jobs.update(job['id'], status='failed', message=str(e))
+
+    def process_batch(self, batch: List[Dict]):
+        """Extract the batch's files together, then index all their pages in one pipeline run"""
+        by_path = {job['file_path']: job for job in batch}
+        pages_per_job = {job['id']: 0 for job in batch}
+        print(f"Ingesting {len(batch)} queued upload(s)")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pages_file = os.path.join(temp_dir, "pages.jsonl")
+
+            def on_extract_progress(done: int, total: int, filename: str):
+                for job in batch:
+                    if job['filename'] == filename:
+                        self.jobs.update(job['id'], progress=0.5 * done / max(total, 1))
+
+            reports = TelecomEgyptDocumentProcessor().process_multiple_documents(
+                list(by_path), pages_file, workers=self.extraction_workers, progress_callback=on_extract_progress
+            )
+            failed = set()
+            for job, report in zip(batch, reports):
+                if report['status'] != 'ok' or report['pages'] == 0:
+                    failed.add(job['id'])
+                    self.jobs.update(job['id'], status='failed', progress=1.0,
+                                     message=report['status'] if report['status'] != 'ok' else "No content extracted")
+                else:
+                    pages_per_job[job['id']] = report['pages']
+                    self.jobs.update(job['id'], status='indexing', progress=0.5)
+
+            live = [job for job in batch if job['id'] not in failed]
+            if live:
+                records = self._track_indexing(iter_json_records(pages_file), by_path, pages_per_job)
+                result = self.indexer.index_upload_records(records)
+                for job in live:
+                    if isinstance(result, str):
+                        self.jobs.update(job['id'], status='failed', message=result)
+                    else:
+                        self.jobs.update(job['id'], status='done', progress=1.0,
+                                         message=f"{pages_per_job[job['id']]} pages indexed",
+                                         stats={'pages': pages_per_job[job['id']], 'batch_jobs': len(live), 'batch': result})
+
+        for job in batch:
+            shutil.rmtree(os.path.dirname(job['file_path']), ignore_errors=True)
+
+    def _track_indexing(self, records: Iterator[Dict], by_path: Dict[str, Dict],
+                        pages_per_job: Dict[str, int]) -> Iterator[Dict]:
+        """Pass records through, advancing each job's progress as its pages enter the pipeline"""
+        seen = {job_id: 0 for job_id in pages_per_job}
+        for record in records:
+            job = by_path.get(record.get('filepath'))
+            if job is not None:
+                seen[job['id']] += 1
+                fraction = seen[job['id']] / max(pages_per_job[job['id']], 1)
+                self.jobs.update(job['id'], progress=min(0.99, 0.5 + 0.5 * fraction))
+            yield record
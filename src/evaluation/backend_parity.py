@@ -0,0 +1,82 @@
+"""
+Inference Backend Parity Check
+Compares the ONNX / int8 backends against the PyTorch path for the dense
+embedding model and the cross-encoder reranker, and times both.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_vector_store_DB.inference_backends import (
+    load_dense_encoder, load_reranker, check_dense_parity, check_reranker_parity
+)
+
+
+def load_texts(corpus_path: str, dataset_path: str, n_passages: int):
+    """Questions from the test dataset, passages from the scraped corpus"""
+    questions = pd.read_csv(dataset_path)['question'].tolist()
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        pages = json.load(f)
+    passages = []
+    for page in pages:
+        content = page.get('content') or page.get('page_related_content') or ''
+        if len(content) > 50:
+            passages.append(content[:1000])
+        if len(passages) >= n_passages:
+            break
+    return questions, passages
+
+
+def time_call(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_parity(backend: str = "onnx-int8", threads: int = None, n_passages: int = 50,
+               embedding_model: str = "intfloat/multilingual-e5-large",
+               reranker_model: str = "amberoad/bert-multilingual-passage-reranking-msmarco"):
+    here = os.path.dirname(os.path.abspath(__file__))
+    questions, passages = load_texts(
+        os.path.join(os.path.dirname(here), "telecom_egypt_web_scraping.json"),
+        os.path.join(here, "sample_test_dataset.csv"),
+        n_passages
+    )
+    print(f"Parity check: torch vs {backend} on {len(questions)} questions x {len(passages)} passages")
+
+    report = {'backend': backend, 'threads': threads}
+
+    # Dense encoder
+    reference = load_dense_encoder(embedding_model, 'torch', 'cpu', threads)
+    candidate = load_dense_encoder(embedding_model, backend, 'cpu', threads)
+    report['dense'] = check_dense_parity(reference, candidate, questions, passages)
+    prefixed = [f"passage: {p}" for p in passages]
+    report['dense']['torch_seconds'] = time_call(reference.encode, prefixed)
+    report['dense'][f'{backend}_seconds'] = time_call(candidate.encode, prefixed)
+    del reference, candidate
+
+    # Reranker
+    reference = load_reranker(reranker_model, 'torch', 'cpu', threads)
+    candidate = load_reranker(reranker_model, backend, 'cpu', threads)
+    report['reranker'] = check_reranker_parity(reference, candidate, questions, passages[:20])
+    pairs = [[q, p] for q in questions for p in passages[:20]]
+    report['reranker']['torch_seconds'] = time_call(reference.predict, pairs)
+    report['reranker'][f'{backend}_seconds'] = time_call(candidate.predict, pairs)
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ONNX/int8 inference backends against PyTorch")
+    parser.add_argument("--backend", default="onnx-int8", choices=["onnx", "onnx-int8"])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--passages", type=int, default=50)
+    args = parser.parse_args()
+    run_parity(args.backend, args.threads, args.passages)
@@ -0,0 +1,133 @@
+"""
+Chunker Benchmark
+Measures chunking throughput on the scraped corpus and checks the chunker's
+invariants (token limit, coverage, overlap, forward progress, determinism) on
+the corpus and on synthetic edge cases. Exits with status 1 if an invariant fails.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_chunking.text_chunker import TokenChunker, get_tokenizer
+
+
+def load_pages(corpus_path: str):
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        pages = json.load(f)
+    return [page.get('content') or page.get('page_related_content') or '' for page in pages]
+
+
+def synthetic_texts(seed: int = 0):
+    """Edge cases the old chunker got wrong, plus random separator soup"""
+    rng = random.Random(seed)
+    arabic_words = ["المصرية", "للاتصالات", "باقة", "إنترنت", "الشهرية", "خدمة", "العملاء", "رصيد"]
+    english_words = ["Telecom", "Egypt", "package", "internet", "monthly", "customer", "service", "balance"]
+    marks = [" ", " ", " ", ". ", "؟ ", "، ", "؛ ", "\n", "\n\n", "! ", ", "]
+    texts = [
+        "",
+        "   \n\n  ",
+        "كلمة",
+        " ".join(rng.choice(arabic_words) for _ in range(5000)),           # long Arabic, no punctuation
+        "x" * 20000,                                                     # one huge word
+        "\n\n".join("سطر " * 40 for _ in range(30)),
+    ]
+    for _ in range(200):
+        words = arabic_words + english_words
+        n = rng.randint(1, 800)
+        texts.append("".join(rng.choice(words) + rng.choice(marks) for _ in range(n)))
+    return texts
+
+
+def check_invariants(chunker: TokenChunker, text: str):
+    """Return a list of violated invariants for one text"""
+    errors = []
+    spans = list(chunker.iter_spans(text))
+    n_tokens = len(chunker.tokenizer.offsets(text))
+
+    if n_tokens == 0:
+        return ["chunks produced for empty text"] if spans else []
+    if not spans:
+        return ["no chunks for non-empty text"]
+    if spans[0][2] != 0 or spans[-1][3] != n_tokens:
+        errors.append("chunks do not cover the text")
+
+    for i, (char_start, char_end, tok_start, tok_end) in enumerate(spans):
+        size = tok_end - tok_start
+        if size <= 0 or char_end <= char_start:
+            errors.append(f"empty chunk {i}")
+        if size > chunker.max_tokens:
+            errors.append(f"chunk {i} has {size} > {chunker.max_tokens} tokens")
+        if i == 0:
+            continue
+        prev_start, prev_end = spans[i - 1][2], spans[i - 1][3]
+        if tok_start <= prev_start or tok_end <= prev_end:
+            errors.append(f"chunk {i} does not move forward")
+        if tok_start > prev_end:
+            errors.append(f"gap before chunk {i}")
+        if prev_end - tok_start < min(chunker.overlap, prev_end - prev_start):
+            errors.append(f"chunk {i} overlaps {prev_end - tok_start} < {chunker.overlap} tokens")
+
+    if [text[s:e] for s, e, _, _ in spans] != [text[s:e] for s, e, _, _ in chunker.iter_spans(text)]:
+        errors.append("non-deterministic output")
+    return errors
+
+
+def run_benchmark(max_tokens: int = 128, overlap: int = 32, repeats: int = 3, tokenizer_name: str = None):
+    here = os.path.dirname(os.path.abspath(__file__))
+    pages = load_pages(os.path.join(os.path.dirname(here), "telecom_egypt_web_scraping.json"))
+    tokenizer = get_tokenizer(tokenizer_name) if tokenizer_name else get_tokenizer()
+    chunker = TokenChunker(max_tokens, overlap, tokenizer)
+    print(f"Chunking {len(pages)} pages ({sum(len(p) for p in pages) / 1e6:.2f} M chars), "
+          f"max_tokens={max_tokens}, overlap={overlap}, tokenizer={type(tokenizer).__name__}")
+
+    # Throughput
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = [chunk for page in pages for chunk in chunker.iter_chunks(page)]
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    sizes = np.array([len(tokenizer.offsets(chunk)) for chunk in chunks])
+
+    report = {
+        'pages': len(pages),
+        'chunks': len(chunks),
+        'seconds': round(best, 4),
+        'pages_per_second': round(len(pages) / best, 1),
+        'chars_per_second': round(sum(len(p) for p in pages) / best),
+        'chunk_tokens_p50': float(np.percentile(sizes, 50)) if len(sizes) else 0.0,
+        'chunk_tokens_max': int(sizes.max()) if len(sizes) else 0,
+    }
+
+    # Invariants
+    failures = {}
+    for name, texts in (('corpus', pages), ('synthetic', synthetic_texts())):
+        for idx, text in enumerate(texts):
+            errors = check_invariants(chunker, text)
+            if errors:
+                failures[f"{name}[{idx}]"] = errors[:5]
+    report['invariant_failures'] = len(failures)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    for key, errors in list(failures.items())[:10]:
+        print(f"  {key}: {errors}")
+    return report, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunker throughput and invariant checks")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tokenizer", default=None, help="Hugging Face tokenizer (default: multilingual-e5-large)")
+    args = parser.parse_args()
+
+    _, failures = run_benchmark(args.max_tokens, args.overlap, args.repeats, args.tokenizer)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,141 @@
+"""
+Collection Layout Benchmark
+Copies the collection into a new storage layout (quantization, HNSW, on-disk,
+float16) without re-embedding, then compares dense recall@k against exact search
+and p50/p95 query latency of the current and the new layout.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client import models
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from qdrant_vector_store_DB.collection_layout import CollectionLayout
+
+# Load environment variables
+load_dotenv()
+
+
+def sample_query_vectors(store: QdrantVectorStoreManager, n_queries: int, seed: int = 0):
+    """Use stored passage vectors (slightly perturbed) as queries, so no model has to be loaded"""
+    points, _ = store.client.scroll(
+        collection_name=store.collection_name,
+        limit=max(n_queries * 5, 100),
+        with_payload=False,
+        with_vectors=["dense"]
+    )
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(points), size=min(n_queries, len(points)), replace=False)
+    queries = []
+    for idx in chosen:
+        vector = np.asarray(points[idx].vector["dense"], dtype=np.float32)
+        vector = vector + rng.normal(scale=0.01, size=vector.shape)
+        queries.append((vector / np.linalg.norm(vector)).tolist())
+    return queries
+
+
+def run_queries(store, collection_name, queries, k, search_params):
+    """Return (result ids per query, latencies in ms)"""
+    ids, latencies = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        response = store.client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            using="dense",
+            limit=k,
+            search_params=search_params,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([str(p.id) for p in response.points])
+    return ids, latencies
+
+
+def summarize(ids, exact_ids, latencies, k):
+    recalls = [len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(ids, exact_ids)]
+    return {
+        f'recall@{k}': round(float(np.mean(recalls)), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def benchmark_layout(layout: CollectionLayout, n_queries: int = 100, k: int = 10,
+                     keep_copy: bool = False, output_file: str = "layout_benchmark.json"):
+    store = QdrantVectorStoreManager(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        qdrant_url=os.getenv("QDRANT_URL"),
+        qdrant_api_key=os.getenv("QDRANT_API_KEY"),
+        collection_name="telecom_egypt_VDB",
+        use_cloud=bool(os.getenv("QDRANT_URL")),
+        llm_backend="local"
+    )
+    candidate_name = f"{store.collection_name}_layout_benchmark"
+    store.migrate_collection(layout, target_collection=candidate_name, replace=False, overwrite=True)
+
+    queries = sample_query_vectors(store, n_queries)
+    print(f"Benchmarking {len(queries)} queries, k={k}")
+
+    exact_ids, _ = run_queries(store, store.collection_name, queries, k, models.SearchParams(exact=True))
+    base_ids, base_latencies = run_queries(store, store.collection_name, queries, k,
+                                           store.collection_layout.search_params())
+    cand_ids, cand_latencies = run_queries(store, candidate_name, queries, k, layout.search_params())
+
+    results = {
+        'layout': layout.as_dict(),
+        'queries': len(queries),
+        'current': summarize(base_ids, exact_ids, base_latencies, k),
+        'candidate': summarize(cand_ids, exact_ids, cand_latencies, k),
+    }
+    print(json.dumps(results, indent=2))
+
+    if not keep_copy:
+        store.client.delete_collection(candidate_name)
+
+    output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), output_file)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_path}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a Qdrant storage layout against the current one")
+    parser.add_argument("--quantization", choices=["scalar", "binary"], default=None)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--no-rescore", action="store_true")
+    parser.add_argument("--datatype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--hnsw-m", type=int, default=None)
+    parser.add_argument("--hnsw-ef-construct", type=int, default=None)
+    parser.add_argument("--hnsw-ef", type=int, default=None)
+    parser.add_argument("--on-disk", action="store_true", help="Store vectors, payload and sparse index on disk")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep-copy", action="store_true")
+    args = parser.parse_args()
+
+    benchmark_layout(
+        CollectionLayout(
+            quantization=args.quantization,
+            rescore=not args.no_rescore,
+            oversampling=args.oversampling,
+            hnsw_m=args.hnsw_m,
+            hnsw_ef_construct=args.hnsw_ef_construct,
+            hnsw_ef=args.hnsw_ef,
+            on_disk_vectors=args.on_disk,
+            on_disk_payload=args.on_disk,
+            sparse_on_disk=args.on_disk,
+            datatype=args.datatype
+        ),
+        n_queries=args.queries,
+        k=args.k,
+        keep_copy=args.keep_copy
+    )
@@ -0,0 +1,102 @@
+"""
+Language Detection Benchmark
+Compares the shared LanguageDetector (script-ratio fast path, langdetect fallback,
+LRU cache) with plain langdetect on the scraped corpus: chunks as the indexer sees
+them, whole pages, and the evaluation questions. Reports throughput, how often the
+model fallback was needed and agreement with langdetect. Exits with status 1 if
+agreement is below --min-agreement or the detector is not deterministic.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langdetect import DetectorFactory, detect
+from data_chunking.text_chunker import recursive_chunk
+from language_detection.language_id import LanguageDetector
+
+
+def load_texts(chunk_size: int = 128, overlap: int = 32):
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(os.path.dirname(here), "telecom_egypt_web_scraping.json"), 'r', encoding='utf-8') as f:
+        pages = [page.get('content') or page.get('page_related_content') or '' for page in json.load(f)]
+    chunks = [chunk for page in pages for chunk in recursive_chunk(page, max_size=chunk_size, overlap=overlap)
+              if len(chunk) > 10]
+    with open(os.path.join(here, "sample_test_dataset.csv"), 'r', encoding='utf-8') as f:
+        questions = [row['question'] for row in csv.DictReader(f)]
+    return {'chunks': chunks, 'pages': pages, 'questions': questions}
+
+
+def langdetect_language(text: str) -> str:
+    """The old detect_language: langdetect, anything but ar/en (or a failure) is 'en'"""
+    try:
+        lang = detect(text)
+        return lang if lang in ['ar', 'en'] else 'en'
+    except Exception:
+        return "en"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(chunk_size: int = 128, overlap: int = 32):
+    DetectorFactory.seed = 0
+    report = {}
+    deterministic = True
+    for name, texts in load_texts(chunk_size, overlap).items():
+        if not texts:
+            continue
+        baseline, baseline_seconds = timed(lambda: [langdetect_language(text) for text in texts])
+
+        detector = LanguageDetector(cache_size=0)
+        single, single_seconds = timed(lambda: [detector.detect(text) for text in texts])
+        batch, batch_seconds = timed(lambda: LanguageDetector(cache_size=0).detect_batch(texts))
+
+        cached_detector = LanguageDetector(cache_size=len(texts))
+        cached_detector.detect_batch(texts)
+        _, cached_seconds = timed(lambda: [cached_detector.detect(text) for text in texts])
+
+        deterministic &= single == batch
+        disagreements = [(text[:80], ours, theirs) for text, ours, theirs in zip(texts, single, baseline)
+                         if ours != theirs]
+        stats = detector.get_stats()
+        report[name] = {
+            'texts': len(texts),
+            'arabic': single.count('ar'),
+            'langdetect_ms_per_text': round(1000 * baseline_seconds / len(texts), 4),
+            'detector_ms_per_text': round(1000 * single_seconds / len(texts), 4),
+            'batch_ms_per_text': round(1000 * batch_seconds / len(texts), 4),
+            'cached_ms_per_text': round(1000 * cached_seconds / len(texts), 4),
+            'speedup': round(baseline_seconds / single_seconds, 1) if single_seconds else None,
+            'batch_speedup': round(baseline_seconds / batch_seconds, 1) if batch_seconds else None,
+            'model_fallback_share': round(stats['model'] / len(texts), 4),
+            'agreement': round(1 - len(disagreements) / len(texts), 4),
+            'disagreements': disagreements[:5],
+        }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return report, deterministic
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Language detection speed and agreement with langdetect")
+    parser.add_argument("--chunk-size", type=int, default=128)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args()
+
+    report, deterministic = run_benchmark(args.chunk_size, args.overlap)
+    low = [name for name, result in report.items() if result['agreement'] < args.min_agreement]
+    if low:
+        print(f"Agreement with langdetect below {args.min_agreement}: {low}")
+    if not deterministic:
+        print("Single and batch detection disagree")
+    sys.exit(1 if low or not deterministic else 0)
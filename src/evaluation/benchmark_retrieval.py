@@ -0,0 +1,388 @@
+"""
+Retrieval Benchmark
+Runs the retrieval variants (dense only, BM25 only, RRF hybrid, hybrid + rerank)
+over a test set against the local Qdrant storage and reports recall@k, MRR and
+nDCG@k next to p50/p95 latency and QPS. No Groq key or ragas needed.
+
+Relevance labels come from either
+  - a qrels file (.jsonl / .json): {"query": "...", "relevant": ["point_id", ...]}
+    or {"query": "...", "relevant": {"point_id": grade, ...}}; keys are point ids
+    (deterministic per chunk) by default, or URLs with --match-field url. Doc ids
+    of indexes built before they were derived from point ids (web_<n> / upload_<n>)
+    were renumbered by every run, so doc_id qrels only hold for such an index as is
+  - the question/ground_truth CSV: results of all variants are pooled per query and
+    a pooled chunk counts as relevant when it contains enough of the ground-truth
+    answer's terms (grade 2 above the midpoint between threshold and 1)
+
+Results are saved as JSON; with --baseline, metrics are compared against a saved
+run and the script exits with status 1 on a regression.
+
+With both hybrid modes, a margin sweep shows what skipping the reranker at each
+RRF-margin threshold (RerankPolicy.skip_margin) would cost in quality; pick a
+threshold from it, then confirm it with --skip-margin / --truncate-margin.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from qdrant_vector_store_DB.rerank_policy import RerankPolicy
+from qdrant_vector_store_DB.tracing import tracer
+
+# Load environment variables
+load_dotenv()
+
+EVAL_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = ('dense', 'bm25', 'hybrid', 'hybrid_rerank')
+QUALITY_METRICS = ('recall', 'mrr', 'ndcg')
+SWEEP_MARGINS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5)
+
+
+# ---------------------------------------------------------------------- test set
+
+def load_test_set(path: str) -> List[Dict]:
+    """[{'query', 'relevant': {key: grade} or None, 'ground_truth': str or None}]"""
+    if path.endswith('.csv'):
+        df = pd.read_csv(path)
+        return [{'query': row['question'], 'relevant': None, 'ground_truth': row['ground_truth']}
+                for _, row in df.iterrows()]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    test_set = []
+    for entry in entries:
+        relevant = entry['relevant']
+        if isinstance(relevant, list):
+            relevant = {str(key): 1 for key in relevant}
+        test_set.append({'query': entry['query'], 'relevant': {str(k): v for k, v in relevant.items()},
+                         'ground_truth': entry.get('ground_truth')})
+    return test_set
+
+
+def result_key(result: Dict, match_field: str) -> str:
+    if match_field == 'url':
+        return result['metadata'].get('url') or result['metadata'].get('filename') or result['id']
+    return str(result['point_id'] if match_field == 'point_id' else result['id'])
+
+
+def terms(text: str) -> set:
+    return {token for token in re.findall(r"\w+", str(text).lower()) if len(token) > 2}
+
+
+def pooled_labels(ground_truth: str, pool: List[Dict], match_field: str, threshold: float) -> Dict[str, int]:
+    """Grade pooled results by the share of ground-truth terms they contain"""
+    answer_terms = terms(ground_truth)
+    if not answer_terms:
+        return {}
+    labels = {}
+    for result in pool:
+        overlap = len(answer_terms & terms(result['content'])) / len(answer_terms)
+        if overlap >= threshold:
+            labels[result_key(result, match_field)] = 2 if overlap >= (1 + threshold) / 2 else 1
+    return labels
+
+
+# ---------------------------------------------------------------------- retrieval variants
+
+def make_search(store: QdrantVectorStoreManager, mode: str, n_results: int):
+    """Return query -> results for one retrieval variant"""
+    if mode == 'hybrid':
+        return lambda query: store.search(query, n_results=n_results, use_reranker=False)
+    if mode == 'hybrid_rerank':
+        return lambda query: store.search(query, n_results=n_results, use_reranker=True)
+
+    def single_leg(query: str) -> List[Dict]:
+        with tracer.span("search", mode=mode):
+            if mode == 'dense':
+                with tracer.span("search.dense_encode"):
+                    vector = store._encode_dense([query], prefix="query")[0].tolist()
+                params = store.collection_layout.search_params()
+            else:
+                with tracer.span("search.bm25_encode"):
+                    vector = store._to_sparse_vector(store._sparse_embed([query])[0])
+                params = None
+            with tracer.span("search.qdrant_query", using=mode):
+                response = store.client.query_points(
+                    collection_name=store.collection_name,
+                    query=vector,
+                    using=mode,
+                    search_params=params,
+                    limit=n_results,
+                    with_payload=True
+                )
+            return store._format_points(response.points)
+    return single_leg
+
+
+def run_mode(store: QdrantVectorStoreManager, mode: str, queries: List[str], n_results: int,
+             repeat: int, warmup: int) -> Dict:
+    """Results of the first pass plus per-query latencies of every timed pass"""
+    search = make_search(store, mode, n_results)
+    for query in queries[:warmup]:
+        search(query)
+
+    tracer.reset_metrics()
+    results, latencies = [], []
+    wall_start = time.perf_counter()
+    for pass_idx in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            retrieved = search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if pass_idx == 0:
+                results.append(retrieved)
+    wall_seconds = time.perf_counter() - wall_start
+    return {'results': results, 'latencies': latencies, 'wall_seconds': wall_seconds,
+            'stages': tracer.metrics()}
+
+
+# ---------------------------------------------------------------------- metrics
+
+def dcg(gains: List[float]) -> float:
+    return float(sum(gain / np.log2(rank + 2) for rank, gain in enumerate(gains)))
+
+
+def score_query(ranked_keys: List[str], relevant: Dict[str, int], ks: List[int]) -> Dict[str, float]:
+    # Several chunks can map to the same key (e.g. one URL); only the first one counts
+    ranked_keys = list(dict.fromkeys(ranked_keys))
+    scores = {}
+    n_relevant = sum(1 for grade in relevant.values() if grade > 0)
+    first_hit = next((rank for rank, key in enumerate(ranked_keys) if relevant.get(key, 0) > 0), None)
+    scores['mrr'] = 1.0 / (first_hit + 1) if first_hit is not None else 0.0
+    ideal = sorted(relevant.values(), reverse=True)
+    for k in ks:
+        top = ranked_keys[:k]
+        hits = len({key for key in top if relevant.get(key, 0) > 0})
+        scores[f'recall@{k}'] = hits / n_relevant if n_relevant else 0.0
+        ideal_dcg = dcg([2 ** grade - 1 for grade in ideal[:k]])
+        scores[f'ndcg@{k}'] = dcg([2 ** relevant.get(key, 0) - 1 for key in top]) / ideal_dcg if ideal_dcg else 0.0
+    return scores
+
+
+def summarize(per_query: List[Dict[str, float]], run: Dict, n_queries: int) -> Dict:
+    summary = {name: round(float(np.mean([scores[name] for scores in per_query])), 4)
+               for name in per_query[0]} if per_query else {}
+    latencies = run['latencies']
+    summary.update({
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'qps': round(len(latencies) / run['wall_seconds'], 2) if run['wall_seconds'] else 0.0,
+        'queries_scored': len(per_query),
+        'queries': n_queries,
+    })
+    return summary
+
+
+def margin_sweep(runs: Dict, labels: List[Dict], match_field: str, ks: List[int],
+                 thresholds=SWEEP_MARGINS) -> List[Dict]:
+    """
+    Quality if reranking were skipped for queries whose RRF margin is at or above each
+    threshold: those queries keep their hybrid order, the others their reranked order.
+    Needs hybrid and hybrid_rerank runs with a policy that always reranks.
+    """
+    margins = [RerankPolicy.rrf_margin(results) for results in runs['hybrid']['results']]
+    sweep = []
+    for threshold in thresholds:
+        per_query = []
+        for margin, hybrid, reranked, relevant in zip(margins, runs['hybrid']['results'],
+                                                      runs['hybrid_rerank']['results'], labels):
+            if relevant:
+                retrieved = hybrid if margin >= threshold else reranked
+                per_query.append(score_query([result_key(result, match_field) for result in retrieved], relevant, ks))
+        row = {'skip_margin': threshold,
+               'skip_rate': round(float(np.mean([margin >= threshold for margin in margins])), 4) if margins else 0.0}
+        if per_query:
+            row.update({name: round(float(np.mean([scores[name] for scores in per_query])), 4) for name in per_query[0]})
+        sweep.append(row)
+    return sweep
+
+
+# ---------------------------------------------------------------------- baseline comparison
+
+def compare_to_baseline(results: Dict, baseline: Dict, max_quality_drop: float,
+                        max_latency_increase: float) -> List[str]:
+    """Human-readable regressions; empty when the run is at least as good as the baseline"""
+    regressions = []
+    for mode, summary in results['modes'].items():
+        previous = baseline.get('modes', {}).get(mode)
+        if previous is None:
+            continue
+        for name, value in summary.items():
+            if name.split('@')[0] in QUALITY_METRICS and name in previous:
+                if value < previous[name] - max_quality_drop:
+                    regressions.append(f"{mode} {name}: {previous[name]:.4f} -> {value:.4f}")
+        if 'p95_ms' in previous and summary['p95_ms'] > previous['p95_ms'] * (1 + max_latency_increase):
+            regressions.append(f"{mode} p95_ms: {previous['p95_ms']:.1f} -> {summary['p95_ms']:.1f}")
+    return regressions
+
+
+def print_table(results: Dict, ks: List[int]):
+    columns = [f'recall@{k}' for k in ks] + ['mrr'] + [f'ndcg@{k}' for k in ks] + ['p50_ms', 'p95_ms', 'qps']
+    print(f"\n{'mode':<15}" + "".join(f"{name:>11}" for name in columns))
+    print("-" * (15 + 11 * len(columns)))
+    for mode, summary in results['modes'].items():
+        print(f"{mode:<15}" + "".join(f"{summary.get(name, float('nan')):>11.4g}" for name in columns))
+
+
+# ---------------------------------------------------------------------- entry point
+
+def benchmark_retrieval(test_set_path: str, modes: List[str], ks: List[int], match_field: str = 'point_id',
+                        overlap_threshold: float = 0.5, repeat: int = 1, warmup: int = 2,
+                        qdrant_path: Optional[str] = None, collection_name: str = "telecom_egypt_VDB",
+                        output_file: str = "retrieval_benchmark.json", baseline_file: Optional[str] = None,
+                        save_baseline: bool = False, max_quality_drop: float = 0.02,
+                        max_latency_increase: float = 0.25, skip_margin: Optional[float] = None,
+                        truncate_margin: Optional[float] = None) -> int:
+    test_set = load_test_set(test_set_path)
+    queries = [entry['query'] for entry in test_set]
+    n_results = max(ks)
+    print(f"Benchmarking {len(queries)} queries, modes={modes}, k={ks}")
+
+    # Local storage, no LLM, and no embedding cache so query encoding is timed every pass
+    store = QdrantVectorStoreManager(
+        collection_name=collection_name,
+        persist_directory=qdrant_path or os.path.join(os.path.dirname(EVAL_DIR), "qdrant_db"),
+        llm_backend="local",
+        embedding_cache_dir=None,
+        semantic_cache_threshold=None,
+        rerank_policy=RerankPolicy(skip_margin=skip_margin, truncate_margin=truncate_margin)
+    )
+    print(f"Collection has {store.count()} points")
+    store.warm_up(('dense', 'sparse', 'reranker'))
+
+    runs = {mode: run_mode(store, mode, queries, n_results, repeat, warmup) for mode in modes}
+
+    # Labels: given qrels, or ground-truth overlap over the pool of every variant's results
+    labels = []
+    for idx, entry in enumerate(test_set):
+        if entry['relevant'] is not None:
+            labels.append(entry['relevant'])
+        else:
+            pool = [result for run in runs.values() for result in run['results'][idx]]
+            labels.append(pooled_labels(entry['ground_truth'], pool, match_field, overlap_threshold))
+
+    results = {
+        'test_set': os.path.basename(test_set_path),
+        'labels': 'qrels' if all(entry['relevant'] is not None for entry in test_set) else 'pooled_overlap',
+        'match_field': match_field,
+        'k': ks,
+        'repeat': repeat,
+        'collection': {'name': collection_name, 'points': store.count()},
+        'modes': {},
+        'stages': {},
+    }
+    for mode, run in runs.items():
+        per_query = [
+            score_query([result_key(result, match_field) for result in retrieved], relevant, ks)
+            for retrieved, relevant in zip(run['results'], labels) if relevant
+        ]
+        results['modes'][mode] = summarize(per_query, run, len(queries))
+        results['stages'][mode] = run['stages']
+    if 'hybrid_rerank' in modes:
+        results['rerank_policy'] = {'skip_margin': skip_margin, 'truncate_margin': truncate_margin}
+        results['rerank_paths'] = store.get_rerank_stats()['paths']
+        if 'hybrid' in modes and skip_margin is None and truncate_margin is None:
+            results['margin_sweep'] = margin_sweep(runs, labels, match_field, ks)
+
+    print_table(results, ks)
+    if 'margin_sweep' in results:
+        reference = results['modes']['hybrid_rerank']
+        print(f"\nSkip-margin sweep (always rerank: mrr={reference.get('mrr', float('nan')):.4f})")
+        for row in results['margin_sweep']:
+            print(f"  skip_margin>={row['skip_margin']:<5} skips {row['skip_rate']:>6.1%}  "
+                  f"mrr={row.get('mrr', float('nan')):.4f}  ndcg@{max(ks)}={row.get(f'ndcg@{max(ks)}', float('nan')):.4f}")
+    unlabeled = sum(1 for relevant in labels if not relevant)
+    if unlabeled:
+        print(f"\n⚠️  {unlabeled} queries have no relevant documents and are not scored")
+
+    output_path = os.path.join(EVAL_DIR, output_file)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output_path}")
+
+    exit_code = 0
+    if baseline_file:
+        if save_baseline:
+            with open(baseline_file, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            print(f"Baseline saved to {baseline_file}")
+        elif os.path.exists(baseline_file):
+            with open(baseline_file, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(results, baseline, max_quality_drop, max_latency_increase)
+            if regressions:
+                print(f"\n❌ {len(regressions)} regression(s) against {baseline_file}:")
+                for regression in regressions:
+                    print(f"  {regression}")
+                exit_code = 1
+            else:
+                print(f"\n✓ No regressions against {baseline_file}")
+        else:
+            print(f"Baseline {baseline_file} not found; run with --save-baseline first")
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency of the search variants")
+    parser.add_argument("--test-set", default=os.path.join(EVAL_DIR, "sample_test_dataset.csv"),
+                        help="question/ground_truth CSV, or a qrels .jsonl/.json file")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of {MODES}")
+    parser.add_argument("--k", default="1,3,5,10", help="Cutoffs for recall@k and nDCG@k")
+    parser.add_argument("--match-field", choices=["point_id", "url", "doc_id"], default="point_id",
+                        help="Result field the qrels keys refer to")
+    parser.add_argument("--overlap-threshold", type=float, default=0.5,
+                        help="Share of ground-truth terms a chunk needs to count as relevant (CSV test sets)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the queries")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed queries per mode")
+    parser.add_argument("--qdrant-path", default=None, help="Local Qdrant storage (default: src/qdrant_db)")
+    parser.add_argument("--collection", default="telecom_egypt_VDB")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against (or to write)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--max-quality-drop", type=float, default=0.02,
+                        help="Allowed absolute drop of recall / MRR / nDCG")
+    parser.add_argument("--max-latency-increase", type=float, default=0.25,
+                        help="Allowed relative p95 latency increase")
+    parser.add_argument("--skip-margin", type=float, default=None,
+                        help="RerankPolicy.skip_margin to benchmark (default: always rerank, with a margin sweep)")
+    parser.add_argument("--truncate-margin", type=float, default=None,
+                        help="RerankPolicy.truncate_margin to benchmark")
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Unknown modes: {sorted(unknown)}")
+
+    sys.exit(benchmark_retrieval(
+        test_set_path=args.test_set,
+        modes=modes,
+        ks=sorted({int(k) for k in args.k.split(",")}),
+        match_field=args.match_field,
+        overlap_threshold=args.overlap_threshold,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        qdrant_path=args.qdrant_path,
+        collection_name=args.collection,
+        output_file=args.output,
+        baseline_file=args.baseline,
+        save_baseline=args.save_baseline,
+        max_quality_drop=args.max_quality_drop,
+        max_latency_increase=args.max_latency_increase,
+        skip_margin=args.skip_margin,
+        truncate_margin=args.truncate_margin
+    ))
@@ -0,0 +1,115 @@
+"""
+Semantic Cache Threshold Benchmark
+Runs labeled question pairs through SemanticResponseCache: the first question of a
+pair is cached, the second is looked up. Paraphrases (same_answer=1) should hit,
+near-misses (other numbers, products or intents, same_answer=0) must not. Reports,
+per similarity threshold and with / without the number guard, the share of
+paraphrases served and the near-misses served by mistake, and recommends the
+lowest threshold that serves no near-miss.
+
+    python src/evaluation/benchmark_semantic_cache.py
+    SEMANTIC_CACHE_THRESHOLD=<recommended> streamlit run src/streamlit_app.py
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+from typing import Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Add src to path
+EVAL_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(EVAL_DIR))
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from qdrant_vector_store_DB.semantic_cache import SemanticResponseCache
+
+THRESHOLDS = (0.9, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98, 0.99)
+
+
+def load_pairs(file_path: str) -> List[Dict]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [{'query_a': row['query_a'], 'query_b': row['query_b'], 'same_answer': row['same_answer'] == '1'}
+                for row in csv.DictReader(f)]
+
+
+def evaluate_threshold(pairs: List[Dict], embeddings_a: np.ndarray, embeddings_b: np.ndarray,
+                       threshold: float, match_numbers: bool) -> Dict:
+    """Cache query_a, look up query_b, each pair in its own scope"""
+    cache = SemanticResponseCache(similarity_threshold=threshold, max_entries=len(pairs) + 1,
+                                  match_numbers=match_numbers)
+    for i, (pair, embedding) in enumerate(zip(pairs, embeddings_a)):
+        cache.store(embedding, i, query=pair['query_a'], answer=pair['query_a'], sources=[], latency=0.0)
+
+    served, false_hits = 0, []
+    for i, (pair, embedding) in enumerate(zip(pairs, embeddings_b)):
+        if cache.lookup(embedding, i, query=pair['query_b']) is None:
+            continue
+        if pair['same_answer']:
+            served += 1
+        else:
+            false_hits.append(f"{pair['query_a']} -> {pair['query_b']}")
+    paraphrases = sum(pair['same_answer'] for pair in pairs)
+    return {
+        'threshold': threshold,
+        'match_numbers': match_numbers,
+        'paraphrase_hit_rate': round(served / paraphrases, 4) if paraphrases else 0.0,
+        'false_hits': len(false_hits),
+        'false_hit_examples': false_hits[:5],
+    }
+
+
+def benchmark_semantic_cache(pairs_path: str, thresholds=THRESHOLDS,
+                             output_file: str = "semantic_cache_benchmark.json") -> Dict:
+    pairs = load_pairs(pairs_path)
+    store = QdrantVectorStoreManager(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        collection_name=os.getenv("COLLECTION_NAME", "telecom_egypt_VDB"),
+        embedding_model_name="intfloat/multilingual-e5-large",
+        use_cloud=bool(os.getenv("QDRANT_URL")),
+        qdrant_url=os.getenv("QDRANT_URL"),
+        qdrant_api_key=os.getenv("QDRANT_API_KEY"),
+        llm_backend="local",
+        embedding_cache_dir=None
+    )
+    embeddings_a = store._encode_dense([pair['query_a'] for pair in pairs], prefix="query")
+    embeddings_b = store._encode_dense([pair['query_b'] for pair in pairs], prefix="query")
+    similarities = np.sum(embeddings_a * embeddings_b, axis=1)
+
+    positives = [float(s) for s, pair in zip(similarities, pairs) if pair['same_answer']]
+    negatives = [float(s) for s, pair in zip(similarities, pairs) if not pair['same_answer']]
+    rows = [evaluate_threshold(pairs, embeddings_a, embeddings_b, threshold, match_numbers)
+            for match_numbers in (False, True) for threshold in thresholds]
+    safe = [row for row in rows if row['match_numbers'] and row['false_hits'] == 0]
+
+    results = {
+        'pairs': len(pairs),
+        'paraphrase_similarity': {'min': round(min(positives), 4), 'median': round(float(np.median(positives)), 4)}
+        if positives else {},
+        'near_miss_similarity': {'median': round(float(np.median(negatives)), 4), 'max': round(max(negatives), 4)}
+        if negatives else {},
+        'thresholds': rows,
+        'recommended_threshold': min(row['threshold'] for row in safe) if safe else None,
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    output_path = os.path.join(EVAL_DIR, output_file)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Results saved to {output_path}")
+    return results
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Choose the semantic cache threshold from labeled question pairs")
+    parser.add_argument("--pairs", default=os.path.join(EVAL_DIR, "semantic_cache_pairs.csv"),
+                        help="CSV with query_a, query_b, same_answer (1 = paraphrase, 0 = near-miss)")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(THRESHOLDS))
+    parser.add_argument("--output", default="semantic_cache_benchmark.json")
+    args = parser.parse_args()
+
+    benchmark_semantic_cache(args.pairs, args.thresholds, args.output)
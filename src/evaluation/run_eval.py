@@ -48,11 +48,12 @@ def run_evaluation(test_dataset_path: str = "test_dataset.csv", output_file: str
     contexts = []
     
     print(f"Evaluating {len(questions)} questions...")
-    for i, question in enumerate(questions):
+    # Search for context (one batched request for all questions)
+    all_search_results = vector_store.search_batch(queries=questions, n_results=3)
+    
+    for i, (question, search_results) in enumerate(zip(questions, all_search_results)):
         print(f"Processing question {i+1}/{len(questions)}: {question}")
         
-        # Search for context
-        search_results = vector_store.search(query=question, n_results=3)
         retrieved_contexts = [res['content'] for res in search_results]
         contexts.append(retrieved_contexts)
         
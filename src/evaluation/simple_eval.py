@@ -60,16 +60,23 @@ def run_simple_evaluation(test_dataset_path: str = "sample_test_dataset.csv", ou
         return
     
     # 3. Generate Answers and Contexts
+    print("\n🔍 Retrieving context for all questions (batched search)...")
+    try:
+        all_search_results = vector_store.search_batch(queries=questions, n_results=3)
+        print(f"✓ Retrieved context for {len(questions)} questions")
+        print(f"  Rerank paths: {vector_store.get_rerank_stats()['paths']}")
+    except Exception as e:
+        print(f"❌ Batched search failed: {e}")
+        all_search_results = [[] for _ in questions]
+
     print("\n🤖 Generating answers for test questions...")
     answers = []
     contexts = []
     
-    for i, question in enumerate(questions, 1):
+    for i, (question, search_results) in enumerate(zip(questions, all_search_results), 1):
         print(f"\n[{i}/{len(questions)}] Processing: {question[:60]}...")
         
         try:
-            # Search for context
-            search_results = vector_store.search(query=question, n_results=3)
             retrieved_contexts = [res['content'] for res in search_results]
             contexts.append(retrieved_contexts)
             
@@ -86,6 +93,12 @@ def run_simple_evaluation(test_dataset_path: str = "sample_test_dataset.csv", ou
             answers.append("Error generating answer")
             contexts.append([])
     
+    print("\n⏱️  Stage latency (ms):")
+    for stage, summary in vector_store.get_latency_stats().items():
+        if summary.get('p50_ms') is not None:
+            print(f"  {stage:<24} p50 {summary['p50_ms']:>8.1f} | p95 {summary['p95_ms']:>8.1f} | "
+                  f"p99 {summary['p99_ms']:>8.1f} | n={summary['count']}")
+    
     # 4. Prepare Dataset for Ragas
     print("\n📊 Preparing evaluation dataset...")
     data = {
@@ -0,0 +1,131 @@
+"""
+Offline warm-up of the FAQ store
+Runs the hot questions through search_batch + generation in bulk and stores each
+answer with the ids of the chunks it was built from, so the chat path (Streamlit,
+/chat) answers them from SQLite without retrieval or an LLM call. Run it after
+(re)indexing: answers whose chunks were deleted are dropped and regenerated.
+
+    python src/faq_warmup.py --questions src/hot_questions.txt
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from language_detection.language_id import detect_languages
+
+
+def load_questions(file_path: str) -> List[str]:
+    """One question per line; blank lines and # comments are skipped"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def create_store(faq_db: str) -> QdrantVectorStoreManager:
+    return QdrantVectorStoreManager(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        collection_name=os.getenv("COLLECTION_NAME", "telecom_egypt_VDB"),
+        embedding_model_name="intfloat/multilingual-e5-large",
+        use_cloud=bool(os.getenv("QDRANT_URL")),
+        qdrant_url=os.getenv("QDRANT_URL"),
+        qdrant_api_key=os.getenv("QDRANT_API_KEY"),
+        llm_backend=os.getenv("LLM_BACKEND", "groq"),
+        semantic_cache_threshold=None,
+        faq_db=faq_db
+    )
+
+
+def drop_stale_answers(store: QdrantVectorStoreManager, batch_size: int = 256) -> int:
+    """
+    Drop answers built on chunks that are no longer in the collection, e.g. deleted
+    by an indexing run that was not configured with this FAQ store.
+    """
+    referenced = store.faq_store.referenced_points()
+    point_ids = sorted({point_id for ids in referenced.values() for point_id in ids})
+    present = set()
+    for i in range(0, len(point_ids), batch_size):
+        points = store.client.retrieve(collection_name=store.collection_name, ids=point_ids[i:i + batch_size],
+                                       with_payload=False, with_vectors=False)
+        present.update(str(point.id) for point in points)
+    stale = [entry for entry, ids in referenced.items() if not set(ids) <= present]
+    return store.faq_store.invalidate_entries(stale)
+
+
+def warm_up_faq(store: QdrantVectorStoreManager, questions: List[str], n_results: int = 6,
+                batch_size: int = 16, workers: int = 4, refresh: bool = False) -> Dict:
+    """
+    Answer and store the questions that have no stored answer yet (all of them with refresh).
+    Retrieval is batched; LLM calls of a batch run on `workers` threads.
+    """
+    stats = {'questions': len(questions), 'already_stored': 0, 'stored': 0, 'failed': 0}
+    pending: List[Tuple[str, str]] = []
+    for question, language in zip(questions, detect_languages(questions)):
+        if not refresh and store.faq_store.contains(question, language):
+            stats['already_stored'] += 1
+        else:
+            pending.append((question, language))
+
+    def answer(question: str, language: str, sources: List[Dict], search_seconds: float):
+        start_time = time.time()
+        generation_stats: Dict = {}
+        # Same prompt as generate_response; the stream reports LLM errors instead of returning them as text
+        text = "".join(store.generate_response_stream(question, sources, language=language, stats=generation_stats))
+        if generation_stats.get('error'):
+            return question, None
+        store.faq_store.put(question, text, sources, language, latency=search_seconds + time.time() - start_time)
+        return question, text
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            search_start = time.time()
+            results = store.search_batch([question for question, _ in batch], n_results=n_results)
+            search_seconds = (time.time() - search_start) / len(batch)
+
+            jobs = [pool.submit(answer, question, language, sources, search_seconds)
+                    for (question, language), sources in zip(batch, results)]
+            for job in jobs:
+                question, text = job.result()
+                if text is None:
+                    stats['failed'] += 1
+                    print(f"  ✗ {question}")
+                else:
+                    stats['stored'] += 1
+                    print(f"  ✓ {question}")
+
+    stats['seconds'] = round(time.time() - start_time, 2)
+    return stats
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Precompute answers to hot questions into the FAQ store")
+    parser.add_argument("--questions", default=os.path.join(here, "hot_questions.txt"))
+    parser.add_argument("--faq-db", default="faq_store.db")
+    parser.add_argument("--n-results", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, default=16, help="Questions per search_batch call")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate answers that are already stored")
+    args = parser.parse_args()
+
+    store = create_store(args.faq_db)
+    print(f"Startup breakdown (s): {store.warm_up()}")
+    dropped = drop_stale_answers(store)
+    if dropped:
+        print(f"Dropped {dropped} answers whose source chunks changed")
+
+    questions = load_questions(args.questions)
+    print(f"Warming up {len(questions)} questions...")
+    stats = warm_up_faq(store, questions, args.n_results, args.batch_size, args.workers, args.refresh)
+    print(f"FAQ warm-up done: {stats}")
+    print(f"FAQ store: {store.get_faq_stats()['entries']}")
@@ -0,0 +1,140 @@
+"""
+Arabic / English language identification
+Most texts are decided by the share of Arabic-script letters among all letters,
+counted with numpy over the code points. Only texts with a mixed script ratio
+go to langdetect, seeded so the same text always gets the same answer.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from langdetect import DetectorFactory, detect as _langdetect
+except ImportError:  # Script ratio only
+    DetectorFactory = _langdetect = None
+
+SUPPORTED_LANGUAGES = ('ar', 'en')
+DEFAULT_LANGUAGE = 'en'
+
+# Arabic, Arabic Supplement, Arabic Extended-A, Presentation Forms-A/B
+ARABIC_RANGES = ((0x0600, 0x06FF), (0x0750, 0x077F), (0x08A0, 0x08FF), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF))
+# Basic Latin letters, Latin-1 Supplement and Latin Extended-A/B
+LATIN_RANGES = ((0x41, 0x5A), (0x61, 0x7A), (0xC0, 0x24F))
+
+
+def _in_ranges(code_points: np.ndarray, ranges) -> np.ndarray:
+    mask = np.zeros(code_points.shape, dtype=bool)
+    for low, high in ranges:
+        mask |= (code_points >= low) & (code_points <= high)
+    return mask
+
+
+def script_counts(texts: Sequence[str]) -> np.ndarray:
+    """(len(texts), 2) array of Arabic and Latin letter counts, in one pass over all texts"""
+    code_points = np.frombuffer("".join(texts).encode('utf-32-le'), dtype=np.uint32)
+    owner = np.repeat(np.arange(len(texts)), [len(text) for text in texts])
+    counts = np.zeros((len(texts), 2), dtype=np.int64)
+    counts[:, 0] = np.bincount(owner[_in_ranges(code_points, ARABIC_RANGES)], minlength=len(texts))
+    counts[:, 1] = np.bincount(owner[_in_ranges(code_points, LATIN_RANGES)], minlength=len(texts))
+    return counts
+
+
+class LanguageDetector:
+    """
+    Args:
+        arabic_above: Arabic share of letters above which a text is Arabic without a model
+        english_below: Arabic share below which a text is English without a model
+        cache_size: Entries of the LRU cache of per-text results (0 disables it)
+        seed: langdetect seed (its results are random otherwise)
+        use_model: Ask langdetect about texts between the two thresholds; when False
+                   (or langdetect is missing) the majority script decides
+    """
+
+    def __init__(self, arabic_above: float = 0.7, english_below: float = 0.3, cache_size: int = 4096,
+                 seed: int = 0, use_model: bool = True):
+        self.arabic_above = arabic_above
+        self.english_below = english_below
+        self.cache_size = cache_size
+        self.use_model = use_model and _langdetect is not None
+        if self.use_model:
+            DetectorFactory.seed = seed
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'texts': 0, 'cache_hits': 0, 'script': 0, 'model': 0, 'no_letters': 0}
+
+    def _from_ratio(self, text: str, arabic: int, latin: int) -> str:
+        letters = arabic + latin
+        if not letters:
+            self.stats['no_letters'] += 1
+            return DEFAULT_LANGUAGE
+        ratio = arabic / letters
+        if ratio >= self.arabic_above or ratio <= self.english_below:
+            self.stats['script'] += 1
+            return 'ar' if ratio >= self.arabic_above else 'en'
+
+        self.stats['model'] += 1
+        if self.use_model:
+            try:
+                lang = _langdetect(text)
+                if lang in SUPPORTED_LANGUAGES:
+                    return lang
+            except Exception:
+                pass
+        return 'ar' if ratio >= 0.5 else 'en'
+
+    def _cached(self, text: str) -> Optional[str]:
+        with self._lock:
+            lang = self._cache.get(text)
+            if lang is not None:
+                self._cache.move_to_end(text)
+                self.stats['cache_hits'] += 1
+            return lang
+
+    def _remember(self, text: str, lang: str):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[text] = lang
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def detect(self, text: str) -> str:
+        """'ar' or 'en'"""
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts: Sequence[str]) -> List[str]:
+        """Languages of many texts; script counts of all uncached texts are computed at once"""
+        self.stats['texts'] += len(texts)
+        results: List[Optional[str]] = [self._cached(text) for text in texts]
+        pending = [i for i, lang in enumerate(results) if lang is None]
+        if pending:
+            counts = script_counts([texts[i] for i in pending])
+            for i, (arabic, latin) in zip(pending, counts.tolist()):
+                results[i] = self._from_ratio(texts[i], arabic, latin)
+                self._remember(texts[i], results[i])
+        return results
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['cache_entries'] = len(self._cache)
+        decided = stats['script'] + stats['model']
+        stats['script_share'] = round(stats['script'] / decided, 4) if decided else 0.0
+        return stats
+
+
+default_detector = LanguageDetector()
+
+
+def detect_language(text: str) -> str:
+    """'ar' or 'en' using the shared detector"""
+    return default_detector.detect(text)
+
+
+def detect_languages(texts: Sequence[str]) -> List[str]:
+    """Batch version of detect_language"""
+    return default_detector.detect_batch(texts)
@@ -12,10 +12,21 @@ from dotenv import load_dotenv
 
 
 
-def web_scraping(max_pages: int=200, base_url: str=None,output_file_name: str=None):
-    # Create and run scraper
+def web_scraping(max_pages: int=200, base_url: str=None,output_file_name: str=None, indexer: DocumentIndexer=None,
+                 incremental: bool=False):
+    if incremental:
+        # Recrawl: conditional requests, only new / changed / removed pages go to the delta feed
+        scraper=TelecomEgyptScraper(max_pages=max_pages, base_url=base_url, output_file=output_file_name,
+                                    incremental=True)
+        scraper.crawl()
+        if indexer is not None:
+            indexer.apply_delta_feed(output_file_name)
+        return True
+
+    # Create and run scraper (pages are also indexed during the crawl when an indexer is given)
     if not os.path.exists(output_file_name):
-        scraper=TelecomEgyptScraper(max_pages=max_pages, base_url=base_url, output_file=output_file_name)
+        scraper=TelecomEgyptScraper(max_pages=max_pages, base_url=base_url, output_file=output_file_name,
+                                    indexer=indexer)
         data=scraper.crawl()
         if data is None:
             return False
@@ -44,10 +55,12 @@ def setup():
 
     indexer=DocumentIndexer(qdrant_DB)
 
-    #web_scraping(max_pages=500, base_url="https://te.eg",output_file_name="telecom_egypt_web_scraping.json")
-    _=indexer.index_scraped_data("final_data.json",chunk_size=512, overlap=128, batch_size=128)
+    #web_scraping(max_pages=500, base_url="https://te.eg",output_file_name="telecom_egypt_web_scraping.json", indexer=indexer)
+    #web_scraping(max_pages=500, base_url="https://te.eg",output_file_name="crawl_delta.jsonl", indexer=indexer, incremental=True)
+    _=indexer.index_scraped_data("final_data.json",chunk_size=128, overlap=32, batch_size=128)
     stats=qdrant_DB.get_collection_stats()
     print(stats)
+    print(f"Startup breakdown (s): {qdrant_DB.startup_report()}")
     
     return 
 
@@ -1 +1,2 @@
-from .vector_store_mange import QdrantVectorStoreManager
\ No newline at end of file
+from .vector_store_mange import QdrantVectorStoreManager
+from .async_vector_store import AsyncQdrantVectorStoreManager
@@ -0,0 +1,293 @@
+"""
+asyncio variant of the vector store manager
+Built on AsyncQdrantClient: Qdrant round-trips never block the event loop, batches
+are upserted concurrently, and asearch() overlaps query encoding with network I/O.
+Models, caches, reranking and point formatting are shared with QdrantVectorStoreManager.
+"""
+
+import asyncio
+import time
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.hybrid.fusion import reciprocal_rank_fusion
+
+from .vector_store_mange import QdrantVectorStoreManager
+from .tracing import tracer
+
+
+def _async_only(name: str, alternative: Optional[str] = None):
+    """Stand-in for an inherited synchronous method that would call AsyncQdrantClient without awaiting"""
+    def method(self, *args, **kwargs):
+        hint = f"use {alternative}()" if alternative else "use the a-prefixed async methods"
+        raise TypeError(f"{type(self).__name__}.{name}() is synchronous; {hint}")
+    method.__name__ = name
+    return method
+
+
+class AsyncQdrantVectorStoreManager(QdrantVectorStoreManager):
+    """
+    Async manager. Create it with `await AsyncQdrantVectorStoreManager.create(...)`
+    (or construct it and `await manager.ainit()`), use the a-prefixed methods, and
+    `await manager.aclose()` when done. The synchronous methods that talk to
+    Qdrant raise TypeError on this class.
+
+    Args (in addition to QdrantVectorStoreManager's):
+        pool_size: HTTP connections (or gRPC channels) kept open to Qdrant Cloud
+        prefer_grpc: Talk gRPC instead of REST to Qdrant Cloud
+        timeout: Request timeout in seconds
+        max_concurrent_upserts: Upsert batches in flight at once in aadd_documents()
+    """
+
+    def __init__(self, *args, pool_size: int = 8, prefer_grpc: bool = True, timeout: int = 30,
+                 max_concurrent_upserts: int = 4, **kwargs):
+        self.pool_size = pool_size
+        self.prefer_grpc = prefer_grpc
+        self.timeout = timeout
+        self.max_concurrent_upserts = max_concurrent_upserts
+        self._ready = False
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> "AsyncQdrantVectorStoreManager":
+        manager = cls(*args, **kwargs)
+        await manager.ainit()
+        return manager
+
+    def _create_client(self, use_cloud: bool, qdrant_url: Optional[str], qdrant_api_key: Optional[str],
+                       persist_directory: str) -> AsyncQdrantClient:
+        if use_cloud and qdrant_url:
+            print(f"Connecting to Qdrant Cloud (async, {'gRPC' if self.prefer_grpc else 'REST'}, "
+                  f"pool={self.pool_size}): {qdrant_url}")
+            return AsyncQdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+                prefer_grpc=self.prefer_grpc,
+                pool_size=self.pool_size,
+                timeout=self.timeout
+            )
+        print(f"Using local Qdrant storage (async): {persist_directory}")
+        return AsyncQdrantClient(path=persist_directory)
+
+    def _init_collection(self):
+        # Collection setup needs the event loop; it runs in ainit()
+        pass
+
+    # Synchronous Qdrant calls would hand back un-awaited coroutines
+    search = _async_only('search', 'asearch')
+    search_batch = _async_only('search_batch', 'asearch_many')
+    add_documents = _async_only('add_documents', 'aadd_documents')
+    add_documents_stream = _async_only('add_documents_stream', 'aadd_documents')
+    delete_points = _async_only('delete_points', 'adelete_points')
+    count = _async_only('count', 'acount')
+    get_point_index = _async_only('get_point_index')
+    get_collection_stats = _async_only('get_collection_stats')
+    delete_collection = _async_only('delete_collection')
+    reset_collection = _async_only('reset_collection')
+    migrate_collection = _async_only('migrate_collection')
+    answer = _async_only('answer')
+    answer_stream = _async_only('answer_stream')
+
+    async def ainit(self):
+        """Create or validate the collection (async counterpart of _init_collection)"""
+        if self._ready:
+            return
+        start_time = time.perf_counter()
+        if await self.client.collection_exists(self.collection_name):
+            info = await self.client.get_collection(self.collection_name)
+            vectors_config = info.config.params.vectors
+            sparse_vectors_config = info.config.params.sparse_vectors
+            has_dense = isinstance(vectors_config, dict) and 'dense' in vectors_config
+            has_sparse = sparse_vectors_config is not None and 'bm25' in sparse_vectors_config
+            if has_dense and self._vector_size is None:
+                self._vector_size = vectors_config['dense'].size
+            if not (has_dense and has_sparse):
+                print(f"Collection '{self.collection_name}' exists but has incompatible config. Recreating...")
+                await self._adrop_live_collection()
+                if self.faq_store is not None:
+                    self.faq_store.clear()
+                await self._acreate_collection()
+            elif not self.collection_layout.matches(info):
+                print(f"Collection '{self.collection_name}' was created with a different storage layout; "
+                      f"call migrate_collection() to apply the requested one")
+        else:
+            print(f"Creating new collection: {self.collection_name}")
+            await self._acreate_collection()
+
+        for field_name in ("source", "url", "filename", "file_hash"):
+            await self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema="keyword",
+            )
+        self.startup_times['collection_init'] = time.perf_counter() - start_time
+        self._ready = True
+
+    async def _adrop_live_collection(self):
+        """Delete the collection behind self.collection_name, and the alias if it is one"""
+        aliases = (await self.client.get_aliases()).aliases
+        target = next((alias.collection_name for alias in aliases if alias.alias_name == self.collection_name), None)
+        if target is None:
+            await self.client.delete_collection(self.collection_name)
+            return
+        await self.client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=self.collection_name))
+        ])
+        await self.client.delete_collection(target)
+
+    async def _acreate_collection(self):
+        layout = self.collection_layout
+        vector_size = await asyncio.to_thread(lambda: self.vector_size)
+        await self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config={"dense": layout.dense_vector_params(vector_size)},
+            sparse_vectors_config={"bm25": layout.sparse_vector_params()},
+            on_disk_payload=layout.on_disk_payload or None
+        )
+
+    async def aclose(self):
+        if self._embedding_cache is not None:
+            self._embedding_cache.close()
+        await self.client.close()
+
+    async def __aenter__(self):
+        await self.ainit()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    # ------------------------------------------------------------------ indexing
+
+    async def _encode_batch(self, texts: List[str]):
+        """Dense and BM25 encoding of one batch, both off the event loop and in parallel"""
+        return await asyncio.gather(
+            asyncio.to_thread(self._encode_dense, texts, "passage"),
+            asyncio.to_thread(self._sparse_embed, texts)
+        )
+
+    async def aadd_documents(self, documents: Iterable[Dict], batch_size: int = 32) -> Dict:
+        """
+        Embed and upsert documents. Encoding of the next batch overlaps the upserts of
+        earlier ones; at most `max_concurrent_upserts` upserts are in flight.
+        Returns {'batches', 'points', 'seconds'}.
+        """
+        await self.ainit()
+        start_time = time.perf_counter()
+        in_flight = set()
+        stats = {'batches': 0, 'points': 0}
+        iterator = iter(documents)
+
+        try:
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                dense, sparse = await self._encode_batch([doc['content'] for doc in batch])
+                points = self._build_points(batch, dense, sparse)
+
+                while len(in_flight) >= self.max_concurrent_upserts:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.create_task(
+                    self.client.upsert(collection_name=self.collection_name, points=points, wait=True)
+                ))
+                stats['batches'] += 1
+                stats['points'] += len(points)
+
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        if stats['points']:
+            self._on_collection_changed()
+        stats['seconds'] = round(time.perf_counter() - start_time, 3)
+        print(f"✓ Upserted {stats['points']} points in {stats['batches']} batches ({stats['seconds']}s)")
+        return stats
+
+    async def adelete_points(self, point_ids: List[str]) -> int:
+        if not point_ids:
+            return 0
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(point_ids)),
+            wait=True
+        )
+        self._on_collection_changed(deleted_ids=list(point_ids))
+        return len(point_ids)
+
+    async def acount(self) -> int:
+        return (await self.client.count(collection_name=self.collection_name, exact=True)).count
+
+    # ------------------------------------------------------------------ search
+
+    async def asearch(self,
+                      query: str,
+                      n_results: int = 5,
+                      filter_metadata: Optional[Dict] = None,
+                      use_reranker: bool = True) -> List[Dict]:
+        """
+        Hybrid search like search(), with the two retrieval legs run concurrently:
+        the BM25 query is sent while the dense query embedding is still being computed,
+        and the dense query follows as soon as it is ready. The legs are fused with
+        RRF (k=60) client-side, then reranked under the rerank policy.
+        """
+        await self.ainit()
+        with tracer.span("search", n_results=n_results, reranker=use_reranker):
+            start_time = time.perf_counter()
+            fetch_limit = self.rerank_policy.candidate_limit(n_results) if use_reranker else n_results
+            query_filter = self._build_filter(filter_metadata)
+
+            async def dense_leg():
+                with tracer.span("search.dense_encode"):
+                    dense = await asyncio.to_thread(self._encode_dense, [query], "query")
+                with tracer.span("search.qdrant_query", using="dense", limit=fetch_limit):
+                    response = await self.client.query_points(
+                        collection_name=self.collection_name,
+                        query=dense[0].tolist(),
+                        using="dense",
+                        query_filter=query_filter,
+                        search_params=self.collection_layout.search_params(),
+                        limit=fetch_limit,
+                        with_payload=True
+                    )
+                return response.points
+
+            async def sparse_leg():
+                with tracer.span("search.bm25_encode"):
+                    sparse = await asyncio.to_thread(self._sparse_embed, [query])
+                with tracer.span("search.qdrant_query", using="bm25", limit=fetch_limit):
+                    response = await self.client.query_points(
+                        collection_name=self.collection_name,
+                        query=self._to_sparse_vector(sparse[0]),
+                        using="bm25",
+                        query_filter=query_filter,
+                        limit=fetch_limit,
+                        with_payload=True
+                    )
+                return response.points
+
+            dense_points, sparse_points = await asyncio.gather(dense_leg(), sparse_leg())
+            fused = reciprocal_rank_fusion([dense_points, sparse_points], limit=fetch_limit, ranking_constant_k=60)
+            results = self._format_points(fused)
+
+            if use_reranker and results:
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                head, tail = self._apply_rerank_policy(results, n_results, elapsed_ms)
+                with tracer.span("search.rerank", pairs=len(head)):
+                    reranked = await asyncio.to_thread(self.rerank, query, head, len(head)) if head else []
+                results = self._merge_reranked(reranked, tail, n_results)
+
+            return results[:n_results]
+
+    async def asearch_many(self, queries: List[str], n_results: int = 5,
+                           filter_metadata: Optional[Dict] = None, use_reranker: bool = True) -> List[List[Dict]]:
+        """Run several asearch() calls concurrently over the shared connection pool"""
+        return list(await asyncio.gather(*(
+            self.asearch(query, n_results, filter_metadata, use_reranker) for query in queries
+        )))
@@ -0,0 +1,121 @@
+"""
+Storage layout options for the Qdrant collection
+Quantization, HNSW tuning, on-disk storage and vector datatype.
+"""
+
+from typing import Dict, Optional
+
+from qdrant_client import models
+
+
+class CollectionLayout:
+    """
+    How the 'dense' and 'bm25' vectors of a collection are stored and searched.
+    The defaults reproduce the original layout (float32, in-RAM, default HNSW,
+    no quantization).
+
+    Args:
+        quantization: None, 'scalar' (int8) or 'binary'
+        quantization_always_ram: Keep quantized vectors in RAM even when originals are on disk
+        rescore: Re-score quantized candidates with the original vectors
+        oversampling: Fetch oversampling * limit quantized candidates before rescoring
+        hnsw_m: HNSW graph degree (Qdrant default 16)
+        hnsw_ef_construct: HNSW build-time beam width (Qdrant default 100)
+        hnsw_ef: HNSW search-time beam width (None = Qdrant default)
+        on_disk_vectors: Store original dense vectors on disk (memmap)
+        on_disk_payload: Store payloads on disk
+        sparse_on_disk: Store the BM25 sparse index on disk
+        datatype: 'float32' or 'float16' storage for dense vectors
+    """
+
+    def __init__(self,
+                 quantization: Optional[str] = None,
+                 quantization_always_ram: bool = True,
+                 rescore: bool = True,
+                 oversampling: float = 2.0,
+                 hnsw_m: Optional[int] = None,
+                 hnsw_ef_construct: Optional[int] = None,
+                 hnsw_ef: Optional[int] = None,
+                 on_disk_vectors: bool = False,
+                 on_disk_payload: bool = False,
+                 sparse_on_disk: bool = False,
+                 datatype: str = "float32"):
+        if quantization not in (None, 'scalar', 'binary'):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        if datatype not in ('float32', 'float16'):
+            raise ValueError(f"Unsupported vector datatype: {datatype}")
+
+        self.quantization = quantization
+        self.quantization_always_ram = quantization_always_ram
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.sparse_on_disk = sparse_on_disk
+        self.datatype = datatype
+
+    def quantization_config(self):
+        if self.quantization == 'scalar':
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == 'binary':
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def dense_vector_params(self, size: int) -> models.VectorParams:
+        return models.VectorParams(
+            size=size,
+            distance=models.Distance.COSINE,
+            on_disk=self.on_disk_vectors or None,
+            datatype=models.Datatype.FLOAT16 if self.datatype == 'float16' else None,
+            hnsw_config=self.hnsw_config(),
+            quantization_config=self.quantization_config()
+        )
+
+    def sparse_vector_params(self) -> models.SparseVectorParams:
+        return models.SparseVectorParams(
+            index=models.SparseIndexParams(
+                on_disk=self.sparse_on_disk,
+            )
+        )
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Search parameters for the dense prefetch (None when defaults apply)"""
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        if quantization is None and self.hnsw_ef is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+    def matches(self, collection_info) -> bool:
+        """Whether an existing collection was created with this layout"""
+        dense = collection_info.config.params.vectors['dense']
+        quantization = dense.quantization_config or collection_info.config.quantization_config
+        stored_quantization = None
+        if isinstance(quantization, models.ScalarQuantization):
+            stored_quantization = 'scalar'
+        elif isinstance(quantization, models.BinaryQuantization):
+            stored_quantization = 'binary'
+        stored_datatype = 'float16' if dense.datatype == models.Datatype.FLOAT16 else 'float32'
+        return (stored_quantization == self.quantization
+                and bool(dense.on_disk) == self.on_disk_vectors
+                and stored_datatype == self.datatype)
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
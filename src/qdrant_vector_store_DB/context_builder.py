@@ -0,0 +1,202 @@
+"""
+Prompt context builder
+Turns retrieved chunks into the context block of the prompt under a token budget:
+adjacent chunks of the same page are merged (their sliding-window overlap is
+sent once), sentences already given by a higher-ranked chunk are dropped, and
+chunks are added in rank order until the budget is spent.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from data_chunking.text_chunker import get_tokenizer, DEFAULT_TOKENIZER
+
+SENTENCE_END = re.compile(r'(?<=[.!?؟۔…])\s+|\n+')
+SENTENCE_SPLIT = re.compile(f"({SENTENCE_END.pattern})")  # Also returns the separators
+NORMALIZE = re.compile(r'[^\w]+')
+
+
+def _source_of(doc: Dict) -> str:
+    metadata = doc.get('metadata', {})
+    return metadata.get('url', metadata.get('filename', 'Unknown'))
+
+
+def _merge_overlap(first: str, second: str, min_overlap: int = 20) -> str:
+    """first + second, sending the text they share (first's tail = second's head) once"""
+    probe = second[:min_overlap]
+    if len(probe) < min_overlap:
+        return f"{first} {second}"
+    pos = first.find(probe, max(0, len(first) - len(second)))
+    while pos != -1:
+        if second.startswith(first[pos:]):
+            return first[:pos] + second
+        pos = first.find(probe, pos + 1)
+    return f"{first} {second}"
+
+
+class ContextBuilder:
+    """
+    Args:
+        max_context_tokens: Budget of the context block (chunk text and source lines);
+                            None only merges and deduplicates
+        tokenizer_name: Hugging Face tokenizer the budget is counted in (default the
+                        e5 tokenizer the chunker already loads; pass the LLM's own
+                        tokenizer for exact counts)
+        merge_adjacent: Merge chunks of the same page whose chunk_index is consecutive
+        dedup_sentences: Drop sentences that an earlier (higher-ranked) chunk already contains
+        duplicate_fraction: Share of a sentence's word 5-grams already in the context
+                            from which it counts as repeated (scraped text has few
+                            sentence marks, so repeats rarely align with sentences)
+        min_sentence_words: Shorter sentences are never dropped as duplicates
+        min_partial_tokens: The chunk that overflows the budget is cut at a sentence
+                            boundary if at least this many tokens are left, skipped otherwise
+    """
+
+    def __init__(self,
+                 max_context_tokens: Optional[int] = 1500,
+                 tokenizer_name: Optional[str] = DEFAULT_TOKENIZER,
+                 merge_adjacent: bool = True,
+                 dedup_sentences: bool = True,
+                 duplicate_fraction: float = 0.8,
+                 min_sentence_words: int = 5,
+                 min_partial_tokens: int = 48):
+        self.max_context_tokens = max_context_tokens
+        self.tokenizer_name = tokenizer_name
+        self.merge_adjacent = merge_adjacent
+        self.dedup_sentences = dedup_sentences
+        self.duplicate_fraction = duplicate_fraction
+        self.min_sentence_words = min_sentence_words
+        self.min_partial_tokens = min_partial_tokens
+
+        self._lock = threading.Lock()
+        self._totals = {'requests': 0, 'tokens_in': 0, 'tokens_out': 0}
+
+    def count_tokens(self, text: str) -> int:
+        return len(get_tokenizer(self.tokenizer_name).offsets(text))
+
+    @staticmethod
+    def format_block(index: int, source: str, content: str) -> str:
+        return f"[Context {index}]\nSource: {source}\n{content}\n"
+
+    def _merge(self, context_docs: List[Dict]) -> List[Tuple[str, str, int]]:
+        """(source, text, number of chunks) per block, ordered by each block's best rank"""
+        blocks: List[List] = []   # [source, page key, first index, last index, text, chunks]
+        for doc in context_docs:
+            metadata = doc.get('metadata', {})
+            source = _source_of(doc)
+            page = (source, metadata.get('page_number'))
+            index = metadata.get('chunk_index')
+            if self.merge_adjacent and isinstance(index, int):
+                merged = False
+                for block in blocks:
+                    if block[1] != page or block[2] is None:
+                        continue
+                    if index == block[3] + 1:
+                        block[4] = _merge_overlap(block[4], doc['content'])
+                        block[3] = index
+                    elif index == block[2] - 1:
+                        block[4] = _merge_overlap(doc['content'], block[4])
+                        block[2] = index
+                    elif block[2] <= index <= block[3]:
+                        pass  # Already covered
+                    else:
+                        continue
+                    block[5] += 1
+                    merged = True
+                    break
+                if merged:
+                    continue
+            blocks.append([source, page, index, index, doc['content'], 1])
+        return [(block[0], block[4], block[5]) for block in blocks]
+
+    def _drop_repeated_sentences(self, text: str, seen: set) -> Tuple[str, int]:
+        """
+        Remove sentences mostly made of word 5-grams in `seen`, then add the kept ones to it.
+        Kept sentences keep their original separators, so line breaks, bullet lists and
+        tables are only changed where a sentence was dropped.
+        """
+        pieces = SENTENCE_SPLIT.split(text)
+        kept: List[str] = []   # sentence, separator, sentence, separator, ...
+        dropped = 0
+        for sentence, separator in zip(pieces[0::2], pieces[1::2] + [""]):
+            words = NORMALIZE.sub(' ', sentence.lower()).split()
+            if len(words) >= self.min_sentence_words:
+                shingles = {" ".join(words[i:i + 5]) for i in range(len(words) - 4)}
+                if len(shingles & seen) >= self.duplicate_fraction * len(shingles):
+                    dropped += 1
+                    # Keep the line break that ended the dropped sentence
+                    if kept and "\n" in separator and "\n" not in kept[-1]:
+                        kept[-1] = separator
+                    continue
+                seen |= shingles
+            kept += [sentence, separator]
+        return "".join(kept).strip(), dropped
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Longest run of whole sentences within max_tokens (falls back to a token cut)"""
+        offsets = get_tokenizer(self.tokenizer_name).offsets(text)
+        if len(offsets) <= max_tokens:
+            return text
+        limit = offsets[max_tokens - 1][1]
+        cut = max((m.start() for m in SENTENCE_END.finditer(text, 0, limit + 1)), default=0)
+        return text[:cut or limit].strip()
+
+    def build(self, context_docs: List[Dict]) -> Tuple[str, Dict]:
+        """
+        Context block for the prompt, plus stats: tokens of the unprocessed context
+        ('tokens_in') and of the result ('tokens_out'), merged chunks, dropped
+        sentences, and chunks left out or cut by the budget.
+        """
+        naive = "\n".join(self.format_block(i, _source_of(doc), doc['content'])
+                          for i, doc in enumerate(context_docs, 1))
+        stats = {'chunks': len(context_docs), 'tokens_in': self.count_tokens(naive), 'merged_chunks': 0,
+                 'dropped_sentences': 0, 'dropped_blocks': 0, 'truncated_blocks': 0}
+
+        parts: List[str] = []
+        used = 0
+        seen: set = set()
+        blocks = self._merge(context_docs)
+        for position, (source, text, n_chunks) in enumerate(blocks):
+            stats['merged_chunks'] += n_chunks - 1
+            if self.dedup_sentences:
+                text, dropped = self._drop_repeated_sentences(text, seen)
+                stats['dropped_sentences'] += dropped
+            if not text.strip():
+                continue
+
+            block = self.format_block(len(parts) + 1, source, text)
+            tokens = self.count_tokens(block)
+            if self.max_context_tokens is not None and used + tokens > self.max_context_tokens:
+                remaining = self.max_context_tokens - used - (tokens - self.count_tokens(text))
+                # Always keep at least part of the best-ranked block
+                text = self._truncate(text, remaining) if remaining >= self.min_partial_tokens or not parts else ""
+                text = text if remaining > 0 else ""
+                if text:
+                    block = self.format_block(len(parts) + 1, source, text)
+                    parts.append(block)
+                    used += self.count_tokens(block)
+                    stats['truncated_blocks'] += 1
+                    stats['dropped_blocks'] += len(blocks) - position - 1
+                else:
+                    stats['dropped_blocks'] += len(blocks) - position
+                break
+            parts.append(block)
+            used += tokens
+
+        context = "\n".join(parts)
+        stats['tokens_out'] = self.count_tokens(context)
+        stats['tokens_saved'] = stats['tokens_in'] - stats['tokens_out']
+        with self._lock:
+            self._totals['requests'] += 1
+            self._totals['tokens_in'] += stats['tokens_in']
+            self._totals['tokens_out'] += stats['tokens_out']
+        return context, stats
+
+    def stats(self) -> Dict:
+        """Prompt-context tokens before and after building, over all requests"""
+        with self._lock:
+            totals = dict(self._totals)
+        totals['tokens_saved'] = totals['tokens_in'] - totals['tokens_out']
+        totals['saved_fraction'] = round(totals['tokens_saved'] / totals['tokens_in'], 4) if totals['tokens_in'] else 0.0
+        return totals
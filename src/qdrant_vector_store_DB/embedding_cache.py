@@ -0,0 +1,309 @@
+"""
+Persistent, content-addressed embedding cache
+Vectors live in a memory-mapped array on disk, keyed by (model, E5 prefix, text hash)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache for one embedding model.
+
+    Layout of `<cache_dir>/<model>/`:
+        vectors.bin  memory-mapped (capacity, dim) float16/float32 matrix
+        keys.bin     memory-mapped (capacity, 16) uint8 matrix of blake2b-128 keys
+        ticks.bin    memory-mapped (capacity,) int64 last-access clock (0 = free slot)
+        meta.json    dim, dtype, capacity, used slots and the access clock
+
+    When the cache reaches `max_size_mb` the least recently used 10% of entries
+    are evicted. A directory is owned by one process at a time through an exclusive
+    flock on `<model>/lock`; other processes fall back to `<model>.1`, `<model>.2`, ...
+    Every read checks the slot's stored key, so a slot reused elsewhere is a miss.
+    Memory maps and metadata are flushed every `flush_every` new entries or
+    `flush_interval` seconds, and at close / interpreter exit.
+    """
+
+    INITIAL_CAPACITY = 1024
+    KEY_BYTES = 16
+    MAX_DIRECTORIES = 16
+
+    def __init__(self,
+                 cache_dir: str,
+                 model_name: str,
+                 dim: int,
+                 max_size_mb: int = 1024,
+                 dtype: str = "float16",
+                 flush_every: int = 256,
+                 flush_interval: float = 30.0):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock_file = None
+        self.directory = self._acquire_directory(
+            os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)))
+
+        item_bytes = dim * self.dtype.itemsize + self.KEY_BYTES + 8
+        self.max_items = max(1, (max_size_mb * 1024 * 1024) // item_bytes)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        self._load()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _acquire_directory(self, base: str) -> str:
+        """First of base, base.1, base.2, ... whose lock no other process holds"""
+        if fcntl is None:
+            os.makedirs(base, exist_ok=True)
+            return base
+        for n in range(self.MAX_DIRECTORIES):
+            directory = base if n == 0 else f"{base}.{n}"
+            os.makedirs(directory, exist_ok=True)
+            lock_file = open(os.path.join(directory, 'lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            if n > 0:
+                print(f"Embedding cache {base} is in use by another process, using {directory}")
+            self._lock_file = lock_file
+            return directory
+        raise RuntimeError(f"All {self.MAX_DIRECTORIES} embedding cache directories of {base} are in use")
+
+    def _open_arrays(self, capacity: int):
+        """(Re)open the memory maps, growing the backing files to `capacity` rows"""
+        specs = {
+            'vectors.bin': (self.dtype, (capacity, self.dim)),
+            'keys.bin': (np.dtype(np.uint8), (capacity, self.KEY_BYTES)),
+            'ticks.bin': (np.dtype(np.int64), (capacity,)),
+        }
+        arrays = {}
+        for name, (dtype, shape) in specs.items():
+            path = self._path(name)
+            nbytes = int(np.prod(shape)) * dtype.itemsize
+            with open(path, 'ab') as f:
+                if f.tell() < nbytes:
+                    f.truncate(nbytes)
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+        self._vectors = arrays['vectors.bin']
+        self._keys = arrays['keys.bin']
+        self._ticks = arrays['ticks.bin']
+        self.capacity = capacity
+
+    def _load(self):
+        meta = None
+        if os.path.exists(self._path('meta.json')):
+            try:
+                with open(self._path('meta.json'), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                meta = None
+
+        if not meta or meta.get('dim') != self.dim or meta.get('dtype') != self.dtype.name:
+            # Missing or incompatible cache: start from scratch
+            for name in ('vectors.bin', 'keys.bin', 'ticks.bin'):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            meta = {'capacity': min(self.INITIAL_CAPACITY, self.max_items), 'used': 0, 'clock': 0}
+
+        self._open_arrays(meta['capacity'])
+        self._used = meta['used']
+        self._clock = meta['clock']
+
+        # Rebuild the in-memory key -> slot index from the memory-mapped keys
+        self._slots: Dict[bytes, int] = {}
+        self._free: List[int] = []
+        for slot in range(self._used):
+            if self._ticks[slot] > 0:
+                self._slots[self._keys[slot].tobytes()] = slot
+            else:
+                self._free.append(slot)
+
+    def _save_meta(self):
+        meta = {
+            'model_name': self.model_name,
+            'dim': self.dim,
+            'dtype': self.dtype.name,
+            'capacity': self.capacity,
+            'used': self._used,
+            'clock': self._clock,
+        }
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _flush_locked(self):
+        self._vectors.flush()
+        self._keys.flush()
+        self._ticks.flush()
+        self._save_meta()
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Flush memory maps and index metadata to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush and release the directory lock (also run at interpreter exit)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            if self._lock_file is not None:
+                self._lock_file.close()  # Releases the flock
+                self._lock_file = None
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------------ slots
+
+    def _key(self, prefix: str, text: str) -> bytes:
+        payload = f"{self.model_name}\x00{prefix}\x00{text}".encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=self.KEY_BYTES).digest()
+
+    def _evict(self):
+        """Free the least recently used 10% of the occupied slots"""
+        n_evict = max(1, self._used // 10)
+        ticks = np.asarray(self._ticks[:self._used])
+        occupied = np.flatnonzero(ticks > 0)
+        if occupied.size == 0:
+            return
+        n_evict = min(n_evict, occupied.size)
+        victims = occupied[np.argpartition(ticks[occupied], n_evict - 1)[:n_evict]]
+        for slot in victims.tolist():
+            self._slots.pop(self._keys[slot].tobytes(), None)
+            self._ticks[slot] = 0
+            self._free.append(slot)
+        self.evictions += len(victims)
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._used >= self.capacity:
+            if self.capacity < self.max_items:
+                self._vectors.flush()
+                self._keys.flush()
+                self._ticks.flush()
+                self._open_arrays(min(self.capacity * 2, self.max_items))
+            else:
+                self._evict()
+                return self._free.pop()
+        slot = self._used
+        self._used += 1
+        return slot
+
+    # ------------------------------------------------------------------ public API
+
+    def get_or_encode(self,
+                      texts: List[str],
+                      prefix: str,
+                      encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return a (len(texts), dim) float32 matrix of embeddings.
+        Cached texts are read from disk, the rest are encoded in a single
+        `encode_fn` call (duplicates encoded once) and stored.
+        """
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = {}
+
+        with self._lock:
+            keys = [self._key(prefix, text) for text in texts]
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is not None and self._keys[slot].tobytes() != key:
+                    # The slot no longer holds this text: never serve another text's vector
+                    self._slots.pop(key, None)
+                    slot = None
+                if slot is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._clock += 1
+                self._ticks[slot] = self._clock
+                result[i] = self._vectors[slot]
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += sum(len(v) for v in missing.values())
+
+        if not missing:
+            return result
+
+        miss_keys = list(missing)
+        miss_texts = [texts[missing[key][0]] for key in miss_keys]
+        encoded = np.asarray(encode_fn(miss_texts), dtype=np.float32)
+
+        with self._lock:
+            for key, vector in zip(miss_keys, encoded):
+                for i in missing[key]:
+                    result[i] = vector
+                if key in self._slots:
+                    continue
+                slot = self._allocate()
+                self._clock += 1
+                # Mark the slot free while it is rewritten, so a crash leaves no half-written entry
+                self._ticks[slot] = 0
+                self._vectors[slot] = vector.astype(self.dtype)
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._ticks[slot] = self._clock
+                self._slots[key] = slot
+                self._dirty += 1
+
+            if self._dirty >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+        return result
+
+    def clear(self):
+        """Drop every cached embedding"""
+        with self._lock:
+            self._ticks[:] = 0
+            self._slots.clear()
+            self._free = []
+            self._used = 0
+        self.flush()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and storage usage"""
+        lookups = self.hits + self.misses
+        return {
+            'model_name': self.model_name,
+            'entries': len(self._slots),
+            'capacity': self.capacity,
+            'max_entries': self.max_items,
+            'size_mb': round(self.capacity * (self.dim * self.dtype.itemsize + self.KEY_BYTES + 8) / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,181 @@
+"""
+Precomputed answers to frequent questions
+Answers produced offline by faq_warmup.py are kept in SQLite together with the
+ids of the chunks they were generated from. A question is served from the store
+when it matches a stored one exactly or after normalization; an answer is dropped
+as soon as one of its chunks is deleted (changed chunks get new point ids).
+"""
+
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+ARABIC_DIACRITICS = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')  # Tashkeel, tatweel
+ARABIC_LETTER_FORMS = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ة': 'ه', 'ؤ': 'و', 'ئ': 'ي'})
+ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789')
+PUNCTUATION = re.compile(r'[^\w\s]|_')
+
+
+def normalize_question(text: str) -> str:
+    """
+    Lookup key of a question: case, Arabic diacritics and letter variants
+    (alef / yaa / taa marbuta forms), digit scripts, punctuation and spacing
+    are ignored, so "ما هي باقات الإنترنت؟" and "ما هى باقات الانترنت" match.
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = ARABIC_DIACRITICS.sub('', text).translate(ARABIC_LETTER_FORMS).translate(ARABIC_DIGITS)
+    return " ".join(PUNCTUATION.sub(' ', text).split())
+
+
+class FAQStore:
+    """
+    SQLite key-value store of precomputed answers, keyed by (language, normalized question).
+    The faq_chunks table maps every referenced point id to the answers built on it.
+    """
+
+    def __init__(self, db_path: str = "faq_store.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS faq (
+                    key TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    sources TEXT NOT NULL,
+                    latency REAL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (language, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS faq_chunks (
+                    point_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (point_id, language, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS faq_question ON faq (question)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def lookup(self, question: str, language: Optional[str] = None) -> Optional[Dict]:
+        """
+        Stored answer for the question (exact text first, then its normalized form),
+        or None. Returns a dict with 'answer', 'sources', 'question', 'language',
+        'point_ids' and 'match' ('exact' or 'normalized').
+        """
+        question = question.strip()
+        language_clause, params = ("AND language = ?", [language]) if language else ("", [])
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT * FROM faq WHERE question = ? {language_clause}", [question, *params]).fetchone()
+            match = 'exact'
+            if row is None:
+                row = conn.execute(f"SELECT * FROM faq WHERE key = ? {language_clause}",
+                                   [normalize_question(question), *params]).fetchone()
+                match = 'normalized'
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        sources = json.loads(row['sources'])
+        return {
+            'answer': row['answer'],
+            'sources': sources,
+            'question': row['question'],
+            'language': row['language'],
+            'point_ids': [source['point_id'] for source in sources if source.get('point_id')],
+            'latency': row['latency'],
+            'match': match,
+        }
+
+    def put(self, question: str, answer: str, sources: List[Dict], language: str, latency: Optional[float] = None):
+        """Store (or replace) the answer and the chunks it references"""
+        question = question.strip()
+        key = normalize_question(question)
+        point_ids = {source['point_id'] for source in sources if source.get('point_id')}
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM faq_chunks WHERE language = ? AND key = ?", (language, key))
+            conn.execute(
+                "INSERT OR REPLACE INTO faq (key, language, question, answer, sources, latency, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, language, question, answer, json.dumps(sources, ensure_ascii=False), latency, time.time())
+            )
+            conn.executemany("INSERT OR IGNORE INTO faq_chunks (point_id, language, key) VALUES (?, ?, ?)",
+                             [(point_id, language, key) for point_id in point_ids])
+
+    def contains(self, question: str, language: Optional[str] = None) -> bool:
+        with self._connect() as conn:
+            query, params = "SELECT 1 FROM faq WHERE key = ?", [normalize_question(question)]
+            if language:
+                query, params = query + " AND language = ?", params + [language]
+            return conn.execute(query, params).fetchone() is not None
+
+    def _delete_entries(self, conn: sqlite3.Connection, entries: List[tuple]):
+        conn.executemany("DELETE FROM faq WHERE language = ? AND key = ?", entries)
+        conn.executemany("DELETE FROM faq_chunks WHERE language = ? AND key = ?", entries)
+
+    def invalidate_points(self, point_ids: Iterable[str]) -> int:
+        """Drop every answer that references one of the point ids; returns the number dropped"""
+        point_ids = list(point_ids)
+        if not point_ids:
+            return 0
+        entries = set()
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(point_ids), 500):
+                batch = point_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT DISTINCT language, key FROM faq_chunks WHERE point_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                entries.update((row['language'], row['key']) for row in rows)
+            self._delete_entries(conn, list(entries))
+        self.invalidations += len(entries)
+        return len(entries)
+
+    def invalidate_entries(self, entries: Iterable[tuple]) -> int:
+        """Drop answers by (language, key), e.g. after finding one of their chunks missing"""
+        entries = list(entries)
+        with self._lock, self._connect() as conn:
+            self._delete_entries(conn, entries)
+        self.invalidations += len(entries)
+        return len(entries)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM faq")
+            conn.execute("DELETE FROM faq_chunks")
+
+    def referenced_points(self) -> Dict[tuple, List[str]]:
+        """(language, key) -> point ids, for checking answers against the collection"""
+        entries: Dict[tuple, List[str]] = {}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT point_id, language, key FROM faq_chunks"):
+                entries.setdefault((row['language'], row['key']), []).append(row['point_id'])
+        return entries
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT language, COUNT(*) AS n FROM faq GROUP BY language").fetchall()
+        lookups = self.hits + self.misses
+        return {
+            'entries': {row['language']: row['n'] for row in entries},
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,235 @@
+"""
+CPU inference backends for the dense embedding model and the cross-encoder reranker
+
+    torch      sentence-transformers on PyTorch (default)
+    onnx       ONNX Runtime, fp32
+    onnx-int8  ONNX Runtime with dynamic int8 quantization
+
+ONNX exports are written once under `onnx_dir` and reused on later runs.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+# Dynamic quantization kernel set, see sentence_transformers.export_dynamic_quantized_onnx_model
+QUANTIZATION_CONFIG = "avx2"
+
+
+def _check_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {BACKENDS})")
+
+
+def _export_dir(onnx_dir: str, model_name: str) -> str:
+    return os.path.join(onnx_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+
+
+def _find_onnx_file(export_dir: str, file_name: str) -> Optional[str]:
+    """Path of an exported ONNX file relative to export_dir (saved at the root or under onnx/)"""
+    for relative in (file_name, os.path.join("onnx", file_name)):
+        if os.path.exists(os.path.join(export_dir, relative)):
+            return relative
+    return None
+
+
+def _session_options(num_threads: Optional[int]):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+    return options
+
+
+def set_torch_threads(num_threads: Optional[int]):
+    """Limit PyTorch intra-op CPU threads (no-op when num_threads is None)"""
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+
+
+def load_dense_encoder(model_name: str,
+                       backend: str = 'torch',
+                       device: str = 'cpu',
+                       num_threads: Optional[int] = None,
+                       onnx_dir: str = "onnx_models"):
+    """Load a SentenceTransformer on the requested backend"""
+    _check_backend(backend)
+    from sentence_transformers import SentenceTransformer
+
+    if backend == 'torch':
+        set_torch_threads(num_threads)
+        return SentenceTransformer(model_name, device=device)
+
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": _session_options(num_threads)}
+    export_dir = _export_dir(onnx_dir, model_name)
+    fp32_file = _find_onnx_file(export_dir, "model.onnx")
+    if fp32_file is None:
+        print(f"Exporting {model_name} to ONNX: {export_dir}")
+        SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs).save(export_dir)
+        fp32_file = _find_onnx_file(export_dir, "model.onnx")
+
+    if backend == 'onnx':
+        return SentenceTransformer(export_dir, backend="onnx", model_kwargs={**model_kwargs, "file_name": fp32_file})
+
+    quantized_name = f"model_qint8_{QUANTIZATION_CONFIG}.onnx"
+    quantized_file = _find_onnx_file(export_dir, quantized_name)
+    if quantized_file is None:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        print(f"Quantizing {model_name} to int8 ({QUANTIZATION_CONFIG})")
+        fp32_model = SentenceTransformer(export_dir, backend="onnx", model_kwargs={**model_kwargs, "file_name": fp32_file})
+        export_dynamic_quantized_onnx_model(fp32_model, QUANTIZATION_CONFIG, export_dir)
+        quantized_file = _find_onnx_file(export_dir, quantized_name)
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={**model_kwargs, "file_name": quantized_file})
+
+
+class OnnxCrossEncoder:
+    """
+    ONNX Runtime cross-encoder with the same predict() contract as
+    sentence_transformers.CrossEncoder: one score per pair when the model has
+    a single label (sigmoid applied), raw logits per pair otherwise.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, num_threads: Optional[int] = None,
+                 onnx_dir: str = "onnx_models", max_length: int = 512):
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+
+        export_dir = _export_dir(onnx_dir, model_name)
+        session_options = _session_options(num_threads)
+
+        if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+            print(f"Exporting {model_name} to ONNX: {export_dir}")
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+        file_name = "model.onnx"
+        if quantize:
+            file_name = "model_quantized.onnx"
+            if not os.path.exists(os.path.join(export_dir, file_name)):
+                from optimum.onnxruntime import ORTQuantizer
+                from optimum.onnxruntime.configuration import AutoQuantizationConfig
+                print(f"Quantizing {model_name} to int8 ({QUANTIZATION_CONFIG})")
+                quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+                qconfig = getattr(AutoQuantizationConfig, QUANTIZATION_CONFIG)(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+
+        self.model = ORTModelForSequenceClassification.from_pretrained(
+            export_dir, file_name=file_name, session_options=session_options, provider="CPUExecutionProvider"
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.num_labels = self.model.config.num_labels
+        self.max_length = max_length
+
+    def predict(self, pairs: List[List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = []
+        for i in range(0, len(pairs), batch_size):
+            batch = pairs[i:i + batch_size]
+            features = self.tokenizer(
+                [p[0] for p in batch], [p[1] for p in batch],
+                padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+            )
+            logits = np.asarray(self.model(**features).logits, dtype=np.float32)
+            scores.append(logits)
+        logits = np.concatenate(scores) if scores else np.empty((0, self.num_labels), dtype=np.float32)
+        if self.num_labels == 1:
+            return 1.0 / (1.0 + np.exp(-logits[:, 0]))
+        return logits
+
+
+def load_reranker(model_name: str,
+                  backend: str = 'torch',
+                  device: str = 'cpu',
+                  num_threads: Optional[int] = None,
+                  onnx_dir: str = "onnx_models"):
+    """Load a cross-encoder reranker on the requested backend"""
+    _check_backend(backend)
+    if backend == 'torch':
+        from sentence_transformers import CrossEncoder
+        set_torch_threads(num_threads)
+        return CrossEncoder(model_name, device=device)
+    return OnnxCrossEncoder(model_name, quantize=(backend == 'onnx-int8'), num_threads=num_threads, onnx_dir=onnx_dir)
+
+
+# ---------------------------------------------------------------------- parity check
+
+def relevance_scores(scores) -> np.ndarray:
+    """
+    Reduce cross-encoder output to one relevance score per pair: single-label models
+    already return one score; two-label models return logits, of which the
+    probability of the last ("relevant") class is used.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    if scores.ndim == 2:
+        if scores.shape[1] == 1:
+            return scores[:, 0]
+        exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return (exp / exp.sum(axis=1, keepdims=True))[:, -1]
+    return scores
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 1.0
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    if rank_a.std() == 0 or rank_b.std() == 0:
+        return 1.0
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def check_dense_parity(reference, candidate, queries: List[str], passages: List[str], top_k: int = 5) -> Dict:
+    """
+    Compare a candidate dense encoder against the reference (PyTorch) one.
+
+    Reports the cosine similarity between the two models' embeddings of the same
+    texts, and how well the candidate preserves each query's passage ranking
+    (top-k overlap and Spearman correlation).
+    """
+    def encode(model, texts, prefix):
+        return np.asarray(model.encode([f"{prefix}: {t}" for t in texts], normalize_embeddings=True), dtype=np.float32)
+
+    ref_p, cand_p = encode(reference, passages, "passage"), encode(candidate, passages, "passage")
+    ref_q, cand_q = encode(reference, queries, "query"), encode(candidate, queries, "query")
+
+    cosines = np.concatenate([(ref_p * cand_p).sum(axis=1), (ref_q * cand_q).sum(axis=1)])
+    ref_sim, cand_sim = ref_q @ ref_p.T, cand_q @ cand_p.T
+
+    k = min(top_k, len(passages))
+    overlaps, spearmans = [], []
+    for r, c in zip(ref_sim, cand_sim):
+        ref_top = set(np.argsort(-r)[:k].tolist())
+        cand_top = set(np.argsort(-c)[:k].tolist())
+        overlaps.append(len(ref_top & cand_top) / k if k else 1.0)
+        spearmans.append(_spearman(r, c))
+
+    return {
+        'cosine_mean': float(cosines.mean()),
+        'cosine_min': float(cosines.min()),
+        f'top{k}_overlap': float(np.mean(overlaps)),
+        'spearman_mean': float(np.mean(spearmans)),
+    }
+
+
+def check_reranker_parity(reference, candidate, queries: List[str], passages: List[str]) -> Dict:
+    """
+    Compare a candidate reranker against the reference one on every (query, passage) pair:
+    score correlation plus per-query Spearman correlation and top-1 agreement.
+    """
+    pairs = [[q, p] for q in queries for p in passages]
+    ref = relevance_scores(reference.predict(pairs)).reshape(len(queries), len(passages))
+    cand = relevance_scores(candidate.predict(pairs)).reshape(len(queries), len(passages))
+
+    return {
+        'score_correlation': float(np.corrcoef(ref.ravel(), cand.ravel())[0, 1]) if ref.size > 1 else 1.0,
+        'max_abs_score_diff': float(np.abs(ref - cand).max()) if ref.size else 0.0,
+        'spearman_mean': float(np.mean([_spearman(r, c) for r, c in zip(ref, cand)])),
+        'top1_agreement': float(np.mean(ref.argmax(axis=1) == cand.argmax(axis=1))),
+    }
@@ -0,0 +1,222 @@
+"""
+Streaming producer/consumer ingestion pipeline
+Chunking, dense encoding, BM25 encoding and Qdrant upsert run as concurrent
+stages connected by bounded queues, so the CPU encodes the next batch while
+the previous one is being uploaded.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .tracing import tracer
+
+
+_END = object()
+
+
+class StageStats:
+    """Counters for a single pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy_seconds = 0.0   # time spent doing the stage's own work
+        self.wait_seconds = 0.0   # time blocked on the input queue (starved) or output queue (backpressure)
+
+    def as_dict(self) -> Dict:
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'wait_seconds': round(self.wait_seconds, 3),
+            'items_per_second': round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """
+    Four-stage ingestion pipeline:
+
+        chunk -> dense encode -> BM25 encode -> upsert
+
+    Each stage runs in its own thread. Stages are connected by queues of at most
+    `max_queue_size` batches, which bounds memory and applies backpressure to the
+    producer when Qdrant or the encoder falls behind.
+
+    Args:
+        manager: QdrantVectorStoreManager providing the models and the client
+        batch_size: Number of documents per encode/upsert batch
+        max_queue_size: Maximum number of batches waiting between two stages
+        chunker: Optional callable turning one input record into a list of documents
+                 (dicts with 'id', 'content', 'metadata' and optionally 'point_id').
+                 When omitted, input records are already documents.
+    """
+
+    STAGES = ('chunk', 'dense', 'sparse', 'upsert')
+
+    def __init__(self,
+                 manager,
+                 batch_size: int = 32,
+                 max_queue_size: int = 4,
+                 chunker: Optional[Callable[[Dict], List[Dict]]] = None):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.max_queue_size = max(1, max_queue_size)
+        self.chunker = chunker
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+        # Span the per-batch stage spans are attached to (stages run in their own threads)
+        self._trace_parent = None
+
+    # ------------------------------------------------------------------ queue helpers
+
+    def _put(self, q: queue.Queue, item, stats: StageStats):
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.wait_seconds += time.perf_counter() - start
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                stats.wait_seconds += time.perf_counter() - start
+                return item
+            except queue.Empty:
+                continue
+        stats.wait_seconds += time.perf_counter() - start
+        return _END
+
+    def _run_stage(self, target: Callable, *args):
+        try:
+            target(*args)
+        except BaseException as e:
+            self._errors.append(e)
+            self._abort.set()
+
+    # ------------------------------------------------------------------ stages
+
+    def _chunk_stage(self, records: Iterable[Dict], out_q: queue.Queue):
+        stats = self.stats['chunk']
+        batch: List[Dict] = []
+        iterator = iter(records)
+        while not self._abort.is_set():
+            start = time.perf_counter()
+            try:
+                record = next(iterator)
+            except StopIteration:
+                stats.busy_seconds += time.perf_counter() - start
+                break
+            documents = self.chunker(record) if self.chunker else [record]
+            stats.busy_seconds += time.perf_counter() - start
+
+            for doc in documents:
+                batch.append(doc)
+                stats.items += 1
+                if len(batch) >= self.batch_size:
+                    stats.batches += 1
+                    self._put(out_q, batch, stats)
+                    batch = []
+        if batch:
+            stats.batches += 1
+            self._put(out_q, batch, stats)
+        self._put(out_q, _END, stats)
+
+    def _dense_stage(self, in_q: queue.Queue, out_q: queue.Queue):
+        stats = self.stats['dense']
+        while True:
+            batch = self._get(in_q, stats)
+            if batch is _END:
+                break
+            start = time.perf_counter()
+            dense = self.manager._encode_dense([doc['content'] for doc in batch], prefix="passage")
+            elapsed = time.perf_counter() - start
+            stats.busy_seconds += elapsed
+            tracer.record("ingest.dense_encode", elapsed, parent=self._trace_parent, documents=len(batch))
+            stats.items += len(batch)
+            stats.batches += 1
+            self._put(out_q, (batch, dense), stats)
+        self._put(out_q, _END, stats)
+
+    def _sparse_stage(self, in_q: queue.Queue, out_q: queue.Queue):
+        stats = self.stats['sparse']
+        while True:
+            item = self._get(in_q, stats)
+            if item is _END:
+                break
+            batch, dense = item
+            start = time.perf_counter()
+            sparse = self.manager._sparse_embed([doc['content'] for doc in batch])
+            elapsed = time.perf_counter() - start
+            stats.busy_seconds += elapsed
+            tracer.record("ingest.bm25_encode", elapsed, parent=self._trace_parent, documents=len(batch))
+            stats.items += len(batch)
+            stats.batches += 1
+            self._put(out_q, (batch, dense, sparse), stats)
+        self._put(out_q, _END, stats)
+
+    def _upsert_stage(self, in_q: queue.Queue):
+        stats = self.stats['upsert']
+        while True:
+            item = self._get(in_q, stats)
+            if item is _END:
+                break
+            batch, dense, sparse = item
+            start = time.perf_counter()
+            points = self.manager._build_points(batch, dense, sparse)
+            self.manager.client.upsert(
+                collection_name=self.manager.collection_name,
+                points=points
+            )
+            elapsed = time.perf_counter() - start
+            stats.busy_seconds += elapsed
+            tracer.record("ingest.upsert", elapsed, parent=self._trace_parent, documents=len(batch))
+            stats.items += len(batch)
+            stats.batches += 1
+            print(f"Added batch {stats.batches} ({stats.items} documents so far)")
+
+    # ------------------------------------------------------------------ entry point
+
+    def run(self, records: Iterable[Dict]) -> Dict[str, Dict]:
+        """
+        Stream `records` (a list or any generator) through the pipeline.
+        Returns per-stage stats; re-raises the first stage error, if any.
+        """
+        to_dense = queue.Queue(maxsize=self.max_queue_size)
+        to_sparse = queue.Queue(maxsize=self.max_queue_size)
+        to_upsert = queue.Queue(maxsize=self.max_queue_size)
+        self._trace_parent = tracer.current_span()
+
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._chunk_stage, records, to_dense), name="ingest-chunk"),
+            threading.Thread(target=self._run_stage, args=(self._dense_stage, to_dense, to_sparse), name="ingest-dense"),
+            threading.Thread(target=self._run_stage, args=(self._sparse_stage, to_sparse, to_upsert), name="ingest-sparse"),
+            threading.Thread(target=self._run_stage, args=(self._upsert_stage, to_upsert), name="ingest-upsert"),
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+
+        result = {name: stage.as_dict() for name, stage in self.stats.items()}
+        result['total'] = {
+            'documents': self.stats['upsert'].items,
+            'seconds': round(elapsed, 3),
+            'documents_per_second': round(self.stats['upsert'].items / elapsed, 2) if elapsed else 0.0,
+        }
+        return result
@@ -0,0 +1,89 @@
+"""
+LLM backends used by QdrantVectorStoreManager for answer generation
+Every backend exposes complete() for a full answer and stream() for token streaming.
+"""
+
+import re
+import time
+from typing import Dict, Iterator, List
+
+from groq import Groq
+
+
+class GroqBackend:
+    """Llama 3 70B served by the Groq API"""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile"):
+        self.client = Groq(api_key=api_key)
+        self.model = model
+
+    def complete(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000) -> str:
+        chat_completion = self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,  # Llama 3 70B with 8K context
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=1,
+            stream=False
+        )
+        return chat_completion.choices[0].message.content
+
+    def stream(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000) -> Iterator[str]:
+        chunks = self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=1,
+            stream=True
+        )
+        for chunk in chunks:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+class LocalLLMBackend:
+    """
+    Offline stand-in for the Groq backend, for tests and local development.
+    It answers extractively with the first sentences of the retrieved context
+    and streams the answer word by word, with optional simulated latency.
+
+    Args:
+        first_token_delay: Seconds to wait before the first token
+        token_delay: Seconds to wait between tokens
+    """
+
+    name = "local"
+
+    def __init__(self, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    def _answer(self, messages: List[Dict], max_tokens: int) -> str:
+        user_prompt = messages[-1]['content'] if messages else ''
+        # Context blocks look like "[Context i]\nSource: ...\n<text>"
+        passages = re.findall(r'\[Context \d+\]\nSource: (.*)\n(.*)', user_prompt)
+        if not passages:
+            return "I could not find the answer in the provided context."
+
+        source, text = passages[0]
+        sentences = re.split(r'(?<=[.!?؟])\s+', text.strip())
+        answer = " ".join(sentences[:2])
+        words = answer.split()[:max_tokens]
+        return " ".join(words) + f"\n\nSource: {source}"
+
+    def complete(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000) -> str:
+        return "".join(self.stream(messages, temperature, max_tokens))
+
+    def stream(self, messages: List[Dict], temperature: float = 0.3, max_tokens: int = 1000) -> Iterator[str]:
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for i, token in enumerate(re.findall(r'\S+\s*', self._answer(messages, max_tokens))):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
@@ -0,0 +1,61 @@
+"""
+Process-wide model registry
+Models are loaded lazily on first use, exactly once per process, and shared
+by every QdrantVectorStoreManager instance (eval scripts, Streamlit sessions, ...).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable
+
+
+class ModelRegistry:
+    """
+    Thread-safe lazy cache of loaded models keyed by e.g. ('dense', model_name, device).
+    Concurrent first requests for the same key wait for a single load.
+    """
+
+    def __init__(self):
+        self._models: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.load_times: Dict[Hashable, float] = {}
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the model for `key`, calling `loader()` the first time it is requested"""
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key not in self._models:
+                start_time = time.perf_counter()
+                self._models[key] = loader()
+                self.load_times[key] = time.perf_counter() - start_time
+                print(f"Loaded {key[0] if isinstance(key, tuple) else key} in {self.load_times[key]:.2f}s")
+        return self._models[key]
+
+    def is_loaded(self, key: Hashable) -> bool:
+        return key in self._models
+
+    def clear(self):
+        """Forget every loaded model (they are freed once no manager references them)"""
+        with self._lock:
+            self._models.clear()
+            self._key_locks.clear()
+            self.load_times.clear()
+
+
+# Shared by every manager in the process
+model_registry = ModelRegistry()
+
+
+def get_device() -> str:
+    """'cuda' if available, else 'cpu' (torch is imported on first call only)"""
+    def detect():
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    return model_registry.get(('device',), detect)
@@ -0,0 +1,131 @@
+"""
+Adaptive reranking policy
+Decides per query how many hybrid candidates to fetch and how many of them the
+cross-encoder scores, trading rerank latency for quality.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class RerankPolicy:
+    """
+    Rerank paths (counted in stats()):
+        full              every candidate is reranked
+        truncated_margin  RRF margin is clear: only the top `truncate_depth` candidates are reranked
+        skipped_margin    RRF margin is decisive: RRF order is kept, no reranking
+        budget_truncated  latency budget only allows reranking the top candidates
+        budget_fallback   latency budget exhausted: RRF order is kept
+
+    The RRF margin is (s1 - s2) / s1 over the two best fused scores. It measures
+    rank agreement between the dense and BM25 legs, not relevance: with k=60 a
+    top hit that is dense #1 but only BM25 #10 (1/61 + 1/70) against a runner-up
+    that is BM25 #1 alone (1/61) already gives ~0.47, i.e. a large margin exactly
+    when the legs disagree. The margin paths are therefore off by default (every
+    candidate is reranked); only enable a threshold that the margin sweep of
+    evaluation/benchmark_retrieval.py shows to cost no quality on your data.
+
+    Args:
+        candidate_multiplier: Fetch n_results * multiplier hybrid candidates for reranking
+        max_candidates: Upper bound on fetched candidates (None = no bound)
+        skip_margin: Margin at or above which reranking is skipped (None, the default, disables)
+        truncate_margin: Margin at or above which only the head is reranked (None, the default, disables)
+        truncate_depth: Candidates reranked on the truncated path (default n_results + 2)
+        doc_token_budget: Documents are cut to this many reranker tokens before scoring
+        latency_budget_ms: Per-query budget for retrieval + reranking (None disables)
+    """
+
+    PATHS = ('full', 'truncated_margin', 'skipped_margin', 'budget_truncated', 'budget_fallback')
+
+    def __init__(self,
+                 candidate_multiplier: float = 2,
+                 max_candidates: Optional[int] = None,
+                 skip_margin: Optional[float] = None,
+                 truncate_margin: Optional[float] = None,
+                 truncate_depth: Optional[int] = None,
+                 doc_token_budget: Optional[int] = 256,
+                 latency_budget_ms: Optional[float] = None):
+        self.candidate_multiplier = candidate_multiplier
+        self.max_candidates = max_candidates
+        self.skip_margin = skip_margin
+        self.truncate_margin = truncate_margin
+        self.truncate_depth = truncate_depth
+        self.doc_token_budget = doc_token_budget
+        self.latency_budget_ms = latency_budget_ms
+
+        self._lock = threading.Lock()
+        self.path_counts = {path: 0 for path in self.PATHS}
+        # Exponentially weighted cost of scoring one (query, document) pair
+        self.ms_per_pair: Optional[float] = None
+
+    def candidate_limit(self, n_results: int) -> int:
+        """Number of hybrid candidates to fetch when reranking"""
+        limit = max(n_results, int(round(n_results * self.candidate_multiplier)))
+        if self.max_candidates:
+            limit = min(limit, max(self.max_candidates, n_results))
+        return limit
+
+    @staticmethod
+    def rrf_margin(results: List[Dict]) -> float:
+        if len(results) < 2 or not results[0].get('score'):
+            return 1.0 if len(results) == 1 else 0.0
+        s1, s2 = results[0]['score'], results[1]['score']
+        return (s1 - s2) / s1
+
+    def plan(self, results: List[Dict], n_results: int, elapsed_ms: float = 0.0) -> Tuple[str, int]:
+        """
+        Choose the rerank path for one query's RRF-ordered candidates.
+        Returns (path, number of leading candidates to rerank; 0 = keep RRF order).
+        """
+        margin = self.rrf_margin(results)
+        depth = len(results)
+        path = 'full'
+
+        if self.skip_margin is not None and margin >= self.skip_margin:
+            path, depth = 'skipped_margin', 0
+        elif self.truncate_margin is not None and margin >= self.truncate_margin:
+            path = 'truncated_margin'
+            depth = min(depth, max(self.truncate_depth or n_results + 2, n_results))
+
+        if depth and self.latency_budget_ms is not None and self.ms_per_pair:
+            remaining_ms = self.latency_budget_ms - elapsed_ms
+            affordable = int(remaining_ms // self.ms_per_pair) if remaining_ms > 0 else 0
+            if affordable < min(n_results, depth):
+                path, depth = 'budget_fallback', 0
+            elif affordable < depth:
+                path, depth = 'budget_truncated', affordable
+
+        with self._lock:
+            self.path_counts[path] += 1
+        return path, depth
+
+    def observe(self, n_pairs: int, seconds: float, alpha: float = 0.2):
+        """Update the per-pair cost estimate after a cross-encoder call"""
+        if n_pairs <= 0:
+            return
+        ms = seconds * 1000 / n_pairs
+        with self._lock:
+            self.ms_per_pair = ms if self.ms_per_pair is None else (1 - alpha) * self.ms_per_pair + alpha * ms
+
+    def truncate_document(self, text: str, tokenizer=None) -> str:
+        """Cut a document to `doc_token_budget` reranker tokens (words without a fast tokenizer)"""
+        if not self.doc_token_budget:
+            return text
+        if tokenizer is not None and getattr(tokenizer, 'is_fast', False):
+            encoding = tokenizer(text, add_special_tokens=False, truncation=True,
+                                 max_length=self.doc_token_budget, return_offsets_mapping=True)
+            offsets = encoding['offset_mapping']
+            if len(offsets) < self.doc_token_budget:
+                return text
+            return text[:offsets[-1][1]]
+        words = text.split()
+        return text if len(words) <= self.doc_token_budget else " ".join(words[:self.doc_token_budget])
+
+    def stats(self) -> Dict:
+        total = sum(self.path_counts.values())
+        return {
+            'queries': total,
+            'paths': dict(self.path_counts),
+            'path_rates': {path: (count / total if total else 0.0) for path, count in self.path_counts.items()},
+            'ms_per_pair': round(self.ms_per_pair, 3) if self.ms_per_pair is not None else None,
+        }
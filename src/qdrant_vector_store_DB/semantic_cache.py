@@ -0,0 +1,148 @@
+"""
+Semantic response cache
+Serves answers to questions whose query embedding is close enough to a
+previously answered one, skipping retrieval, reranking and the LLM call.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+NUMBER = re.compile(r'\d+(?:[.,]\d+)?')
+DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '01234567890123456789')
+
+
+def query_numbers(query: str) -> frozenset:
+    """Numbers in a question (Arabic-Indic digits included): '100GB package' -> {'100'}"""
+    return frozenset(NUMBER.findall(query.translate(DIGITS)))
+
+
+class SemanticResponseCache:
+    """
+    In-memory answer cache looked up by cosine similarity of normalized query embeddings.
+
+    Entries are scoped (e.g. by detected language and metadata filter), so an
+    Arabic question is never answered with a cached English answer. e5 similarities
+    of questions that differ only in a number ("100GB package price" / "140GB
+    package price") are as high as those of paraphrases, so with `match_numbers`
+    an entry is only served when both questions contain the same numbers.
+
+    Args:
+        similarity_threshold: Minimum cosine similarity for a hit; choose it with
+                              evaluation/benchmark_semantic_cache.py
+        ttl_seconds: Entries older than this are never served
+        max_entries: Total capacity; the least recently used entry is evicted first
+        match_numbers: Require the same set of numbers in the cached and the new question
+    """
+
+    def __init__(self,
+                 similarity_threshold: float = 0.95,
+                 ttl_seconds: float = 3600,
+                 max_entries: int = 1000,
+                 match_numbers: bool = True):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.match_numbers = match_numbers
+
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._matrices: Dict[Hashable, tuple] = {}  # scope -> (entry ids, stacked embeddings)
+        self._ids = count()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.rejected = 0
+        self.saved_latency = 0.0
+
+    def _scope_matrix(self, scope: Hashable):
+        """Stacked embeddings of a scope, rebuilt only after the scope changed"""
+        cached = self._matrices.get(scope)
+        if cached is None:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry['scope'] == scope]
+            matrix = np.stack([self._entries[i]['embedding'] for i in ids]) if ids else None
+            cached = (ids, matrix)
+            self._matrices[scope] = cached
+        return cached
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._matrices.pop(entry['scope'], None)
+
+    def lookup(self, embedding: np.ndarray, scope: Hashable, query: Optional[str] = None) -> Optional[Dict]:
+        """
+        Return the most similar live entry of `scope` above the threshold, or None.
+        With `query` and match_numbers, entries asking about other numbers are skipped.
+        """
+        numbers = query_numbers(query) if query is not None and self.match_numbers else None
+        with self._lock:
+            ids, matrix = self._scope_matrix(scope)
+            if matrix is not None:
+                similarities = matrix @ np.asarray(embedding, dtype=np.float32)
+                now = time.time()
+                for idx in np.argsort(-similarities):
+                    if similarities[idx] < self.similarity_threshold:
+                        break
+                    entry_id = ids[idx]
+                    entry = self._entries[entry_id]
+                    if now - entry['created'] > self.ttl_seconds:
+                        continue
+                    if numbers is not None and entry['numbers'] != numbers:
+                        self.rejected += 1
+                        continue
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_latency += entry['latency']
+                    return {**entry, 'similarity': float(similarities[idx])}
+
+                # Drop expired entries of this scope
+                expired = [i for i in ids if now - self._entries[i]['created'] > self.ttl_seconds]
+                for entry_id in expired:
+                    self._remove(entry_id)
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding: np.ndarray, scope: Hashable, query: str, answer: str,
+              sources: List[Dict], latency: float):
+        """Cache an answer. `latency` is what a future hit saves (retrieval + generation)."""
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                'embedding': np.asarray(embedding, dtype=np.float32),
+                'scope': scope,
+                'query': query,
+                'numbers': query_numbers(query),
+                'answer': answer,
+                'sources': sources,
+                'latency': latency,
+                'created': time.time(),
+            }
+            self._matrices.pop(scope, None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self):
+        """Drop every entry (the underlying collection changed)"""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'rejected_number_mismatch': self.rejected,
+            'saved_latency_seconds': round(self.saved_latency, 3),
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,268 @@
+"""
+Lightweight tracing for the RAG pipeline
+Stages are timed as nested spans (the current span is tracked with contextvars),
+every span duration feeds a rolling latency histogram per stage name (p50/p95/p99),
+and each finished trace is handed to pluggable exporters (in-memory, console, JSONL).
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+class Span:
+    """One timed stage; children point to their parent through parent_id"""
+
+    __slots__ = ('name', 'trace', 'span_id', 'parent_id', 'start_time', 'duration_ms', 'attributes', '_start')
+
+    def __init__(self, name: str, trace: "Trace", span_id: int, parent_id: Optional[int],
+                 attributes: Dict, start_offset: float = 0.0):
+        self.name = name
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_time = time.time() - start_offset
+        self._start = time.perf_counter() - start_offset
+        self.duration_ms: Optional[float] = None
+        self.attributes = dict(attributes)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def as_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attributes': self.attributes,
+        }
+
+
+class Trace:
+    """Finished spans of one root span; exported when the root ends"""
+
+    def __init__(self, trace_id: int, max_spans: int):
+        self.trace_id = trace_id
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def as_dict(self, root: Span) -> Dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_time)
+        return {
+            'trace_id': self.trace_id,
+            'name': root.name,
+            'start_time': root.start_time,
+            'duration_ms': round(root.duration_ms, 3),
+            'attributes': root.attributes,
+            'spans': [span.as_dict() for span in spans],
+            'dropped_spans': self.dropped,
+        }
+
+
+class LatencyHistogram:
+    """Rolling window of the most recent durations of one stage"""
+
+    def __init__(self, window: int = 2048):
+        self._values: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, duration_ms: float):
+        self._values.append(duration_ms)
+        self.count += 1
+        self.total_ms += duration_ms
+
+    def summary(self) -> Dict:
+        values = np.fromiter(self._values, dtype=np.float64)
+        if not values.size:
+            return {'count': self.count}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(values.max()), 3),
+        }
+
+
+# ---------------------------------------------------------------------- exporters
+
+class InMemoryExporter:
+    """Keeps the most recent traces (e.g. for a debug panel)"""
+
+    def __init__(self, max_traces: int = 100):
+        self.traces: Deque[Dict] = deque(maxlen=max_traces)
+
+    def export(self, trace: Dict):
+        self.traces.append(trace)
+
+    def latest(self, name: Optional[str] = None) -> Optional[Dict]:
+        for trace in reversed(self.traces):
+            if name is None or trace['name'] == name:
+                return trace
+        return None
+
+
+class ConsoleExporter:
+    """Prints a one-line stage breakdown per trace"""
+
+    def __init__(self, min_duration_ms: float = 0.0):
+        self.min_duration_ms = min_duration_ms
+
+    def export(self, trace: Dict):
+        if trace['duration_ms'] < self.min_duration_ms:
+            return
+        stages = " | ".join(f"{span['name']} {span['duration_ms']:.1f}" for span in trace['spans']
+                            if span['parent_id'] is not None)
+        print(f"[trace] {trace['name']} {trace['duration_ms']:.1f}ms" + (f" | {stages}" if stages else ""))
+
+
+class JsonlExporter:
+    """Appends one JSON line per trace"""
+
+    def __init__(self, file_path: str = "traces.jsonl"):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Dict):
+        line = json.dumps(trace, ensure_ascii=False, default=str)
+        with self._lock, open(self.file_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+def exporters_from_env(variable: str = "TRACE_EXPORT") -> List[Any]:
+    """Exporters listed in e.g. TRACE_EXPORT="console,jsonl:traces.jsonl" """
+    exporters = []
+    for entry in filter(None, (part.strip() for part in os.getenv(variable, "").split(","))):
+        kind, _, argument = entry.partition(":")
+        if kind == "console":
+            exporters.append(ConsoleExporter(float(argument) if argument else 0.0))
+        elif kind == "jsonl":
+            exporters.append(JsonlExporter(argument or "traces.jsonl"))
+        else:
+            print(f"Unknown trace exporter: {entry}")
+    return exporters
+
+
+# ---------------------------------------------------------------------- tracer
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Args:
+        exporters: Objects with an export(trace_dict) method, called for every finished trace
+        histogram_window: Durations kept per stage for the percentiles
+        max_spans_per_trace: Spans beyond this are counted but not kept (long ingest runs)
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None, histogram_window: int = 2048,
+                 max_spans_per_trace: int = 1000):
+        self.recent = InMemoryExporter()
+        self.exporters: List[Any] = [self.recent] + list(exporters or [])
+        self.histogram_window = histogram_window
+        self.max_spans_per_trace = max_spans_per_trace
+        self.enabled = True
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._ids = count(1)
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter: Any):
+        self.exporters.append(exporter)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def annotate(self, **attributes):
+        """Set attributes on the current span, if any"""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def start_span(self, name: str, parent: Optional[Span] = None, start_offset: float = 0.0,
+                   **attributes) -> Span:
+        """
+        Start a span under `parent` (a new trace when None) without making it current;
+        use it for work that spans generator yields or threads, and end it with end_span().
+        """
+        span_id = next(self._ids)
+        trace = parent.trace if parent is not None else Trace(span_id, self.max_spans_per_trace)
+        return Span(name, trace, span_id, parent.span_id if parent is not None else None,
+                    attributes, start_offset)
+
+    def end_span(self, span: Span):
+        span.duration_ms = (time.perf_counter() - span._start) * 1000
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = LatencyHistogram(self.histogram_window)
+            histogram.observe(span.duration_ms)
+        span.trace.add(span)
+        if span.parent_id is None:
+            self._export(span.trace.as_dict(span))
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Iterator[Span]:
+        """Time the enclosed block as a child of `parent` (default: the current span)"""
+        span = self.start_span(name, parent if parent is not None else _current_span.get(), **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def record(self, name: str, seconds: float, parent: Optional[Span] = None, **attributes) -> Span:
+        """Add an already measured stage that ended just now"""
+        span = self.start_span(name, parent, start_offset=seconds, **attributes)
+        self.end_span(span)
+        return span
+
+    def _export(self, trace: Dict):
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                print(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    def metrics(self) -> Dict[str, Dict]:
+        """count / mean / p50 / p95 / p99 / max in milliseconds, per stage name"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+
+    def reset_metrics(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Shared by every manager in the process
+tracer = Tracer(exporters_from_env())
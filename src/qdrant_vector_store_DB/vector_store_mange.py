@@ -8,16 +8,24 @@ from qdrant_client.models import (
     Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue,
     SparseVectorParams, SparseIndexParams, SparseVector, Prefetch, Fusion, FusionQuery
 )
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from fastembed import SparseTextEmbedding
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Iterable, Iterator, Callable
 import numpy as np
-from langdetect import detect
 import json
 import os
 from uuid import uuid4
-from groq import Groq
 import time
+from .embedding_cache import EmbeddingCache
+from .ingestion_pipeline import IngestionPipeline
+from .llm_backends import GroqBackend, LocalLLMBackend
+from .semantic_cache import SemanticResponseCache
+from .faq_store import FAQStore
+from .model_registry import model_registry, get_device
+from .collection_layout import CollectionLayout
+from .rerank_policy import RerankPolicy
+from .context_builder import ContextBuilder
+from .inference_backends import load_dense_encoder, load_reranker, relevance_scores, BACKENDS
+from .tracing import tracer
+from language_detection.language_id import detect_language
 
 
 class QdrantVectorStoreManager:
@@ -30,75 +38,220 @@ class QdrantVectorStoreManager:
                  use_cloud: bool = False,
                  qdrant_url: Optional[str] = None,
                  qdrant_api_key: Optional[str] = None,
-                 groq_api_key: Optional[str] = None):
+                 groq_api_key: Optional[str] = None,
+                 llm_backend: Union[str, Any] = "groq",
+                 llm_model: str = "llama-3.3-70b-versatile",
+                 embedding_cache_dir: Optional[str] = "embedding_cache",
+                 embedding_cache_size_mb: int = 1024,
+                 embedding_cache_dtype: str = "float16",
+                 semantic_cache_threshold: Optional[float] = None,
+                 semantic_cache_ttl: int = 3600,
+                 semantic_cache_size: int = 1000,
+                 faq_db: Optional[str] = "faq_store.db",
+                 vector_size: Optional[int] = None,
+                 inference_backend: str = "torch",
+                 inference_threads: Optional[int] = None,
+                 collection_layout: Optional[CollectionLayout] = None,
+                 rerank_policy: Optional[RerankPolicy] = None,
+                 context_builder: Optional[ContextBuilder] = None):
 
 
         self.collection_name = collection_name
         self.persist_directory = persist_directory
+        self.embedding_model_name = embedding_model_name
+        self.reranker_model_name = reranker_model_name
+        self.sparse_model_name = "Qdrant/bm25"
+        # Dense/reranker backend: "torch", "onnx" or "onnx-int8" (ONNX Runtime, CPU)
+        if inference_backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {inference_backend} (expected one of {BACKENDS})")
+        self.inference_backend = inference_backend
+        self.inference_threads = inference_threads
+        # Quantization / HNSW / on-disk options used when the collection is created
+        self.collection_layout = collection_layout or CollectionLayout()
+        # Candidate depth, margin early-exit and latency budget of the rerank stage
+        self.rerank_policy = rerank_policy or RerankPolicy()
+        # Token budget, chunk merging and sentence dedup of the prompt context
+        self.context_builder = context_builder or ContextBuilder()
+        self.last_context_stats: Dict = {}
+        # Models are loaded lazily through the process-wide registry (see warm_up)
+        self._vector_size = vector_size
+        self.startup_times: Dict[str, float] = {}
         
         # Initialize Qdrant Client
-        if use_cloud and qdrant_url:
-            print(f"Connecting to Qdrant Cloud: {qdrant_url}")
-            self.client = QdrantClient(
-                url=qdrant_url,
-                api_key=qdrant_api_key,
-                timeout=30
-            )
-        else:
-            print(f"Using local Qdrant storage: {persist_directory}")
-            self.client = QdrantClient(path=persist_directory)
-        
-        # Initialize Groq client for LLM
-        groq_key = groq_api_key or os.getenv("GROQ_API_KEY")
-        if not groq_key:
-            raise ValueError("GROQ_API_KEY is required. Set it in environment or pass as argument.")
+        start_time = time.perf_counter()
+        self.client = self._create_client(use_cloud, qdrant_url, qdrant_api_key, persist_directory)
+        self.startup_times['qdrant_client'] = time.perf_counter() - start_time
         
-        self.groq_client = Groq(api_key=groq_key)
-        print("Groq client initialized (Llama 3 70B)")
-        
-        # Load HuggingFace embedding model
-        print(f"Loading embedding model: {embedding_model_name}")
-        print("First time download may take several minutes (~2 GB model)")
-        
-        import torch
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        print(f"Using device: {device}")
-        
-        self.embedding_model = SentenceTransformer(embedding_model_name, device=device)
-        self.vector_size = self.embedding_model.get_sentence_embedding_dimension()
-        
-        print(f"Embedding model loaded (dimension: {self.vector_size})")
+        # LLM backend ("groq", "local" for the offline stand-in, or a backend object), created on first use
+        if llm_backend == "groq":
+            self._groq_key = groq_api_key or os.getenv("GROQ_API_KEY")
+            if not self._groq_key:
+                raise ValueError("GROQ_API_KEY is required. Set it in environment or pass as argument.")
+        elif isinstance(llm_backend, str) and llm_backend != "local":
+            raise ValueError(f"Unknown LLM backend: {llm_backend}")
+        self._llm_backend_spec = llm_backend
+        self.llm_model = llm_model
+        self._llm_backend = None if isinstance(llm_backend, str) else llm_backend
+        self.last_generation_stats: Dict = {}
 
-        # Load Sparse Embedding Model (BM25)
-        print("Loading sparse embedding model: Qdrant/bm25")
-        self.sparse_embedding_model = SparseTextEmbedding(model_name="Qdrant/bm25")
-        print("Sparse embedding model loaded")
+        # Persistent embedding cache (set embedding_cache_dir=None to disable), opened once the
+        # embedding dimension is known
+        self._embedding_cache_dir = embedding_cache_dir
+        self._embedding_cache_size_mb = embedding_cache_size_mb
+        self._embedding_cache_dtype = embedding_cache_dtype
+        self._embedding_cache = None
 
-        # Load Cross-Encoder Reranker Model
-        print(f"Loading reranker model: {reranker_model_name}")
-        self.reranker_model = CrossEncoder(reranker_model_name, device=device)
-        print("Reranker model loaded")
+        # Semantic answer cache, opt-in: pick semantic_cache_threshold with
+        # evaluation/benchmark_semantic_cache.py (None disables)
+        self.response_cache = None
+        if semantic_cache_threshold is not None:
+            self.response_cache = SemanticResponseCache(
+                similarity_threshold=semantic_cache_threshold,
+                ttl_seconds=semantic_cache_ttl,
+                max_entries=semantic_cache_size
+            )
+
+        # Precomputed answers to hot questions (see faq_warmup.py; faq_db=None disables)
+        self.faq_store = FAQStore(faq_db) if faq_db else None
         
         # Create or get collection
+        start_time = time.perf_counter()
         self._init_collection()
+        self.startup_times['collection_init'] = time.perf_counter() - start_time
         
         print(f"Vector store initialized. Collection: {collection_name}")
+
+    def _create_client(self, use_cloud: bool, qdrant_url: Optional[str], qdrant_api_key: Optional[str],
+                       persist_directory: str):
+        """Qdrant Cloud client when a URL is given, embedded local storage otherwise"""
+        if use_cloud and qdrant_url:
+            print(f"Connecting to Qdrant Cloud: {qdrant_url}")
+            return QdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+                timeout=30
+            )
+        print(f"Using local Qdrant storage: {persist_directory}")
+        return QdrantClient(path=persist_directory)
+
+    # ------------------------------------------------------------------ lazily loaded models
+
+    @property
+    def embedding_model(self):
+        """multilingual-e5-large SentenceTransformer, shared across managers"""
+        def load():
+            print(f"Loading embedding model: {self.embedding_model_name} ({self.inference_backend})")
+            print("First time download may take several minutes (~2 GB model)")
+            device = get_device() if self.inference_backend == 'torch' else 'cpu'
+            print(f"Using device: {device}")
+            return load_dense_encoder(self.embedding_model_name, self.inference_backend, device, self.inference_threads)
+        return model_registry.get(('dense', self.embedding_model_name, self.inference_backend), load)
+
+    @property
+    def sparse_embedding_model(self):
+        """fastembed BM25 model, shared across managers"""
+        def load():
+            from fastembed import SparseTextEmbedding
+            print(f"Loading sparse embedding model: {self.sparse_model_name}")
+            return SparseTextEmbedding(model_name=self.sparse_model_name)
+        return model_registry.get(('sparse', self.sparse_model_name), load)
+
+    @property
+    def reranker_model(self):
+        """Cross-encoder reranker, shared across managers"""
+        def load():
+            print(f"Loading reranker model: {self.reranker_model_name} ({self.inference_backend})")
+            device = get_device() if self.inference_backend == 'torch' else 'cpu'
+            return load_reranker(self.reranker_model_name, self.inference_backend, device, self.inference_threads)
+        return model_registry.get(('reranker', self.reranker_model_name, self.inference_backend), load)
+
+    @property
+    def llm_backend(self):
+        """LLM backend, created on first generation"""
+        if self._llm_backend is None:
+            if self._llm_backend_spec == "groq":
+                self._llm_backend = model_registry.get(
+                    ('llm', 'groq', self.llm_model, self._groq_key),
+                    lambda: GroqBackend(api_key=self._groq_key, model=self.llm_model)
+                )
+                print("Groq client initialized (Llama 3 70B)")
+            else:
+                self._llm_backend = model_registry.get(('llm', 'local'), LocalLLMBackend)
+        return self._llm_backend
+
+    @property
+    def groq_client(self):
+        return getattr(self.llm_backend, 'client', None)
+
+    @property
+    def vector_size(self) -> int:
+        """Dense dimension, taken from the existing collection when possible to avoid loading the model"""
+        if self._vector_size is None:
+            self._vector_size = self.embedding_model.get_sentence_embedding_dimension()
+            print(f"Embedding model loaded (dimension: {self._vector_size})")
+        return self._vector_size
+
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        if self._embedding_cache is None and self._embedding_cache_dir:
+            self._embedding_cache = EmbeddingCache(
+                cache_dir=self._embedding_cache_dir,
+                # Quantized/ONNX vectors differ slightly, so each backend gets its own cache
+                model_name=self.embedding_model_name if self.inference_backend == 'torch'
+                else f"{self.embedding_model_name}@{self.inference_backend}",
+                dim=self.vector_size,
+                max_size_mb=self._embedding_cache_size_mb,
+                dtype=self._embedding_cache_dtype
+            )
+            print(f"Embedding cache enabled: {self._embedding_cache.directory}")
+        return self._embedding_cache
+
+    def warm_up(self, components: Iterable[str] = ('dense', 'sparse', 'reranker', 'llm')) -> Dict:
+        """
+        Load the given components now (and run one tiny inference each) instead of on first use.
+        Returns the startup report.
+        """
+        components = set(components)
+        if 'dense' in components:
+            self._encode_dense(["warm up"], prefix="query")
+        if 'sparse' in components:
+            self._sparse_embed(["warm up"])
+        if 'reranker' in components:
+            self.reranker_model.predict([["warm up", "warm up"]])
+        if 'llm' in components:
+            _ = self.llm_backend
+            # Tokenizer of the prompt context budget
+            self.context_builder.count_tokens("warm up")
+        return self.startup_report()
+
+    def startup_report(self) -> Dict:
+        """Seconds spent per startup component; model loads are shared by the whole process"""
+        report = {name: round(seconds, 3) for name, seconds in self.startup_times.items()}
+        for key, seconds in model_registry.load_times.items():
+            if key[0] == 'dense' and key[1:] == (self.embedding_model_name, self.inference_backend):
+                report['dense_model'] = round(seconds, 3)
+            elif key[0] == 'sparse' and key[1] == self.sparse_model_name:
+                report['sparse_model'] = round(seconds, 3)
+            elif key[0] == 'reranker' and key[1:] == (self.reranker_model_name, self.inference_backend):
+                report['reranker_model'] = round(seconds, 3)
+            elif key[0] == 'llm':
+                report['llm_backend'] = round(seconds, 3)
+            elif key[0] == 'device':
+                report['device'] = round(seconds, 3)
+        return report
     
     def detect_language(self, text: str) -> str:
-        """Detect language of text"""
-        try:
-            lang = detect(text)
-            return lang if lang in ['ar', 'en'] else 'en'
-        except:
-            return "en"
+        """Detect language of text ('ar' or 'en')"""
+        with tracer.span("language_detection"):
+            return detect_language(text)
 
     def _init_collection(self):
         """Initialize or get existing collection. Recreates if config mismatches."""
-        collections = self.client.get_collections().collections
-        collection_names = [col.name for col in collections]
-        
+        # The name may be an alias of a versioned collection (see migrate_collection)
+        exists = self.client.collection_exists(self.collection_name)
+
         should_recreate = False
-        if self.collection_name in collection_names:
+        if exists:
             # Check if existing collection has compatible config (named vectors + sparse)
             collection_info = self.client.get_collection(self.collection_name)
             vectors_config = collection_info.config.params.vectors
@@ -107,44 +260,175 @@ class QdrantVectorStoreManager:
             # Check if 'dense' vector exists and 'bm25' sparse vector exists
             has_dense = isinstance(vectors_config, dict) and 'dense' in vectors_config
             has_sparse = sparse_vectors_config is not None and 'bm25' in sparse_vectors_config
+            if has_dense and self._vector_size is None:
+                # Reuse the stored dimension so startup doesn't have to load the embedding model
+                self._vector_size = vectors_config['dense'].size
             
             if not (has_dense and has_sparse):
                 print(f"Collection '{self.collection_name}' exists but has incompatible config. Recreating...")
                 should_recreate = True
+            elif not self.collection_layout.matches(collection_info):
+                print(f"Collection '{self.collection_name}' was created with a different storage layout; "
+                      f"call migrate_collection() to apply the requested one")
         else:
             should_recreate = True
             
         if should_recreate:
-            if self.collection_name in collection_names:
-                self.client.delete_collection(self.collection_name)
+            if exists:
+                self._drop_live_collection()
+                if self.faq_store is not None:
+                    self.faq_store.clear()
                 
             print(f"Creating new collection: {self.collection_name}")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config={
-                    "dense": VectorParams(
-                        size=self.vector_size,
-                        distance=Distance.COSINE
-                    )
-                },
-                sparse_vectors_config={
-                    "bm25": SparseVectorParams(
-                        index=SparseIndexParams(
-                            on_disk=False,
-                        )
-                    )
-                }
-            )
+            self._create_collection(self.collection_name, self.collection_layout)
             
-            # Ensure payload index exists for 'source' field (required for filtering)
+        else:
+            print(f"Collection '{self.collection_name}' already exists with correct config")
+
+        self._ensure_payload_indexes(self.collection_name)
+
+    def _create_collection(self, collection_name: str, layout: CollectionLayout):
+        """Create a collection with named 'dense' + 'bm25' vectors using the given storage layout"""
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config={
+                "dense": layout.dense_vector_params(self.vector_size)
+            },
+            sparse_vectors_config={
+                "bm25": layout.sparse_vector_params()
+            },
+            on_disk_payload=layout.on_disk_payload or None
+        )
+
+    def _ensure_payload_indexes(self, collection_name: str):
+        """Ensure payload indexes exist for the fields used in filters
+        ('source' for search, 'url'/'file_hash' for incremental indexing)"""
+        for field_name in ("source", "url", "filename", "file_hash"):
             self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="source",
+                collection_name=collection_name,
+                field_name=field_name,
                 field_schema="keyword",
             )
+
+    def _alias_target(self, name: str) -> Optional[str]:
+        """Collection the alias `name` points to, or None if `name` is not an alias"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == name:
+                return alias.collection_name
+        return None
+
+    def _drop_live_collection(self):
+        """Delete the collection behind self.collection_name, and the alias if it is one"""
+        target = self._alias_target(self.collection_name)
+        if target is None:
+            self.client.delete_collection(self.collection_name)
+            return
+        self.client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=self.collection_name))
+        ])
+        self.client.delete_collection(target)
+
+    def _copy_points(self, source_collection: str, target_collection: str, batch_size: int = 256) -> int:
+        """Copy every point (vectors + payload) between collections, without re-embedding"""
+        copied = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source_collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if points:
+                self.client.upsert(
+                    collection_name=target_collection,
+                    points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+                )
+                copied += len(points)
+                print(f"Copied {copied} points to '{target_collection}'")
+            if offset is None:
+                break
+        return copied
+
+    def migrate_collection(self, layout: CollectionLayout, target_collection: Optional[str] = None,
+                           replace: bool = True, overwrite: bool = False, batch_size: int = 256) -> Dict:
+        """
+        Copy the collection into a new one with a new storage layout, reusing the stored
+        vectors (no re-embedding), then optionally switch the live name over to it.
+
+        The live name becomes an alias of the versioned copy. Once it is an alias, the
+        switch is a single atomic update_collection_aliases call and searches never see
+        a partial collection; the first migration of a plain collection has to delete
+        it before the alias can take its name (a short gap, but no copy in between).
+        The old collection is only dropped after the switch, and a failed copy leaves
+        the live collection untouched.
+
+        Args:
+            layout: The new CollectionLayout
+            target_collection: Name of the new collection (default '<collection>_<timestamp>')
+            replace: If True, point the live name at the new collection and drop the old
+                     one; if False the copy is kept side by side (e.g. to benchmark both layouts)
+            overwrite: Allow deleting an existing collection named target_collection
+            batch_size: Points per scroll/upsert batch
+
+        Returns:
+            Dict with the collection now holding the data and the number of points copied
+        """
+        target_collection = target_collection or f"{self.collection_name}_{time.strftime('%Y%m%d%H%M%S')}"
+        live_target = self._alias_target(self.collection_name)
+        if target_collection in (self.collection_name, live_target):
+            raise ValueError(f"'{target_collection}' is the live collection; choose another target name")
+        if self.client.collection_exists(target_collection):
+            if not overwrite:
+                raise ValueError(f"Collection '{target_collection}' already exists; "
+                                 f"pass overwrite=True to delete and rebuild it")
+            self.client.delete_collection(target_collection)
+
+        print(f"Migrating '{self.collection_name}' -> '{target_collection}' with layout {layout.as_dict()}")
+        self._create_collection(target_collection, layout)
+        self._ensure_payload_indexes(target_collection)
+        copied = self._copy_points(self.collection_name, target_collection, batch_size)
+
+        if not replace:
+            return {'collection': target_collection, 'points': copied}
+
+        create_alias = models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=target_collection, alias_name=self.collection_name))
+        if live_target is not None:
+            self.client.update_collection_aliases(change_aliases_operations=[
+                models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=self.collection_name)),
+                create_alias
+            ])
+            self.client.delete_collection(live_target)
         else:
-            print(f"Collection '{self.collection_name}' already exists with correct config")
+            # An alias cannot share its name with a collection: drop the plain one first
+            self.client.delete_collection(self.collection_name)
+            self.client.update_collection_aliases(change_aliases_operations=[create_alias])
+        self.collection_layout = layout
+        print(f"✓ Collection '{self.collection_name}' migrated to '{target_collection}' ({copied} points)")
+        return {'collection': target_collection, 'alias': self.collection_name, 'points': copied}
     
+    def _encode_dense(self, texts: List[str], prefix: str = "passage", show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts with the E5 'passage: ' / 'query: ' prefix.
+        Texts already seen by this model and prefix are served from the embedding cache.
+        """
+        def encode(batch: List[str]) -> np.ndarray:
+            return self.embedding_model.encode(
+                [f"{prefix}: {text}" for text in batch],
+                show_progress_bar=show_progress_bar,
+                normalize_embeddings=True  # Important for cosine similarity
+            )
+
+        if self.embedding_cache is None:
+            return np.asarray(encode(texts), dtype=np.float32)
+        return self.embedding_cache.get_or_encode(texts, prefix, encode)
+
+    def get_embedding_cache_stats(self) -> Dict:
+        """Hit/miss counters of the embedding cache (empty dict if disabled)"""
+        return self._embedding_cache.stats() if self._embedding_cache else {}
+
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using multilingual-e5-large
@@ -152,80 +436,149 @@ class QdrantVectorStoreManager:
         """
         # For E5 models, prefix with 'passage: ' for documents
         # Use 'query: ' for search queries (handled in search method)
-        prefixed_texts = [f"passage: {text}" for text in texts]
-        
-        embeddings = self.embedding_model.encode(
-            prefixed_texts,
-            show_progress_bar=True,
-            normalize_embeddings=True  # Important for cosine similarity
-        )
+        embeddings = self._encode_dense(texts, prefix="passage", show_progress_bar=True)
         return embeddings.tolist()
     
-    def add_documents(self, documents: List[Dict], batch_size: int = 32):
+    def _sparse_embed(self, texts: List[str]) -> List[Any]:
+        """Generate BM25 sparse embeddings (fastembed returns a generator of SparseEmbedding)"""
+        return list(self.sparse_embedding_model.embed(texts))
+
+    def _build_points(self, batch: List[Dict], dense_embeddings: np.ndarray, sparse_embeddings: List[Any]) -> List[PointStruct]:
+        """Create Qdrant points for a batch of documents and their dense/sparse vectors"""
+        points = []
+        for doc, dense_emb, sparse_emb in zip(batch, dense_embeddings, sparse_embeddings):
+            # Convert fastembed SparseEmbedding to Qdrant SparseVector
+            # fastembed SparseEmbedding has .indices and .values
+            qdrant_sparse_vector = SparseVector(
+                indices=sparse_emb.indices.tolist(),
+                values=sparse_emb.values.tolist()
+            )
+
+            points.append(
+                PointStruct(
+                    id=doc.get('point_id') or str(uuid4()),
+                    vector={
+                        "dense": np.asarray(dense_emb).tolist(),
+                        "bm25": qdrant_sparse_vector
+                    },
+                    payload={
+                        'doc_id': doc['id'],
+                        'content': doc['content'],
+                        **doc.get('metadata', {})
+                    }
+                )
+            )
+        return points
+
+    def add_documents_stream(self,
+                             documents: Iterable[Dict],
+                             batch_size: int = 32,
+                             max_queue_size: int = 4,
+                             chunker: Optional[Callable[[Dict], List[Dict]]] = None) -> Dict:
+        """
+        Stream documents into the vector store through the pipelined ingestion path.
+        Dense encoding, BM25 encoding and upsert of consecutive batches overlap.
+
+        Args:
+            documents: Any iterable (e.g. a generator) of documents, or of raw
+                       records when `chunker` is given; it is consumed lazily
+            batch_size: Documents per encode/upsert batch
+            max_queue_size: Batches allowed to wait between stages (backpressure)
+            chunker: Optional callable mapping one raw record to a list of documents
+
+        Returns:
+            Per-stage throughput stats (see IngestionPipeline.run)
+        """
+        pipeline = IngestionPipeline(self, batch_size=batch_size, max_queue_size=max_queue_size, chunker=chunker)
+        with tracer.span("ingest", batch_size=batch_size) as span:
+            try:
+                stats = pipeline.run(documents)
+            finally:
+                if pipeline.stats['upsert'].items:
+                    self._on_collection_changed()
+            span.set(documents=stats['total']['documents'])
+
+        for stage in IngestionPipeline.STAGES:
+            stage_stats = stats[stage]
+            print(f"  {stage:<7} {stage_stats['items']:>6} docs | busy {stage_stats['busy_seconds']:.2f}s "
+                  f"| waiting {stage_stats['wait_seconds']:.2f}s | {stage_stats['items_per_second']:.1f} docs/s")
+        print(f"✓ Successfully added {stats['total']['documents']} documents "
+              f"in {stats['total']['seconds']:.2f}s")
+        return stats
+
+    def add_documents(self, documents: List[Dict], batch_size: int = 32, max_queue_size: int = 4):
         """
         Add documents to vector store with dense and sparse vectors
-        documents: List of dicts with 'content', 'metadata', and 'id' keys
+        documents: List of dicts with 'content', 'metadata', and 'id' keys.
+                   An optional 'point_id' key gives the Qdrant point id, so
+                   re-adding the same chunk overwrites it instead of duplicating it.
         """
-        total_docs = len(documents)
-        print(f"Adding {total_docs} documents to vector store (Dense + Sparse)...")
-        
-        for i in range(0, total_docs, batch_size):
-            batch = documents[i:i + batch_size]
-            
-            # Extract data
-            ids = [doc['id'] for doc in batch]
-            texts = [doc['content'] for doc in batch]
-            metadatas = [doc.get('metadata', {}) for doc in batch]
-            
-            # Generate Dense embeddings
-            # For E5 models, prefix with 'passage: ' for documents
-            prefixed_texts = [f"passage: {text}" for text in texts]
-            dense_embeddings = self.embedding_model.encode(
-                prefixed_texts,
-                show_progress_bar=False,
-                normalize_embeddings=True
-            ).tolist()
-            
-            # Generate Sparse embeddings (BM25)
-            # fastembed returns generator of SparseEmbedding
-            sparse_embeddings_gen = self.sparse_embedding_model.embed(texts)
-            sparse_embeddings = list(sparse_embeddings_gen)
-            
-            # Create points for Qdrant
-            points = []
-            for j, (doc_id, text, dense_emb, sparse_emb, metadata) in enumerate(zip(ids, texts, dense_embeddings, sparse_embeddings, metadatas)):
-                # Convert fastembed SparseEmbedding to Qdrant SparseVector
-                # fastembed SparseEmbedding has .indices and .values
-                qdrant_sparse_vector = SparseVector(
-                    indices=sparse_emb.indices.tolist(),
-                    values=sparse_emb.values.tolist()
-                )
-                
-                points.append(
-                    PointStruct(
-                        id=str(uuid4()),
-                        vector={
-                            "dense": dense_emb,
-                            "bm25": qdrant_sparse_vector
-                        },
-                        payload={
-                            'doc_id': doc_id,
-                            'content': text,
-                            **metadata
-                        }
-                    )
-                )
-            
-            # Upload to Qdrant
-            self.client.upsert(
+        print(f"Adding {len(documents)} documents to vector store (Dense + Sparse)...")
+        return self.add_documents_stream(documents, batch_size=batch_size, max_queue_size=max_queue_size)
+    
+    def _build_filter(self, filter_metadata: Optional[Dict]) -> Optional[Filter]:
+        """Build an exact-match Qdrant filter from a {key: value} dict"""
+        if not filter_metadata:
+            return None
+        conditions = [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in filter_metadata.items()
+        ]
+        return Filter(must=conditions) if conditions else None
+
+    def get_point_index(self,
+                        filter_metadata: Optional[Dict] = None,
+                        group_by: str = 'url',
+                        batch_size: int = 256) -> Dict[str, set]:
+        """
+        Map each value of the `group_by` payload field to the set of point ids stored under it.
+        Only the grouping field is fetched (no vectors, no content), so this is cheap
+        compared to re-embedding and is used to diff a re-index against the collection.
+        """
+        index: Dict[str, set] = {}
+        offset = None
+        scroll_filter = self._build_filter(filter_metadata)
+        while True:
+            points, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                points=points
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=[group_by],
+                with_vectors=False
             )
-            
-            print(f"Added batch {i//batch_size + 1}/{(total_docs-1)//batch_size + 1}")
-        
-        print(f"✓ Successfully added {total_docs} documents")
-    
+            for point in points:
+                key = (point.payload or {}).get(group_by)
+                index.setdefault(key, set()).add(str(point.id))
+            if offset is None:
+                break
+        return index
+
+    def delete_points(self, point_ids: List[str], batch_size: int = 256) -> int:
+        """Delete points by id. Returns the number of ids submitted for deletion."""
+        point_ids = list(point_ids)
+        for i in range(0, len(point_ids), batch_size):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=point_ids[i:i + batch_size])
+            )
+        if point_ids:
+            self._on_collection_changed(deleted_ids=point_ids)
+        return len(point_ids)
+
+    def _on_collection_changed(self, deleted_ids: Optional[List[str]] = None):
+        """
+        Invalidate everything derived from the collection contents. Precomputed FAQ
+        answers only go when a chunk they were built on is deleted (chunk ids are
+        content-derived, so a changed chunk is a delete plus an add).
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate()
+        if self.faq_store is not None and deleted_ids:
+            dropped = self.faq_store.invalidate_points(deleted_ids)
+            if dropped:
+                print(f"FAQ store: {dropped} precomputed answers invalidated")
+
     def rerank(self, query: str, results: List[Dict], top_k: int = 5) -> List[Dict]:
         """
         Rerank search results using a cross-encoder model.
@@ -243,10 +596,10 @@ class QdrantVectorStoreManager:
             return results
         
         # Build query-document pairs for the cross-encoder
-        pairs = [[query, res['content']] for res in results]
+        pairs = self._rerank_pairs([query], [results])
         
-        # Score all pairs
-        scores = self.reranker_model.predict(pairs)
+        # Score all pairs (one relevance score per pair, whatever the model's label count)
+        scores = self._score_pairs(pairs)
         
         # Attach reranker scores and sort descending
         for i, res in enumerate(results):
@@ -256,119 +609,237 @@ class QdrantVectorStoreManager:
         
         return reranked[:top_k]
 
-    def search(self, 
-               query: str, 
-               n_results: int = 5,
-               filter_metadata: Optional[Dict] = None,
-               use_reranker: bool = True) -> List[Dict]:
+    def rerank_batch(self, queries: List[str], results_per_query: List[List[Dict]], top_k: int = 5) -> List[List[Dict]]:
         """
-        Search for similar documents using Hybrid Retrieval (RRF) + Cross-Encoder Reranking.
-        
-        When use_reranker=True (default), over-fetches 2× candidates from the hybrid
-        stage, then reranks with the cross-encoder and returns the top n_results.
+        Rerank the results of several queries with a single cross-encoder pass.
+        All (query, document) pairs are scored together, then split back per query.
         """
-        # Determine how many candidates to fetch from the hybrid stage
-        fetch_limit = n_results * 2 if use_reranker else n_results
-        
-        # 1. Generate Dense Embedding
-        # For E5 models, prefix query with 'query: '
-        prefixed_query = f"query: {query}"
-        query_dense_embedding = self.embedding_model.encode(
-            prefixed_query,
-            normalize_embeddings=True
-        ).tolist()
-        
-        # 2. Generate Sparse Embedding (BM25)
-        # fastembed returns generator
-        query_sparse_embedding_gen = self.sparse_embedding_model.embed([query])
-        query_sparse_embedding = list(query_sparse_embedding_gen)[0]
-        
-        qdrant_sparse_vector = SparseVector(
-            indices=query_sparse_embedding.indices.tolist(),
-            values=query_sparse_embedding.values.tolist()
-        )
-        
-        # 3. Build filter if provided
-        query_filter = None
-        if filter_metadata:
-            conditions = []
-            for key, value in filter_metadata.items():
-                conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
-                    )
-                )
-            if conditions:
-                query_filter = Filter(must=conditions)
-        
-        # 4. Perform Hybrid Search with RRF Fusion
-        # Define prefetches for dense and sparse
-        prefetch = [
+        pairs = self._rerank_pairs(queries, results_per_query)
+        if not pairs:
+            return [list(results) for results in results_per_query]
+
+        scores = self._score_pairs(pairs)
+
+        reranked_per_query = []
+        offset = 0
+        for results in results_per_query:
+            for res in results:
+                res['reranker_score'] = float(scores[offset])
+                offset += 1
+            reranked = sorted(results, key=lambda x: x['reranker_score'], reverse=True)
+            reranked_per_query.append(reranked[:top_k])
+        return reranked_per_query
+
+    def _rerank_pairs(self, queries: List[str], results_per_query: List[List[Dict]]) -> List[List[str]]:
+        """(query, document) pairs, documents cut to the policy's token budget"""
+        if not any(results_per_query):
+            return []
+        tokenizer = getattr(self.reranker_model, 'tokenizer', None)
+        return [
+            [query, self.rerank_policy.truncate_document(res['content'], tokenizer)]
+            for query, results in zip(queries, results_per_query)
+            for res in results
+        ]
+
+    def _score_pairs(self, pairs: List[List[str]]) -> np.ndarray:
+        """Cross-encoder relevance scores; the timing feeds the policy's latency estimate"""
+        start_time = time.perf_counter()
+        scores = relevance_scores(self.reranker_model.predict(pairs))
+        self.rerank_policy.observe(len(pairs), time.perf_counter() - start_time)
+        return scores
+
+    def _apply_rerank_policy(self, results: List[Dict], n_results: int, elapsed_ms: float):
+        """Split RRF-ordered candidates into the head to rerank and the RRF tail"""
+        _, depth = self.rerank_policy.plan(results, n_results, elapsed_ms)
+        return results[:depth], results[depth:]
+
+    @staticmethod
+    def _merge_reranked(reranked: List[Dict], tail: List[Dict], n_results: int) -> List[Dict]:
+        """Reranked head first, then the remaining candidates in RRF order"""
+        return (reranked + tail)[:n_results]
+
+    def get_rerank_stats(self) -> Dict:
+        """How often each rerank path was taken, plus the per-pair cost estimate"""
+        return self.rerank_policy.stats()
+
+    @staticmethod
+    def get_latency_stats() -> Dict:
+        """p50/p95/p99 per pipeline stage (process-wide, see tracing.tracer)"""
+        return tracer.metrics()
+
+    def _hybrid_prefetch(self, dense_embedding: List[float], sparse_vector: SparseVector,
+                         limit: int, query_filter: Optional[Filter] = None) -> List[Prefetch]:
+        """Dense and BM25 prefetches that are fused with RRF"""
+        return [
             Prefetch(
-                query=query_dense_embedding,
+                query=dense_embedding,
                 using="dense",
-                limit=fetch_limit,
-                filter=query_filter
+                limit=limit,
+                filter=query_filter,
+                params=self.collection_layout.search_params()
             ),
             Prefetch(
-                query=qdrant_sparse_vector,
+                query=sparse_vector,
                 using="bm25",
-                limit=fetch_limit,
+                limit=limit,
                 filter=query_filter
             ),
         ]
-        
-        # Execute query with fusion
-        search_results = self.client.query_points(
-            collection_name=self.collection_name,
-            prefetch=prefetch,
-            query=models.RrfQuery(rrf=models.Rrf(k=60)),
-            limit=fetch_limit
+
+    @staticmethod
+    def _to_sparse_vector(sparse_embedding: Any) -> SparseVector:
+        """Convert a fastembed SparseEmbedding to a Qdrant SparseVector"""
+        return SparseVector(
+            indices=sparse_embedding.indices.tolist(),
+            values=sparse_embedding.values.tolist()
         )
-        
-        # Format results
+
+    @staticmethod
+    def _format_points(points: List[Any]) -> List[Dict]:
+        """Convert scored Qdrant points to result dicts"""
         formatted_results = []
-        for result in search_results.points:
+        for result in points:
             formatted_results.append({
                 'id': result.payload.get('doc_id', str(result.id)),
+                'point_id': str(result.id),
                 'content': result.payload.get('content', ''),
                 'metadata': {
-                    k: v for k, v in result.payload.items() 
+                    k: v for k, v in result.payload.items()
                     if k not in ['doc_id', 'content']
                 },
                 'score': result.score,
             })
-        
-        # 5. Rerank with cross-encoder if enabled
-        if use_reranker and formatted_results:
-            formatted_results = self.rerank(query, formatted_results, top_k=n_results)
-        
         return formatted_results
-    
-    def generate_response(self, query: str, context_docs: List[Dict], 
-                         language: str = 'en',
-                         max_tokens: int = 1000,
-                         temperature: float = 0.3) -> str:
+
+    def search(self, 
+               query: str, 
+               n_results: int = 5,
+               filter_metadata: Optional[Dict] = None,
+               use_reranker: bool = True) -> List[Dict]:
         """
-        Generate response using Groq Llama 3 70B
+        Search for similar documents using Hybrid Retrieval (RRF) + Cross-Encoder Reranking.
         
-        Args:
-            query: User query
-            context_docs: Retrieved documents for context
-            language: Language of response ('en' or 'ar')
-            max_tokens: Maximum tokens in response
-            temperature: Temperature for generation (0-2)
+        When use_reranker=True (default), over-fetches candidates from the hybrid
+        stage (depth set by the rerank policy), then reranks them with the
+        cross-encoder and returns the top n_results. The policy may rerank only
+        the head, or keep RRF order, when the fused scores already show a clear
+        winner or the latency budget is spent.
         """
-        # Format context
-        language=self.detect_language(query)
-        context_parts = []
-        for i, doc in enumerate(context_docs, 1):
-            metadata = doc['metadata']
-            source = metadata.get('url', metadata.get('filename', 'Unknown'))
-            context_parts.append(f"[Context {i}]\nSource: {source}\n{doc['content']}\n")
-        
-        context = "\n".join(context_parts)
+        with tracer.span("search", n_results=n_results, reranker=use_reranker) as span:
+            start_time = time.perf_counter()
+            # Determine how many candidates to fetch from the hybrid stage
+            fetch_limit = self.rerank_policy.candidate_limit(n_results) if use_reranker else n_results
+            
+            # 1. Generate Dense Embedding
+            # For E5 models, prefix query with 'query: '
+            with tracer.span("search.dense_encode"):
+                query_dense_embedding = self._encode_dense([query], prefix="query")[0].tolist()
+            
+            # 2. Generate Sparse Embedding (BM25)
+            with tracer.span("search.bm25_encode"):
+                qdrant_sparse_vector = self._to_sparse_vector(self._sparse_embed([query])[0])
+            
+            # 3. Build filter if provided
+            query_filter = self._build_filter(filter_metadata)
+            
+            # 4. Perform Hybrid Search with RRF Fusion
+            # Execute query with fusion over the dense and sparse prefetches
+            with tracer.span("search.qdrant_query", limit=fetch_limit):
+                search_results = self.client.query_points(
+                    collection_name=self.collection_name,
+                    prefetch=self._hybrid_prefetch(query_dense_embedding, qdrant_sparse_vector, fetch_limit, query_filter),
+                    query=models.RrfQuery(rrf=models.Rrf(k=60)),
+                    limit=fetch_limit
+                )
+            
+            # Format results
+            formatted_results = self._format_points(search_results.points)
+            
+            # 5. Rerank with cross-encoder if enabled
+            if use_reranker and formatted_results:
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                head, tail = self._apply_rerank_policy(formatted_results, n_results, elapsed_ms)
+                with tracer.span("search.rerank", pairs=len(head)):
+                    reranked = self.rerank(query, head, top_k=len(head))
+                formatted_results = self._merge_reranked(reranked, tail, n_results)
+            
+            span.set(results=min(len(formatted_results), n_results))
+            return formatted_results[:n_results]
+
+    def search_batch(self,
+                     queries: List[str],
+                     n_results: int = 5,
+                     filter_metadata: Optional[Dict] = None,
+                     use_reranker: bool = True) -> List[List[Dict]]:
+        """
+        Search several queries at once. Same retrieval as search(), but batched:
+        one dense forward pass and one BM25 pass for all queries, one
+        query_batch_points request with a hybrid prefetch per query, and one
+        cross-encoder pass over every (query, document) pair.
+
+        Returns one result list per query, in input order.
+        """
+        if not queries:
+            return []
+
+        with tracer.span("search_batch", queries=len(queries), n_results=n_results, reranker=use_reranker):
+            start_time = time.perf_counter()
+            fetch_limit = self.rerank_policy.candidate_limit(n_results) if use_reranker else n_results
+
+            # 1. Encode all queries together
+            with tracer.span("search.dense_encode", queries=len(queries)):
+                dense_embeddings = self._encode_dense(queries, prefix="query")
+            with tracer.span("search.bm25_encode", queries=len(queries)):
+                sparse_vectors = [self._to_sparse_vector(emb) for emb in self._sparse_embed(queries)]
+
+            # 2. One batched hybrid request
+            query_filter = self._build_filter(filter_metadata)
+            requests = [
+                models.QueryRequest(
+                    prefetch=self._hybrid_prefetch(dense.tolist(), sparse, fetch_limit, query_filter),
+                    query=models.RrfQuery(rrf=models.Rrf(k=60)),
+                    limit=fetch_limit,
+                    with_payload=True
+                )
+                for dense, sparse in zip(dense_embeddings, sparse_vectors)
+            ]
+            with tracer.span("search.qdrant_query", queries=len(queries), limit=fetch_limit):
+                responses = self.client.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=requests
+                )
+            results_per_query = [self._format_points(response.points) for response in responses]
+
+            # 3. Rerank the policy-selected (query, doc) pairs in one cross-encoder batch
+            if use_reranker:
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                splits = [self._apply_rerank_policy(results, n_results, elapsed_ms) for results in results_per_query]
+                with tracer.span("search.rerank", pairs=sum(len(head) for head, _ in splits)):
+                    reranked = self.rerank_batch(queries, [head for head, _ in splits], top_k=fetch_limit)
+                results_per_query = [
+                    self._merge_reranked(head, tail, n_results)
+                    for head, (_, tail) in zip(reranked, splits)
+                ]
+
+            return [results[:n_results] for results in results_per_query]
+    
+    def _build_messages(self, query: str, context_docs: List[Dict], language: str = 'en',
+                        context_stats: Optional[Dict] = None) -> List[Dict]:
+        """
+        Build the system/user chat messages for a query and its retrieved context.
+        The context goes through the context builder (token budget, adjacent chunks
+        merged, repeated sentences dropped); its stats are written to `context_stats`
+        (if given) and to self.last_context_stats.
+        """
+        context, built_stats = self.context_builder.build(context_docs)
+        context_stats = context_stats if context_stats is not None else {}
+        context_stats.update(built_stats)
+        self.last_context_stats = context_stats
+        if context_stats['chunks']:
+            print(f"Prompt context: {context_stats['tokens_in']} -> {context_stats['tokens_out']} tokens "
+                  f"({context_stats['tokens_saved']} saved; {context_stats['merged_chunks']} chunks merged, "
+                  f"{context_stats['dropped_sentences']} repeated sentences and "
+                  f"{context_stats['dropped_blocks']} chunks over budget dropped)")
         
         # Create prompt based on language
         if language == 'ar':
@@ -404,40 +875,228 @@ Question: {query}
 
 Answer:"""
         
-        try:
-            # Call Groq API with Llama 3 70B
-            start_time = time.time()
-            
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": user_prompt
-                    }
-                ],
-                model="llama-3.3-70b-versatile",  # Llama 3 70B with 8K context
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=1,
-                stream=False
-            )
-            
-            response_time = time.time() - start_time
-            response_text = chat_completion.choices[0].message.content
-            
-            print(f"Groq response generated in {response_time:.2f}s")
-            
-            return response_text
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ]
+
+    def generate_response(self, query: str, context_docs: List[Dict], 
+                         language: Optional[str] = None,
+                         max_tokens: int = 1000,
+                         temperature: float = 0.3) -> str:
+        """
+        Generate response using Groq Llama 3 70B
+        
+        Args:
+            query: User query
+            context_docs: Retrieved documents for context
+            language: Language of response ('en' or 'ar'); detected from the query if None
+            max_tokens: Maximum tokens in response
+            temperature: Temperature for generation (0-2)
+        """
+        with tracer.span("generate", context_docs=len(context_docs)) as span:
+            language = language or self.detect_language(query)
+            with tracer.span("generate.prompt_build") as prompt_span:
+                context_stats: Dict = {}
+                messages = self._build_messages(query, context_docs, language, context_stats)
+                prompt_span.set(context_tokens=context_stats['tokens_out'],
+                                context_tokens_saved=context_stats['tokens_saved'])
             
+            try:
+                # Call the LLM backend (Groq Llama 3 70B by default)
+                start_time = time.time()
+                
+                with tracer.span("generate.llm_total", backend=self.llm_backend.name):
+                    response_text = self.llm_backend.complete(
+                        messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                
+                response_time = time.time() - start_time
+                
+                print(f"{self.llm_backend.name} response generated in {response_time:.2f}s")
+                
+                return response_text
+                
+            except Exception as e:
+                print(f"{self.llm_backend.name} API error: {e}")
+                span.set(error=str(e))
+                error_msg = "حدث خطأ في معالجة طلبك" if language == 'ar' else "An error occurred processing your request"
+                return f"{error_msg}\nError: {str(e)}"
+
+    def generate_response_stream(self, query: str, context_docs: List[Dict],
+                                 language: Optional[str] = None,
+                                 max_tokens: int = 1000,
+                                 temperature: float = 0.3,
+                                 stats: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream the response token by token (same prompt as generate_response;
+        the language is detected from the query only if the caller passes None).
+
+        Timing is written to `stats` (if given) and to self.last_generation_stats
+        once the stream ends:
+            first_token_latency: seconds until the first token arrived
+            total_latency: seconds until the last token arrived
+            chunks: number of streamed chunks
+            context: prompt-context stats of the context builder
+
+        The spans are started explicitly rather than as context managers, since the
+        consumer may resume the generator from another context (e.g. a worker thread).
+        """
+        span = tracer.start_span("generate", tracer.current_span(), context_docs=len(context_docs), stream=True)
+        language = language or self.detect_language(query)
+        prompt_start = time.perf_counter()
+        context_stats: Dict = {}
+        messages = self._build_messages(query, context_docs, language, context_stats)
+        tracer.record("generate.prompt_build", time.perf_counter() - prompt_start, parent=span,
+                      context_tokens=context_stats['tokens_out'], context_tokens_saved=context_stats['tokens_saved'])
+        stats = stats if stats is not None else {}
+        stats.update({'backend': self.llm_backend.name, 'first_token_latency': None,
+                      'total_latency': None, 'chunks': 0, 'context': context_stats})
+
+        start_time = time.time()
+        llm_span = tracer.start_span("generate.llm_total", span, backend=self.llm_backend.name)
+        try:
+            for token in self.llm_backend.stream(messages, temperature=temperature, max_tokens=max_tokens):
+                if stats['first_token_latency'] is None:
+                    stats['first_token_latency'] = time.time() - start_time
+                    tracer.record("generate.llm_first_token", stats['first_token_latency'], parent=span)
+                stats['chunks'] += 1
+                yield token
         except Exception as e:
-            print(f"Groq API error: {e}")
+            print(f"{self.llm_backend.name} API error: {e}")
+            stats['error'] = str(e)
+            span.set(error=str(e))
             error_msg = "حدث خطأ في معالجة طلبك" if language == 'ar' else "An error occurred processing your request"
-            return f"{error_msg}\nError: {str(e)}"
+            yield f"{error_msg}\nError: {str(e)}"
+        finally:
+            stats['total_latency'] = time.time() - start_time
+            llm_span.set(chunks=stats['chunks'])
+            tracer.end_span(llm_span)
+            tracer.end_span(span)
+            self.last_generation_stats = stats
+            if stats['first_token_latency'] is not None:
+                print(f"{self.llm_backend.name} stream: first token in {stats['first_token_latency']:.2f}s, "
+                      f"completed in {stats['total_latency']:.2f}s")
     
+    def _response_cache_scope(self, query: str, language: Optional[str], filter_metadata: Optional[Dict]):
+        """Cache scope: detected language plus the metadata filter used for retrieval"""
+        language = language or self.detect_language(query)
+        return (language, tuple(sorted((filter_metadata or {}).items())))
+
+    def get_cached_answer(self, query: str, language: Optional[str] = None,
+                          filter_metadata: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Look up a cached answer for a semantically equivalent earlier question.
+        Returns a dict with 'answer', 'sources', 'query' and 'similarity', or None.
+        """
+        if self.response_cache is None:
+            return None
+        with tracer.span("cache_lookup") as span:
+            embedding = self._encode_dense([query], prefix="query")[0]
+            cached = self.response_cache.lookup(embedding, self._response_cache_scope(query, language, filter_metadata),
+                                                query=query)
+            span.set(hit=cached is not None)
+            return cached
+
+    def cache_answer(self, query: str, answer: str, sources: List[Dict], latency: float,
+                     language: Optional[str] = None, filter_metadata: Optional[Dict] = None):
+        """Store an answer produced by search + generation (latency = what a hit saves)"""
+        if self.response_cache is None:
+            return
+        embedding = self._encode_dense([query], prefix="query")[0]
+        self.response_cache.store(
+            embedding, self._response_cache_scope(query, language, filter_metadata),
+            query=query, answer=answer, sources=sources, latency=latency
+        )
+
+    def get_faq_answer(self, query: str, language: Optional[str] = None) -> Optional[Dict]:
+        """
+        Precomputed answer for a hot question (exact or normalized match), or None.
+        A plain SQLite lookup: no embedding, retrieval or LLM call.
+        """
+        if self.faq_store is None:
+            return None
+        with tracer.span("faq_lookup") as span:
+            entry = self.faq_store.lookup(query, language)
+            span.set(hit=entry is not None)
+            return entry
+
+    def get_context_stats(self) -> Dict:
+        """Prompt-context tokens before / after the context builder, over all requests"""
+        return self.context_builder.stats()
+
+    def get_faq_stats(self) -> Dict:
+        return self.faq_store.stats() if self.faq_store else {}
+
+    def get_response_cache_stats(self) -> Dict:
+        """Hit rate and saved latency of the semantic answer cache (empty dict if disabled)"""
+        return self.response_cache.stats() if self.response_cache else {}
+
+    def answer(self, query: str, n_results: int = 6, filter_metadata: Optional[Dict] = None,
+               language: Optional[str] = None, use_cache: bool = True) -> Dict:
+        """
+        Full RAG pipeline (search + generate_response) behind the precomputed FAQ
+        answers and the semantic answer cache.
+
+        Returns:
+            Dict with 'answer', 'sources', 'cached' (bool) and 'latency' (seconds)
+        """
+        with tracer.span("rag.query") as span:
+            result: Dict = {}
+            answer_text = "".join(self.answer_stream(query, n_results, filter_metadata, language, use_cache, result))
+            span.set(cached=result['cached'])
+            if result['faq']:
+                span.set(faq=result['faq'])
+            return {'answer': answer_text, 'sources': result['sources'],
+                    'cached': result['cached'], 'latency': result['latency']}
+
+    def answer_stream(self, query: str, n_results: int = 6, filter_metadata: Optional[Dict] = None,
+                      language: Optional[str] = None, use_cache: bool = True, result: Optional[Dict] = None,
+                      search_fn: Optional[Callable[..., List[Dict]]] = None) -> Iterator[str]:
+        """
+        Streaming answer(): yields a FAQ or cached answer in one piece, or the generated
+        answer token by token, and caches a generated answer once it is complete.
+
+        Args:
+            result: Filled with 'sources', 'cached' and 'faq' (the FAQ match or None)
+                    before the first piece, and 'latency' plus the generation 'stats'
+                    once the stream ends
+            search_fn: Retrieval used instead of self.search (e.g. a micro-batched one),
+                       called as search_fn(query, n_results, filter_metadata)
+        """
+        start_time = time.time()
+        result = result if result is not None else {}
+        # Detected once, used for the cache scope and the prompt
+        language = language or self.detect_language(query)
+        hit = self.get_faq_answer(query, language) if use_cache and not filter_metadata else None
+        result['faq'] = hit['match'] if hit else None
+        if use_cache and hit is None:
+            hit = self.get_cached_answer(query, language, filter_metadata)
+        if hit:
+            result.update(sources=hit['sources'], cached=True, stats={})
+            yield hit['answer']
+            result['latency'] = time.time() - start_time
+            return
+
+        sources = (search_fn or self.search)(query, n_results, filter_metadata)
+        stats: Dict = {}
+        result.update(sources=sources, cached=False, stats=stats)
+        parts = []
+        for token in self.generate_response_stream(query, sources, language=language, stats=stats):
+            parts.append(token)
+            yield token
+        result['latency'] = time.time() - start_time
+        if use_cache and not stats.get('error'):
+            self.cache_answer(query, "".join(parts), sources, result['latency'], language, filter_metadata)
+
     def count(self, collection_name: Optional[str] = None) -> int:
         """Count documents in collection"""
         target_collection = collection_name or self.collection_name
@@ -464,19 +1123,25 @@ Answer:"""
             # Single vector configuration
             vector_params = vectors_config
 
+        # Name only: reading self.llm_backend would create the Groq client (and need its key)
+        llm = self._llm_backend.name if self._llm_backend is not None else self._llm_backend_spec
         return {
             'collection_name': self.collection_name,
             'total_documents': collection_info.points_count,
             'vector_size': vector_params.size,
             'distance_metric': vector_params.distance,
             'persist_directory': self.persist_directory,
-            'llm': 'Groq Llama 3 70B',
-            'embedding_model': 'multilingual-e5-large'
+            'llm': 'Groq Llama 3 70B' if llm == 'groq' else llm,
+            'embedding_model': 'multilingual-e5-large',
+            'inference_backend': self.inference_backend
         }
     
     def delete_collection(self):
         """Delete the entire collection"""
-        self.client.delete_collection(collection_name=self.collection_name)
+        self._drop_live_collection()
+        self._on_collection_changed()
+        if self.faq_store is not None:
+            self.faq_store.clear()
         print(f"Collection '{self.collection_name}' deleted")
     
     def reset_collection(self):
@@ -487,5 +1152,6 @@ Answer:"""
             pass
         
         self._init_collection()
+        self._on_collection_changed()
         print(f"Collection '{self.collection_name}' reset")
     
\ No newline at end of file
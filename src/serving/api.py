@@ -0,0 +1,195 @@
+"""
+HTTP API for the Telecom Egypt assistant (ASGI, FastAPI)
+
+    POST /search    hybrid search + rerank
+    POST /chat      RAG answer (JSON, or streamed text with "stream": true)
+    GET  /healthz   liveness
+    GET  /readyz    readiness: 200 once the models are warmed up, 503 before
+    GET  /metrics   per-stage latency percentiles
+
+Concurrent /search and /chat retrievals are micro-batched into search_batch(),
+i.e. one e5 encode and one cross-encoder pass per batch.
+
+Run from src/:
+    uvicorn serving.api:app --host 0.0.0.0 --port 8000
+"""
+import os
+import sys
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from itertools import chain
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+from qdrant_vector_store_DB.tracing import tracer
+from serving.micro_batcher import MicroBatcher
+
+load_dotenv()
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    n_results: int = Field(5, ge=1, le=50)
+    filter_metadata: Optional[Dict[str, str]] = None
+    use_reranker: bool = True
+
+
+class ChatRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    n_results: int = Field(6, ge=1, le=20)
+    filter_metadata: Optional[Dict[str, str]] = None
+    language: Optional[str] = None
+    use_cache: bool = True
+    stream: bool = False
+
+
+class ServiceState:
+    """Vector store, batcher and warm-up status shared by all requests"""
+
+    def __init__(self):
+        self.store: Optional[QdrantVectorStoreManager] = None
+        self.search_batcher: Optional[MicroBatcher] = None
+        self.ready = threading.Event()
+        self.warm_up_error: Optional[str] = None
+        self.startup_report: Dict = {}
+
+    def create_store(self) -> QdrantVectorStoreManager:
+        return QdrantVectorStoreManager(
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            collection_name=os.getenv("COLLECTION_NAME", "telecom_egypt_VDB"),
+            embedding_model_name="intfloat/multilingual-e5-large",
+            use_cloud=bool(os.getenv("QDRANT_URL")),
+            qdrant_url=os.getenv("QDRANT_URL"),
+            qdrant_api_key=os.getenv("QDRANT_API_KEY"),
+            llm_backend=os.getenv("LLM_BACKEND", "groq"),
+            inference_backend=os.getenv("INFERENCE_BACKEND", "torch"),
+            # Opt-in; see evaluation/benchmark_semantic_cache.py for choosing the value
+            semantic_cache_threshold=float(os.environ["SEMANTIC_CACHE_THRESHOLD"])
+            if os.getenv("SEMANTIC_CACHE_THRESHOLD") else None
+        )
+
+    def warm_up(self):
+        """Load every model in the background so /healthz answers while this runs"""
+        try:
+            self.startup_report = self.store.warm_up()
+            print(f"Startup breakdown (s): {self.startup_report}")
+            self.ready.set()
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"Warm-up failed: {e}")
+
+    def search_many(self, key, queries: List[str]) -> List[List[Dict]]:
+        """Batch function of the search micro-batcher"""
+        n_results, filter_json, use_reranker = key
+        return self.store.search_batch(
+            queries,
+            n_results=n_results,
+            filter_metadata=json.loads(filter_json) if filter_json else None,
+            use_reranker=use_reranker
+        )
+
+    async def search(self, query: str, n_results: int, filter_metadata: Optional[Dict],
+                     use_reranker: bool = True) -> List[Dict]:
+        key = (n_results, json.dumps(filter_metadata, sort_keys=True) if filter_metadata else None, use_reranker)
+        return await self.search_batcher.submit(query, key)
+
+
+state = ServiceState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    state.store = state.create_store()
+    state.search_batcher = MicroBatcher(
+        state.search_many,
+        max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "16")),
+        max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "5")),
+        name="search"
+    )
+    state.search_batcher.start()
+    threading.Thread(target=state.warm_up, name="warm-up", daemon=True).start()
+    yield
+    await state.search_batcher.stop()
+
+
+app = FastAPI(title="Telecom Egypt Assistant API", lifespan=lifespan)
+
+
+def _require_ready():
+    if not state.ready.is_set():
+        raise HTTPException(status_code=503, detail=state.warm_up_error or "Models are warming up")
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    body = {
+        "ready": state.ready.is_set(),
+        "error": state.warm_up_error,
+        "startup": state.startup_report,
+        "batching": state.search_batcher.get_stats() if state.search_batcher else {},
+    }
+    return JSONResponse(body, status_code=200 if state.ready.is_set() else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency percentiles (ms) and rerank / FAQ / prompt-context / batching counters"""
+    return {
+        "latency": tracer.metrics(),
+        "rerank": state.store.get_rerank_stats() if state.store else {},
+        "faq": state.store.get_faq_stats() if state.store else {},
+        "context": state.store.get_context_stats() if state.store else {},
+        "batching": state.search_batcher.get_stats() if state.search_batcher else {},
+    }
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    _require_ready()
+    results = await state.search(request.query, request.n_results, request.filter_metadata, request.use_reranker)
+    return {"query": request.query, "results": results}
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    _require_ready()
+    loop = asyncio.get_running_loop()
+
+    def search(query: str, n_results: int, filter_metadata: Optional[Dict]) -> List[Dict]:
+        # Called from a worker thread; retrieval still goes through the micro-batcher
+        return asyncio.run_coroutine_threadsafe(state.search(query, n_results, filter_metadata), loop).result()
+
+    result: Dict = {}
+    tokens = state.store.answer_stream(request.query, request.n_results, request.filter_metadata,
+                                       request.language, request.use_cache, result, search_fn=search)
+    # FAQ / cache lookups and retrieval run until the first piece; keep them off the event loop
+    first = await asyncio.to_thread(next, tokens, "")
+
+    if request.stream:
+        return StreamingResponse(chain([first], tokens), media_type="text/plain; charset=utf-8")
+
+    answer = first + await asyncio.to_thread(lambda: "".join(tokens))
+    response = {"answer": answer, "sources": result['sources'], "cached": result['cached']}
+    if result['faq']:
+        response['faq'] = result['faq']
+    return response
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")))
@@ -0,0 +1,109 @@
+"""
+Dynamic request micro-batching
+Concurrent requests are collected for up to `max_wait_ms` (or until `max_batch_size`
+is reached) and handed to one batch function call, so e.g. N concurrent searches
+share a single e5 encode and a single cross-encoder pass.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Args:
+        process_batch: Called as process_batch(key, items) in a worker thread; must
+            return one result per item, in order
+        max_batch_size: Largest batch handed to process_batch
+        max_wait_ms: How long the first request of a batch waits for company
+        name: Used in log lines and stats
+
+    Items are only batched with items submitted under the same key (e.g. the same
+    n_results and filter), since the batch function applies one setting per call.
+    """
+
+    def __init__(self, process_batch: Callable[[Hashable, List[Any]], List[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0, name: str = "batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # One worker thread: batches run back to back on the shared models
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.stats = {'batches': 0, 'items': 0, 'max_batch': 0, 'busy_seconds': 0.0}
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Queue one item and wait for its result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Hashable, Any, asyncio.Future]]:
+        """First queued request, plus whatever arrives before the deadline or the size cap"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            groups: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+            for key, item, future in batch:
+                if not future.cancelled():
+                    groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                items = [item for item, _ in entries]
+                start_time = time.perf_counter()
+                try:
+                    results = await loop.run_in_executor(self._executor, self.process_batch, key, items)
+                    error = None
+                except Exception as e:
+                    results, error = None, e
+                self.stats['busy_seconds'] += time.perf_counter() - start_time
+                self.stats['batches'] += 1
+                self.stats['items'] += len(items)
+                self.stats['max_batch'] = max(self.stats['max_batch'], len(items))
+
+                for idx, (_, future) in enumerate(entries):
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(results[idx])
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['mean_batch'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['queued'] = self._queue.qsize() if self._queue else 0
+        return stats
@@ -2,14 +2,14 @@ import streamlit as st
 import os
 import sys
 import time
-import tempfile
 import shutil
-from langdetect import detect
+from itertools import chain
 from dotenv import load_dotenv
 
 from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
-from data_extraction.data_extraction_docs.docs_processing import TelecomEgyptDocumentProcessor
-from data_indexer.data_indexing import DocumentIndexer
+from qdrant_vector_store_DB.tracing import tracer
+from data_indexer.ingestion_queue import IngestionWorker, IngestionJobStore
+from language_detection.language_id import detect_language
 
 # Add src to path to import local modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -121,8 +121,14 @@ def get_vector_store():
             embedding_model_name="intfloat/multilingual-e5-large",
             use_cloud=True, 
             qdrant_url=QDRANT_URL,
-            qdrant_api_key=QDRANT_API_KEY
+            qdrant_api_key=QDRANT_API_KEY,
+            llm_backend=os.getenv("LLM_BACKEND", "groq"),  # "local" runs the offline stand-in
+            # Opt-in; see evaluation/benchmark_semantic_cache.py for choosing the value
+            semantic_cache_threshold=float(os.environ["SEMANTIC_CACHE_THRESHOLD"])
+            if os.getenv("SEMANTIC_CACHE_THRESHOLD") else None
         )
+        # Load every model once per process now, so the first question isn't slowed down
+        print(f"Startup breakdown (s): {store.warm_up()}")
         return store
     except Exception as e:
         st.error(f"Failed to connect to Knowledge Base: {e}")
@@ -130,51 +136,59 @@ def get_vector_store():
 
 vector_store = get_vector_store()
 
+@st.cache_resource
+def get_ingestion_worker():
+    """One background ingestion worker per process, shared by all sessions"""
+    if vector_store is None:
+        return None
+    return IngestionWorker(vector_store, IngestionJobStore("ingestion_jobs.db"), spool_dir="ingestion_spool").start()
+
+ingestion_worker = get_ingestion_worker()
+
 # uploading files
 def process_and_index_file(uploaded_file):
-    if vector_store:
-        with st.spinner(f"Processing & Indexing {uploaded_file.name}..."):
-            try:
-                # Create a temporary directory
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    # Save uploaded file
-                    file_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Process document
-                    processor = TelecomEgyptDocumentProcessor()
-                    output_json_path = os.path.join(temp_dir, "processed_doc.json")
-                    
-                    # process_multiple_documents takes list of paths
-                    processor.process_multiple_documents([file_path], output_json_path)
-                    
-                    # Index document
-                    indexer = DocumentIndexer(vector_store)
-                    
-                    if os.path.exists(output_json_path):
-                        # Use existing method to index from json
-                        result = indexer.index_uploaded_documents(output_json_path)
-                        
-                        if isinstance(result, str) and result.startswith("Error"):
-                            st.error(result)
-                        else:
-                            st.success(f"Successfully added **{uploaded_file.name}** to the knowledge base!")
-                    else:
-                        st.warning("No content extracted from the file.")
-                        
-            except Exception as e:
-                st.error(f"Error processing file: {e}")
+    """Queue the upload for background extraction + indexing and return at once"""
+    if ingestion_worker:
+        try:
+            job_id = ingestion_worker.submit(uploaded_file.name, uploaded_file.getbuffer())
+            st.session_state.setdefault("ingestion_jobs", []).append(job_id)
+            st.info(f"Queued **{uploaded_file.name}** for indexing (job `{job_id}`)")
+        except Exception as e:
+            st.error(f"Error queuing file: {e}")
     else:
         st.error("Vector Store not available, cannot index.")
 
-def detect_language(text: str) -> str:
-        """Detect language of text"""
-        try:
-            lang = detect(text)
-            return lang if lang in ['ar', 'en'] else 'en'
-        except:
-            return "en"
+@st.fragment(run_every=2)
+def show_ingestion_jobs():
+    """Status and progress of this session's uploads, refreshed in place"""
+    job_ids = st.session_state.get("ingestion_jobs", [])
+    if not ingestion_worker or not job_ids:
+        return
+    for job in ingestion_worker.jobs.get(job_ids):
+        if job['status'] == 'done':
+            st.success(f"**{job['filename']}**: {job['message']}")
+        elif job['status'] == 'failed':
+            st.error(f"**{job['filename']}**: {job['message']}")
+        else:
+            st.progress(job['progress'], text=f"{job['filename']} · {job['status']}")
+
+def show_latency_breakdown(trace):
+    """Per-stage timing of the last query, plus the running percentiles per stage"""
+    depths = {}
+    rows = []
+    for span in trace['spans']:
+        depths[span['span_id']] = depths.get(span['parent_id'], -1) + 1
+        rows.append({
+            "stage": "\u2003" * depths[span['span_id']] + span['name'],
+            "ms": span['duration_ms'],
+        })
+    with st.expander(f"Latency breakdown · {trace['duration_ms']:.0f} ms"):
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.caption("All queries in this process (ms)")
+        st.dataframe(
+            [{"stage": name, **summary} for name, summary in tracer.metrics().items()],
+            hide_index=True, use_container_width=True
+        )
 
 # --- Sidebar ---
 with st.sidebar:
@@ -191,8 +205,16 @@ with st.sidebar:
     if uploaded_file is not None:
         if st.button("Process & Index"):
             process_and_index_file(uploaded_file)
+    show_ingestion_jobs()
     
     st.markdown("---")
+    show_debug = st.toggle("Show latency breakdown", value=False)
+    if vector_store and vector_store.response_cache is not None:
+        cache_stats = vector_store.get_response_cache_stats()
+        st.caption(
+            f"Answer cache: {cache_stats['hit_rate']:.0%} hit rate · "
+            f"{cache_stats['saved_latency_seconds']:.1f}s saved"
+        )
     st.caption("Powered by Groq & Qdrant")
 
 
@@ -217,25 +239,37 @@ if prompt := st.chat_input("Ask about WE services..."):
     # Generate Response
     if vector_store:
         with st.chat_message("assistant"):
-            with st.spinner("Searching knowledge base..."):
-                try:    
-                    search_results = vector_store.search(
-                        query=prompt,
-                        n_results=6, 
-                        filter_metadata=None #search all sources (web + upload)
-                    )
+            with tracer.span("rag.query") as query_span:
+                try:
+                    start_time = time.time()
+                    with tracer.span("language_detection"):
+                        language = detect_language(prompt)
+                    # Hot questions precomputed by faq_warmup.py, then the semantic cache,
+                    # then search all sources (web + upload) and generate
+                    answer_info = {}
+                    tokens = vector_store.answer_stream(prompt, n_results=6, language=language, result=answer_info)
+                    with st.spinner("Searching knowledge base..."):
+                        first_piece = next(tokens, "")
+
+                    # Render tokens as they arrive
+                    response_text = st.write_stream(chain([first_piece], tokens))
+                    search_results = answer_info['sources']
+                    generation_stats = answer_info['stats']
+
+                    if answer_info['faq']:
+                        st.caption(f"Answered from FAQ in {(time.time() - start_time) * 1000:.0f} ms")
+                    elif answer_info['cached']:
+                        # Semantically equivalent question answered before: retrieval and the LLM were skipped
+                        st.caption(f"Answered from cache in {time.time() - start_time:.2f}s")
+                    elif generation_stats.get('first_token_latency') is not None:
+                        st.caption(
+                            f"First token in {generation_stats['first_token_latency']:.2f}s · "
+                            f"answered in {generation_stats['total_latency']:.2f}s"
+                        )
                 
-                    response_text = vector_store.generate_response(
-                        query=prompt,
-                        context_docs=search_results,
-                        language=detect_language(prompt)
-                    )
-                    
-                    st.markdown(response_text)
-                    
                     # Add to history
                     st.session_state.messages.append({"role": "assistant", "content": response_text})
-                    
+                
                     # Show sources in expander
                     with st.expander("View Sources"):
                         for i, res in enumerate(search_results, 1):
@@ -243,13 +277,15 @@ if prompt := st.chat_input("Ask about WE services..."):
                             # If uploaded file, title might not be there, check filename or source
                             if res['metadata'].get('source') == 'upload':
                                 source_name = res['metadata'].get('filename', 'Uploaded Document')
-                            
+                        
                             st.markdown(f"**Source {i}:** {source_name}")
                             st.caption(res['content'][:200] + "...")
                             if 'url' in res['metadata']:
                                 st.markdown(f"[Link]({res['metadata']['url']})")
-                                
+                            
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
+            if show_debug:
+                show_latency_breakdown(query_span.trace.as_dict(query_span))
     else:
         st.error("Vector Store not initialized.")
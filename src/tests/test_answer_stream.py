@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+from qdrant_vector_store_DB.vector_store_mange import QdrantVectorStoreManager
+
+SOURCES = [{'content': "Indigo costs 250 EGP", 'metadata': {'source': 'web'}}]
+
+
+class FakeStore(QdrantVectorStoreManager):
+    """Manager without Qdrant or models: lookups, search and generation are scripted"""
+
+    def __init__(self, faq: Optional[Dict] = None, cached: Optional[Dict] = None, error: bool = False):
+        self.faq, self.cached, self.error = faq, cached, error
+        self.searches: List[str] = []
+        self.stored: List[str] = []
+
+    def detect_language(self, text: str) -> str:
+        return 'en'
+
+    def get_faq_answer(self, query, language=None):
+        return self.faq
+
+    def get_cached_answer(self, query, language=None, filter_metadata=None):
+        return self.cached
+
+    def search(self, query, n_results=5, filter_metadata=None, use_reranker=True):
+        self.searches.append(query)
+        return SOURCES
+
+    def generate_response_stream(self, query, context_docs, language=None, stats=None, **kwargs):
+        stats['first_token_latency'] = stats['total_latency'] = 0.0
+        if self.error:
+            stats['error'] = "rate limited"
+        yield "Indigo "
+        yield "costs 250 EGP."
+
+    def cache_answer(self, query, answer, sources, latency, language=None, filter_metadata=None):
+        self.stored.append(answer)
+
+
+def test_generated_answer_is_streamed_and_cached():
+    store, result = FakeStore(), {}
+    tokens = list(store.answer_stream("indigo price?", result=result))
+    assert tokens == ["Indigo ", "costs 250 EGP."]
+    assert store.stored == ["Indigo costs 250 EGP."]
+    assert result['sources'] == SOURCES and result['cached'] is False and result['faq'] is None
+
+
+def test_faq_answer_skips_search_and_generation():
+    faq = {'answer': "250 EGP", 'sources': [], 'match': 'exact'}
+    store, result = FakeStore(faq=faq), {}
+    assert list(store.answer_stream("indigo price?", result=result)) == ["250 EGP"]
+    assert store.searches == [] and store.stored == []
+    assert result['cached'] is True and result['faq'] == 'exact'
+
+
+def test_cached_answer_is_served_in_one_piece():
+    store = FakeStore(cached={'answer': "250 EGP", 'sources': SOURCES})
+    assert store.answer("indigo price?")['answer'] == "250 EGP"
+    assert store.searches == []
+
+
+def test_failed_generation_is_not_cached():
+    store = FakeStore(error=True)
+    store.answer("indigo price?")
+    assert store.stored == []
+
+
+def test_search_fn_replaces_the_store_search():
+    store, calls = FakeStore(), []
+    list(store.answer_stream("indigo price?", n_results=3,
+                             search_fn=lambda query, n, filters: calls.append((query, n)) or SOURCES))
+    assert calls == [("indigo price?", 3)] and store.searches == []
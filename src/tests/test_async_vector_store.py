@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import NAMESPACE_URL, uuid5
+
+import numpy as np
+import pytest
+from qdrant_client import models
+
+from qdrant_vector_store_DB.async_vector_store import AsyncQdrantVectorStoreManager
+from qdrant_vector_store_DB.collection_layout import CollectionLayout
+from qdrant_vector_store_DB.rerank_policy import RerankPolicy
+
+
+def make_manager() -> AsyncQdrantVectorStoreManager:
+    # No client or models: the sync methods must fail before touching either
+    return AsyncQdrantVectorStoreManager.__new__(AsyncQdrantVectorStoreManager)
+
+
+def test_sync_search_raises_instead_of_returning_a_coroutine():
+    with pytest.raises(TypeError, match="asearch"):
+        make_manager().search("internet packages", n_results=3)
+
+
+@pytest.mark.parametrize("name", [
+    "search_batch", "add_documents", "add_documents_stream", "delete_points", "count",
+    "get_point_index", "get_collection_stats", "delete_collection", "reset_collection",
+    "migrate_collection", "answer", "answer_stream",
+])
+def test_inherited_sync_qdrant_methods_raise(name):
+    with pytest.raises(TypeError, match="synchronous"):
+        getattr(make_manager(), name)()
+
+
+class FakeAsyncClient:
+    """query_points() answers each retrieval leg with a scripted ranking"""
+
+    def __init__(self, legs):
+        self.legs = legs
+        self.calls = []
+
+    async def query_points(self, collection_name, query, using, query_filter=None, limit=10,
+                           with_payload=True, search_params=None):
+        self.calls.append((using, limit))
+        return SimpleNamespace(points=self.legs[using][:limit])
+
+
+def point(name: str, score: float) -> models.ScoredPoint:
+    return models.ScoredPoint(id=str(uuid5(NAMESPACE_URL, name)), version=0, score=score,
+                              payload={'doc_id': name, 'content': name})
+
+
+def fused_ids(legs, n_results: int):
+    manager = make_manager()
+    manager.client = FakeAsyncClient(legs)
+    manager.collection_name = "test"
+    manager.collection_layout = CollectionLayout()
+    manager.rerank_policy = RerankPolicy()
+    manager._ready = True
+    manager._encode_dense = lambda texts, prefix="passage": np.ones((len(texts), 4), dtype=np.float32)
+    manager._sparse_embed = lambda texts: [None] * len(texts)
+    manager._to_sparse_vector = lambda embedding: models.SparseVector(indices=[0], values=[1.0])
+    results = asyncio.run(manager.asearch("fiber price", n_results=n_results, use_reranker=False))
+    return [result['id'] for result in results], manager.client.calls
+
+
+def test_asearch_fuses_both_legs_with_rrf():
+    legs = {
+        'dense': [point("both", 0.9), point("dense_only", 0.8), point("tail", 0.1)],
+        'bm25': [point("bm25_only", 12.0), point("both", 11.0), point("tail", 1.0)],
+    }
+    ids, calls = fused_ids(legs, n_results=4)
+    # Found by both legs beats ranked first by one leg only (k=60: 2/63 > 1/61)
+    assert ids[:2] == ["both", "tail"]
+    assert set(ids[2:]) == {"dense_only", "bm25_only"}
+    assert sorted(calls) == [('bm25', 4), ('dense', 4)]
+
+
+def test_asearch_returns_hits_found_by_one_leg_only():
+    ids, _ = fused_ids({'dense': [], 'bm25': [point("bm25_only", 5.0)]}, n_results=3)
+    assert ids == ["bm25_only"]
@@ -0,0 +1,115 @@
+import pytest
+
+from data_indexer.dedup import BoilerplateStripper, ChunkDeduplicator, MinHashLSH
+
+PLAN = ("The WE Indigo postpaid plan includes local minutes to all networks, mobile data for browsing "
+        "and social apps, free calls to WE numbers and roaming bundles that can be added from the app. "
+        "Customers subscribe at any WE branch or through the My WE application, pay one monthly bill "
+        "and can upgrade or downgrade the plan at the start of every billing cycle without fees. "
+        "Unused minutes do not roll over, extra usage is charged at the standard tariff and the plan "
+        "renews automatically each month unless it is cancelled before the renewal date. Families can "
+        "share the data quota between up to four lines, each added line gets its own number and SIM "
+        "card, and the account owner sees the usage of every line in the app. Business customers get "
+        "a dedicated account manager, invoices by email and priority support on the hotline.")
+
+
+def plan_chunk(price: int, quota: int = 40) -> str:
+    return f"{PLAN} Monthly fee {price} EGP with {quota} GB."
+
+
+def test_chunks_differing_only_in_price_are_both_kept():
+    dedup = ChunkDeduplicator()
+    assert dedup.check(plan_chunk(250)) is None
+    assert dedup.check(plan_chunk(350)) is None
+    assert dedup.stats['near_duplicates'] == 0
+
+
+def test_near_copy_with_the_same_numbers_is_dropped():
+    dedup = ChunkDeduplicator()
+    assert dedup.check(plan_chunk(250)) is None
+    assert dedup.check(plan_chunk(250) + " Apply now.") == 'near'
+
+
+def test_exact_copy_is_dropped():
+    dedup = ChunkDeduplicator()
+    assert dedup.check(plan_chunk(250)) is None
+    assert dedup.check("  " + plan_chunk(250).upper()) == 'exact'
+
+
+def test_loaded_state_keeps_the_number_guard(tmp_path):
+    dedup = ChunkDeduplicator()
+    dedup.filter([{'content': plan_chunk(250), 'point_id': 'p1'}], key='https://te.eg/indigo')
+    dedup.save(tmp_path / "signatures.json")
+
+    seeded = ChunkDeduplicator.load(tmp_path / "signatures.json", {'p1'})
+    assert seeded.check(plan_chunk(350, quota=60), key='https://te.eg/indigo-plus') is None
+    assert seeded.check(plan_chunk(250) + " Apply now.", key='https://te.eg/offers') == 'near'
+
+
+def test_loaded_chunks_do_not_count_against_their_own_page(tmp_path):
+    dedup = ChunkDeduplicator()
+    dedup.filter([{'content': plan_chunk(250), 'point_id': 'p1'}], key='https://te.eg/indigo')
+    dedup.save(tmp_path / "signatures.json")
+
+    seeded = ChunkDeduplicator.load(tmp_path / "signatures.json", {'p1'})
+    assert seeded.check(plan_chunk(250), key='https://te.eg/indigo') is None
+    assert seeded.check(plan_chunk(250), key='https://te.eg/other') == 'exact'
+
+
+def test_chunks_deleted_since_the_save_are_not_loaded(tmp_path):
+    dedup = ChunkDeduplicator()
+    dedup.filter([{'content': plan_chunk(250), 'point_id': 'p1'}], key='https://te.eg/indigo')
+    dedup.save(tmp_path / "signatures.json")
+
+    seeded = ChunkDeduplicator.load(tmp_path / "signatures.json", point_ids=set())
+    assert seeded.check(plan_chunk(250), key='https://te.eg/other') is None
+
+
+FOOTER = "Copyright Telecom Egypt all rights reserved contact us on 111 or visit the nearest branch"
+
+
+def test_loaded_stripper_is_not_extended_by_a_few_pages(tmp_path):
+    pages = [f"{FOOTER} page {i} about topic {i} with its own words" for i in range(10)]
+    BoilerplateStripper().fit(pages).save(tmp_path / "boilerplate.json")
+    stripper = BoilerplateStripper.load(tmp_path / "boilerplate.json")
+    assert stripper.n_docs == 10
+
+    offer = "Summer offer double data on all Indigo plans for new and existing customers this month only"
+    stripper.partial_fit([offer, offer, offer])
+    assert stripper.strip(offer) == offer
+
+
+def test_stripper_removes_runs_shared_by_most_pages():
+    pages = [f"{FOOTER} plan{i} costs {100 + i} EGP monthly" for i in range(10)]
+    stripper = BoilerplateStripper().fit(pages)
+    assert stripper.strip(pages[3]) == "plan3 costs 103 EGP monthly"
+    assert stripper.stats['chars_removed'] == len(FOOTER) + 1
+
+
+def test_stripper_keeps_runs_below_the_page_share():
+    pages = [f"{FOOTER} page 0"] + [f"page {i} about topic {i} with its own words only" for i in range(1, 10)]
+    stripper = BoilerplateStripper(min_docs=2).fit(pages)
+    assert stripper.strip(pages[0]) == pages[0]
+
+
+def test_stripper_keeps_line_breaks_between_kept_text():
+    pages = [f"intro{i}\n{FOOTER}\nbody{i}" for i in range(5)]
+    assert BoilerplateStripper().fit(pages).strip(pages[0]) == "intro0\n\nbody0"
+
+
+def test_minhash_finds_near_copies_only():
+    lsh = MinHashLSH()
+    original = lsh.add(lsh.signature(PLAN))
+    assert lsh.query(lsh.signature(PLAN + " Apply now."), 0.85) == original
+    assert lsh.query(lsh.signature(FOOTER), 0.85) is None
+
+
+def test_minhash_query_respects_accept():
+    lsh = MinHashLSH()
+    lsh.add(lsh.signature(PLAN))
+    assert lsh.query(lsh.signature(PLAN), 0.85, accept=lambda idx: False) is None
+
+
+def test_minhash_rejects_uneven_bands():
+    with pytest.raises(ValueError):
+        MinHashLSH(num_perm=64, bands=10)
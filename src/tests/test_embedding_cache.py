@@ -0,0 +1,82 @@
+import numpy as np
+
+from qdrant_vector_store_DB.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+class Encoder:
+    """Encodes a text as a vector filled with its length; records every call"""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([np.full(self.dim, len(text), dtype=np.float32) for text in texts])
+
+
+def test_cached_texts_are_not_encoded_again(tmp_path):
+    cache, encode = EmbeddingCache(str(tmp_path), "e5", DIM), Encoder()
+    first = cache.get_or_encode(["fiber", "adsl", "fiber"], "passage", encode)
+    second = cache.get_or_encode(["adsl", "fiber"], "passage", encode)
+    assert encode.calls == [["fiber", "adsl"]]
+    assert np.array_equal(second, first[[1, 0]])
+    assert cache.stats()['hits'] == 2
+    cache.close()
+
+
+def test_prefix_is_part_of_the_key(tmp_path):
+    cache, encode = EmbeddingCache(str(tmp_path), "e5", DIM), Encoder()
+    cache.get_or_encode(["fiber"], "passage", encode)
+    cache.get_or_encode(["fiber"], "query", encode)
+    assert len(encode.calls) == 2
+    cache.close()
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    cache, encode = EmbeddingCache(str(tmp_path), "e5", DIM), Encoder()
+    cache.get_or_encode(["fiber"], "passage", encode)
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "e5", DIM)
+    assert reopened.get_or_encode(["fiber"], "passage", encode)[0][0] == len("fiber")
+    assert len(encode.calls) == 1
+    reopened.close()
+
+
+def test_slot_holding_another_key_is_a_miss(tmp_path):
+    cache, encode = EmbeddingCache(str(tmp_path), "e5", DIM), Encoder()
+    cache.get_or_encode(["fiber"], "passage", encode)
+    slot = cache._slots[cache._key("passage", "fiber")]
+    cache._keys[slot] = np.frombuffer(cache._key("passage", "adsl"), dtype=np.uint8)
+
+    assert cache.get_or_encode(["fiber"], "passage", encode)[0][0] == len("fiber")
+    assert len(encode.calls) == 2
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    # 64k float16 dimensions per entry: 1 MB holds 7 entries
+    dim = 65536
+    cache, encode = EmbeddingCache(str(tmp_path), "e5", dim, max_size_mb=1), Encoder(dim)
+    assert cache.max_items == 7
+    texts = [f"text {i}" for i in range(7)]
+    for text in texts:
+        cache.get_or_encode([text], "passage", encode)
+    cache.get_or_encode([texts[0]], "passage", encode)  # text 0 is now the most recent
+
+    cache.get_or_encode(["text 7"], "passage", encode)
+    assert cache.stats()['evictions'] == 1
+    assert cache._key("passage", "text 1") not in cache._slots
+    assert cache._key("passage", "text 0") in cache._slots
+    cache.close()
+
+
+def test_directory_in_use_falls_back_to_the_next_one(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "e5", DIM)
+    second = EmbeddingCache(str(tmp_path), "e5", DIM)
+    assert second.directory == first.directory + ".1"
+    first.close()
+    second.close()
@@ -0,0 +1,67 @@
+from typing import Dict, List
+
+from data_indexer.data_indexing import DocumentIndexer, make_doc_id, make_point_id
+
+
+def test_point_id_depends_on_source_and_text_only():
+    assert make_point_id("https://te.eg/a", "fiber 250 EGP") == make_point_id("https://te.eg/a", "fiber 250 EGP")
+    assert make_point_id("https://te.eg/a", "fiber 250 EGP") != make_point_id("https://te.eg/b", "fiber 250 EGP")
+    assert make_point_id("https://te.eg/a", "fiber 250 EGP") != make_point_id("https://te.eg/a", "fiber 300 EGP")
+
+
+def test_doc_id_is_a_point_id_prefix():
+    point_id = make_point_id("https://te.eg/a", "fiber")
+    assert make_doc_id("web", point_id) == "web_" + point_id.replace('-', '')[:12]
+
+
+class FakeStore:
+    """Runs the chunker over the records like add_documents_stream and records upserts / deletes"""
+
+    def __init__(self):
+        self.upserted: List[str] = []
+        self.deleted: List[str] = []
+
+    def add_documents_stream(self, records, batch_size, chunker) -> Dict:
+        documents = [doc for record in records for doc in chunker(record)]
+        self.upserted += [doc['point_id'] for doc in documents]
+        return {'upsert': {'items': len(documents)}}
+
+    def delete_points(self, point_ids: List[str]) -> int:
+        self.deleted += point_ids
+        return len(point_ids)
+
+
+def chunk_page(page: Dict):
+    return page['url'], [{'content': text, 'point_id': make_point_id(page['url'], text)} for text in page['chunks']]
+
+
+def run(store: FakeStore, pages: List[Dict], existing: Dict[str, set], **kwargs) -> Dict:
+    return DocumentIndexer(store, boilerplate_file=None, dedup_file=None)._index_stream(
+        pages, chunk_page, existing, batch_size=8, incremental=True, **kwargs)
+
+
+def test_unchanged_chunks_are_skipped_and_stale_ones_deleted():
+    store, existing = FakeStore(), {}
+    run(store, [{'url': 'a', 'chunks': ["intro", "price 250"]}], existing)
+
+    store.upserted.clear()
+    stats = run(store, [{'url': 'a', 'chunks': ["intro", "price 300"]}], existing)
+    assert stats == {'added': 1, 'skipped': 1, 'deleted': 1}
+    assert store.upserted == [make_point_id('a', "price 300")]
+    assert store.deleted == [make_point_id('a', "price 250")]
+    assert existing['a'] == {make_point_id('a', "intro"), make_point_id('a', "price 300")}
+
+
+def test_keys_absent_from_the_input_are_only_deleted_on_request():
+    store, existing = FakeStore(), {}
+    run(store, [{'url': 'a', 'chunks': ["intro"]}, {'url': 'b', 'chunks': ["offer"]}], existing)
+
+    assert run(store, [{'url': 'a', 'chunks': ["intro"]}], existing)['deleted'] == 0
+    assert run(store, [{'url': 'a', 'chunks': ["intro"]}], existing, delete_missing_keys=True)['deleted'] == 1
+    assert store.deleted == [make_point_id('b', "offer")]
+
+
+def test_repeated_chunk_is_upserted_once():
+    store = FakeStore()
+    stats = run(store, [{'url': 'a', 'chunks': ["intro", "intro"]}], {})
+    assert stats['added'] == 1 and stats['skipped'] == 1
@@ -0,0 +1,37 @@
+from data_indexer.ingestion_queue import IngestionJobStore
+
+
+def test_claim_takes_the_oldest_queued_jobs_once(tmp_path):
+    jobs = IngestionJobStore(str(tmp_path / "jobs.db"))
+    ids = [jobs.add(f"file{i}.pdf", f"/spool/file{i}.pdf") for i in range(3)]
+
+    claimed = jobs.claim(2)
+    assert [job['id'] for job in claimed] == ids[:2]
+    assert jobs.count_queued() == 1
+    assert [job['id'] for job in jobs.claim(5)] == ids[2:]
+    assert jobs.claim(5) == []
+
+
+def test_update_changes_only_given_fields(tmp_path):
+    jobs = IngestionJobStore(str(tmp_path / "jobs.db"))
+    job_id = jobs.add("prices.pdf", "/spool/prices.pdf")
+    jobs.update(job_id, status='indexing', progress=0.5)
+    jobs.update(job_id, message="12 pages indexed", stats={'pages': 12})
+
+    job, = jobs.get([job_id])
+    assert (job['status'], job['progress'], job['message']) == ('indexing', 0.5, "12 pages indexed")
+    assert job['stats'] == {'pages': 12}
+    assert jobs.get([]) == []
+
+
+def test_jobs_cut_off_by_a_restart_are_queued_again(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    jobs = IngestionJobStore(db_path)
+    extracting = jobs.add("a.pdf", "/spool/a.pdf")
+    done = jobs.add("b.pdf", "/spool/b.pdf")
+    jobs.claim(2)
+    jobs.update(done, status='done', progress=1.0)
+
+    restarted = IngestionJobStore(db_path)
+    assert [job['id'] for job in restarted.claim(5)] == [extracting]
+    assert restarted.get([done])[0]['status'] == 'done'
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from data_extraction.data_extraction_docs.records_io import JsonlSink, iter_json_records
+
+RECORDS = [{'url': f"https://te.eg/{i}", 'content': "باقات الإنترنت " * i, 'page': i} for i in range(20)]
+
+
+def test_json_lines_round_trip(tmp_path):
+    path = tmp_path / "pages.jsonl"
+    with JsonlSink(str(path), buffer_records=3) as sink:
+        for record in RECORDS:
+            sink.write(record)
+    assert sink.records_written == len(RECORDS)
+    assert list(iter_json_records(str(path))) == RECORDS
+
+
+def test_json_array_is_streamed_across_reads(tmp_path):
+    path = tmp_path / "pages.json"
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=2), encoding='utf-8')
+    # Reads far smaller than one record: every record spans several reads
+    assert list(iter_json_records(str(path), read_size=16)) == RECORDS
+
+
+def test_empty_files_yield_nothing(tmp_path):
+    (tmp_path / "empty.json").write_text("  \n", encoding='utf-8')
+    (tmp_path / "empty_array.json").write_text("[ ]", encoding='utf-8')
+    assert list(iter_json_records(str(tmp_path / "empty.json"))) == []
+    assert list(iter_json_records(str(tmp_path / "empty_array.json"))) == []
+
+
+def test_truncated_array_raises(tmp_path):
+    path = tmp_path / "pages.json"
+    path.write_text(json.dumps(RECORDS[:3])[:-20], encoding='utf-8')
+    with pytest.raises(ValueError, match="Truncated"):
+        list(iter_json_records(str(path), read_size=16))
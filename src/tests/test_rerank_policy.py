@@ -0,0 +1,55 @@
+import pytest
+
+from qdrant_vector_store_DB.rerank_policy import RerankPolicy
+
+
+def fused(*scores):
+    return [{'score': score, 'content': f"doc {i}"} for i, score in enumerate(scores)]
+
+
+def test_every_candidate_is_reranked_by_default():
+    policy = RerankPolicy()
+    # Decisive margin, but the margin paths are off unless configured
+    assert policy.plan(fused(1 / 61 + 1 / 70, 1 / 61, 1 / 62, 1 / 63), n_results=2) == ('full', 4)
+
+
+def test_candidate_limit_is_bounded():
+    assert RerankPolicy(candidate_multiplier=3).candidate_limit(5) == 15
+    assert RerankPolicy(candidate_multiplier=3, max_candidates=8).candidate_limit(5) == 8
+    assert RerankPolicy(max_candidates=2).candidate_limit(5) == 5
+
+
+def test_rrf_margin():
+    assert RerankPolicy.rrf_margin(fused(0.04, 0.03)) == pytest.approx(0.25)
+    assert RerankPolicy.rrf_margin(fused(0.04)) == 1.0
+    assert RerankPolicy.rrf_margin([]) == 0.0
+
+
+def test_margin_thresholds_skip_or_truncate():
+    policy = RerankPolicy(skip_margin=0.5, truncate_margin=0.2, truncate_depth=3)
+    results = fused(0.04, 0.03, 0.02, 0.01, 0.005, 0.001)
+    assert policy.plan(results, n_results=2) == ('truncated_margin', 3)
+    assert policy.plan(fused(0.04, 0.01, 0.005), n_results=2) == ('skipped_margin', 0)
+    assert policy.plan(fused(0.04, 0.039, 0.03), n_results=2) == ('full', 3)
+    assert policy.stats()['paths']['truncated_margin'] == 1
+
+
+def test_latency_budget_truncates_then_falls_back():
+    policy = RerankPolicy(latency_budget_ms=100)
+    policy.observe(n_pairs=10, seconds=0.1)  # 10 ms per pair
+    results = fused(*[1 / (61 + i) for i in range(12)])
+    assert policy.plan(results, n_results=5, elapsed_ms=20) == ('budget_truncated', 8)
+    assert policy.plan(results, n_results=5, elapsed_ms=70) == ('budget_fallback', 0)
+
+
+def test_observe_smooths_the_per_pair_cost():
+    policy = RerankPolicy()
+    policy.observe(n_pairs=10, seconds=0.1)
+    policy.observe(n_pairs=10, seconds=0.2, alpha=0.5)
+    assert policy.ms_per_pair == pytest.approx(15.0)
+
+
+def test_truncate_document_by_words_without_a_fast_tokenizer():
+    policy = RerankPolicy(doc_token_budget=3)
+    assert policy.truncate_document("one two three four") == "one two three"
+    assert policy.truncate_document("one two") == "one two"
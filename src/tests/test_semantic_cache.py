@@ -0,0 +1,81 @@
+import numpy as np
+
+from qdrant_vector_store_DB import semantic_cache
+from qdrant_vector_store_DB.semantic_cache import SemanticResponseCache, query_numbers
+
+EN = ('en', ())
+AR = ('ar', ())
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def cache_with(question="100GB package price", scope=EN, **kwargs):
+    cache = SemanticResponseCache(similarity_threshold=0.95, **kwargs)
+    cache.store(unit(1, 0, 0), scope, query=question, answer="250 EGP", sources=[], latency=2.0)
+    return cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_query_numbers_reads_arabic_indic_digits():
+    assert query_numbers("باقة ١٠٠ جيجا") == {'100'}
+    assert query_numbers("100GB for 2.5 EGP") == {'100', '2.5'}
+    assert query_numbers("internet packages") == frozenset()
+
+
+def test_similar_question_in_the_same_scope_hits():
+    cache = cache_with()
+    hit = cache.lookup(unit(1, 0.1, 0), EN, query="price of the 100GB package")
+    assert hit['answer'] == "250 EGP"
+    assert cache.stats()['saved_latency_seconds'] == 2.0
+
+
+def test_dissimilar_question_misses():
+    assert cache_with().lookup(unit(1, 1, 0), EN, query="100GB package price") is None
+
+
+def test_other_scope_misses():
+    assert cache_with().lookup(unit(1, 0, 0), AR, query="100GB package price") is None
+
+
+def test_question_about_another_number_misses():
+    cache = cache_with()
+    assert cache.lookup(unit(1, 0, 0), EN, query="140GB package price") is None
+    assert cache.stats()['rejected_number_mismatch'] == 1
+
+
+def test_number_check_can_be_turned_off():
+    assert cache_with(match_numbers=False).lookup(unit(1, 0, 0), EN, query="140GB package price") is not None
+
+
+def test_expired_entries_are_not_served_and_dropped(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    cache = cache_with(ttl_seconds=60)
+    clock.now += 61
+    assert cache.lookup(unit(1, 0, 0), EN, query="100GB package price") is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = cache_with(question="fiber price", max_entries=2)
+    cache.store(unit(0, 1, 0), EN, query="adsl price", answer="adsl", sources=[], latency=1.0)
+    cache.lookup(unit(1, 0, 0), EN, query="fiber price")
+    cache.store(unit(0, 0, 1), EN, query="4g price", answer="4g", sources=[], latency=1.0)
+    assert cache.lookup(unit(1, 0, 0), EN, query="fiber price") is not None
+    assert cache.lookup(unit(0, 1, 0), EN, query="adsl price") is None
+
+
+def test_invalidate_drops_everything():
+    cache = cache_with()
+    cache.invalidate()
+    assert cache.lookup(unit(1, 0, 0), EN, query="100GB package price") is None
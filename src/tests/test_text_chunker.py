@@ -0,0 +1,71 @@
+import pytest
+
+from data_chunking import text_chunker
+from data_chunking.text_chunker import RegexTokenizer, TokenChunker
+
+TOKENIZER = RegexTokenizer()
+
+SENTENCES = " ".join(f"Sentence {i} describes plan number {i} in a few words." for i in range(30))
+
+
+def chunker(max_tokens: int, overlap: int) -> TokenChunker:
+    return TokenChunker(max_tokens, overlap, tokenizer=TOKENIZER)
+
+
+def test_chunks_stay_within_the_token_limit():
+    for _, _, start, end in chunker(40, 10).iter_spans(SENTENCES):
+        assert 0 < end - start <= 40
+
+
+def test_consecutive_chunks_share_at_least_the_overlap():
+    spans = list(chunker(40, 10).iter_spans(SENTENCES))
+    assert spans[-1][3] == len(TOKENIZER.offsets(SENTENCES))
+    for (_, _, _, previous_end), (_, _, start, _) in zip(spans, spans[1:]):
+        assert previous_end - start >= 10
+
+
+def test_without_overlap_chunks_tile_the_text():
+    spans = list(chunker(40, 0).iter_spans(SENTENCES))
+    assert spans[0][2] == 0
+    for (_, _, _, previous_end), (_, _, start, _) in zip(spans, spans[1:]):
+        assert start == previous_end
+
+
+def test_chunks_end_at_sentence_boundaries():
+    for chunk in chunker(40, 0).chunk(SENTENCES):
+        assert chunk.endswith(".")
+
+
+def test_paragraph_boundary_wins_over_a_later_sentence_boundary():
+    text = "First paragraph. Still first.\n\nSecond paragraph. " + "More words here. " * 10
+    first = chunker(20, 0).chunk(text)[0]
+    assert first == "First paragraph. Still first."
+
+
+def test_arabic_sentences_split_at_arabic_question_marks():
+    text = " ".join(f"ما سعر الباقة رقم {i} الشهرية؟" for i in range(20))
+    for chunk in chunker(16, 0).chunk(text):
+        assert chunk.endswith("؟")
+
+
+def test_short_and_empty_texts():
+    assert chunker(40, 10).chunk("One short line.") == ["One short line."]
+    assert chunker(40, 10).chunk("   ") == []
+
+
+@pytest.mark.parametrize("max_tokens, overlap", [(0, 0), (10, 10), (10, -1)])
+def test_invalid_limits_raise(max_tokens, overlap):
+    with pytest.raises(ValueError):
+        TokenChunker(max_tokens, overlap, tokenizer=TOKENIZER)
+
+
+def test_recursive_chunk_keeps_level_before_overlap(monkeypatch):
+    calls = []
+
+    def fake_iter_chunks(text, max_tokens, overlap):
+        calls.append((max_tokens, overlap))
+        return iter([text])
+
+    monkeypatch.setattr(text_chunker, "iter_chunks", fake_iter_chunks)
+    assert text_chunker.recursive_chunk("text", 64, 0, 16) == ["text"]
+    assert calls == [(64, 16)]
@@ -0,0 +1,44 @@
+from data_extraction.data_extraction_scrapy.url_state import UrlStateStore
+
+
+def test_record_keeps_fields_not_given_again(tmp_path):
+    store = UrlStateStore(str(tmp_path / "crawl_state.db"))
+    crawl = store.begin_crawl()
+    store.record("https://te.eg/a", crawl, content_hash="h1", etag='"v1"', links=["https://te.eg/b"])
+    store.record("https://te.eg/a", crawl, last_modified="Tue, 01 Sep 2026 10:00:00 GMT")
+
+    state = store.get("https://te.eg/a")
+    assert (state['etag'], state['content_hash'], state['links']) == ('"v1"', "h1", ["https://te.eg/b"])
+    assert state['last_modified'] == "Tue, 01 Sep 2026 10:00:00 GMT"
+    assert store.get("https://te.eg/missing") is None
+
+
+def test_pages_a_later_crawl_did_not_reach_are_unseen(tmp_path):
+    store = UrlStateStore(str(tmp_path / "crawl_state.db"))
+    first = store.begin_crawl()
+    store.record("https://te.eg/a", first)
+    store.record("https://te.eg/b", first)
+
+    second = store.begin_crawl()
+    store.record("https://te.eg/a", second)
+    assert store.unseen_since(second) == ["https://te.eg/b"]
+
+
+def test_removed_pages_are_listed_per_crawl_and_revived_when_seen(tmp_path):
+    store = UrlStateStore(str(tmp_path / "crawl_state.db"))
+    first = store.begin_crawl()
+    store.record("https://te.eg/a", first)
+    store.record("https://te.eg/b", first)
+
+    second = store.begin_crawl()
+    store.mark_removed(["https://te.eg/a"], second, reason='http_404')
+    store.mark_removed(["https://te.eg/b"], second, reason='unseen')
+    assert sorted(store.removed_in_crawl(second)) == ["https://te.eg/a", "https://te.eg/b"]
+    assert store.removed_in_crawl(second, reason='unseen') == ["https://te.eg/b"]
+    assert store.unseen_since(second) == []
+    assert store.stats() == {'removed': 2}
+
+    third = store.begin_crawl()
+    store.record("https://te.eg/a", third)
+    assert store.get("https://te.eg/a")['status'] == 'live'
+    assert store.get("https://te.eg/a")['removed_reason'] is None